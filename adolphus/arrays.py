@@ -0,0 +1,564 @@
+"""\
+Array geometry module. Contains vectorized (NumPy) counterparts of the geometry
+module operations, for batch evaluation over sets of (directional) points.
+
+A point array is an M{N x 3} array of positions or an M{N x 5} array of
+directional points in the same component order as L{DirectionalPoint}
+(M{x, y, z, rho, eta}). Rows of a directional point array with a NaN M{rho}
+are treated as non-directional points.
+
+@author: Aaron Mavrinac
+@organization: University of Windsor
+@contact: mavrin1@uwindsor.ca
+@license: GPL-3
+"""
+
+import os
+import re
+import struct
+import numpy as np
+from math import pi
+
+from .geometry import Point, DirectionalPoint, Triangle
+
+STL_FACET = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (9,)),
+    ('attribute', '<u2')])
+
+
+def points_array(points):
+    """\
+    Build a point array from a sequence of points.
+
+    @param points: The points.
+    @type points: C{list} of L{Point}
+    @return: The point array (M{N x 5} if any point is directional).
+    @rtype: C{numpy.ndarray}
+    """
+    points = list(points)
+    if any([isinstance(p, DirectionalPoint) for p in points]):
+        return np.array([(p.x, p.y, p.z, p.rho, p.eta) \
+            if isinstance(p, DirectionalPoint) else \
+            (p.x, p.y, p.z, np.nan, np.nan) for p in points],
+            dtype=float).reshape(-1, 5)
+    return np.array([(p.x, p.y, p.z) for p in points],
+        dtype=float).reshape(-1, 3)
+
+
+def array_points(array):
+    """\
+    Build a list of points from a point array.
+
+    @param array: The point array.
+    @type array: C{numpy.ndarray}
+    @return: The points.
+    @rtype: C{list} of L{Point}
+    """
+    if array.shape[1] == 3:
+        return [Point(*row) for row in array.tolist()]
+    return [Point(*row[:3]) if row[3] != row[3] else DirectionalPoint(*row) \
+        for row in array.tolist()]
+
+
+def merge_points(arrays):
+    """\
+    Merge point arrays, removing duplicate points (to the precision of point
+    hashing). Non-directional points are padded with NaN directions if any of
+    the arrays is directional.
+
+    @param arrays: The point arrays.
+    @type arrays: C{list} of C{numpy.ndarray}
+    @return: The merged point array.
+    @rtype: C{numpy.ndarray}
+    """
+    arrays = [np.asarray(a, dtype=float) for a in arrays if len(a)]
+    if not arrays:
+        return np.zeros((0, 3))
+    width = max([a.shape[1] for a in arrays])
+    merged = np.concatenate([a if a.shape[1] == width else \
+        np.column_stack((a, np.tile(np.nan, (len(a), 2)))) for a in arrays])
+    keys = np.round(merged, 4)
+    keys[np.isnan(keys)] = np.inf
+    order = np.lexsort(keys.T[::-1])
+    keys = keys[order]
+    new = np.ones(len(merged), dtype=bool)
+    new[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+    return merged[np.sort(order[new])]
+
+
+def pose_arrays(pose):
+    """\
+    Return the rotation matrix and translation vector of a pose as arrays.
+
+    @param pose: The pose.
+    @type pose: L{Pose}
+    @return: Rotation matrix and translation vector.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    return np.array(pose.R.to_rotation_matrix()), np.array(tuple(pose.T))
+
+
+def compose_pose_arrays(R1, T1, R2, T2):
+    """\
+    Compose poses given as rotation matrix and translation vector arrays (cf.
+    L{Pose.__add__}): the result applies the first pose, then the second.
+    Either pose may be a single pose or an array of poses.
+
+    @param R1: The (M{N x}) M{3 x 3} rotation matrices of the first poses.
+    @type R1: C{numpy.ndarray}
+    @param T1: The (M{N x}) M{3} translation vectors of the first poses.
+    @type T1: C{numpy.ndarray}
+    @param R2: The (M{N x}) M{3 x 3} rotation matrices of the second poses.
+    @type R2: C{numpy.ndarray}
+    @param T2: The (M{N x}) M{3} translation vectors of the second poses.
+    @type T2: C{numpy.ndarray}
+    @return: Rotation matrices and translation vectors of the composed poses.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    return np.einsum('...ij,...jk->...ik', R2, R1), \
+        np.einsum('...ij,...j->...i', R2, T1) + T2
+
+
+def unit_vectors(vectors):
+    """\
+    Normalize an array of vectors (cf. L{Point.unit}).
+
+    @param vectors: The M{N x 3} array of vectors.
+    @type vectors: C{numpy.ndarray}
+    @return: The M{N x 3} array of unit vectors.
+    @rtype: C{numpy.ndarray}
+    """
+    return (vectors.T / np.sqrt((vectors ** 2).sum(axis=1))).T
+
+
+def direction_units(rho, eta):
+    """\
+    Unit vector representation of directions (cf.
+    L{DirectionalPoint.direction_unit}).
+
+    @param rho: Polar angles.
+    @type rho: C{numpy.ndarray}
+    @param eta: Azimuth angles.
+    @type eta: C{numpy.ndarray}
+    @return: The M{N x 3} array of unit vectors.
+    @rtype: C{numpy.ndarray}
+    """
+    srho = np.sin(rho)
+    return np.column_stack((srho * np.cos(eta), srho * np.sin(eta),
+        np.cos(rho)))
+
+
+def direction_angles(directions):
+    """\
+    Polar and azimuth angles of unit direction vectors (cf. L{Pose._dmap}).
+
+    @param directions: The M{N x 3} array of unit vectors.
+    @type directions: C{numpy.ndarray}
+    @return: Polar and azimuth angles.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    rho = np.arccos(np.clip(directions[:, 2], -1.0, 1.0))
+    eta = np.arctan2(directions[:, 1], directions[:, 0]) % (2 * pi)
+    return rho, eta
+
+
+def split_points(array):
+    """\
+    Split a point array into positions and unit directions.
+
+    @param array: The point array.
+    @type array: C{numpy.ndarray}
+    @return: Positions and directions (C{None} if non-directional).
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    array = np.asarray(array, dtype=float)
+    if array.shape[1] < 5:
+        return array[:, :3], None
+    return array[:, :3], direction_units(array[:, 3], array[:, 4])
+
+
+def join_points(positions, directions=None):
+    """\
+    Join positions and unit directions into a point array.
+
+    @param positions: The M{N x 3} array of positions.
+    @type positions: C{numpy.ndarray}
+    @param directions: The M{N x 3} array of unit directions (optional).
+    @type directions: C{numpy.ndarray}
+    @return: The point array.
+    @rtype: C{numpy.ndarray}
+    """
+    if directions is None:
+        return positions
+    rho, eta = direction_angles(directions)
+    return np.column_stack((positions, rho, eta))
+
+
+def transform(pose, positions, directions=None):
+    """\
+    Map positions and (optionally) directions through a pose.
+
+    @param pose: The pose.
+    @type pose: L{Pose}
+    @param positions: The M{N x 3} array of positions.
+    @type positions: C{numpy.ndarray}
+    @param directions: The M{N x 3} array of unit directions (optional).
+    @type directions: C{numpy.ndarray}
+    @return: Mapped positions and directions.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    R, T = pose_arrays(pose)
+    positions = np.dot(positions, R.T) + T
+    if directions is not None:
+        directions = np.dot(directions, R.T)
+    return positions, directions
+
+
+def triangles_array(triangles):
+    """\
+    Build a triangle array from a sequence of triangles.
+
+    @param triangles: The triangles.
+    @type triangles: C{list} of L{Triangle}
+    @return: The M{M x 3 x 3} array of triangle vertices.
+    @rtype: C{numpy.ndarray}
+    """
+    return np.array([[tuple(v) for v in t.vertices] for t in triangles],
+        dtype=float).reshape(-1, 3, 3)
+
+
+def array_triangles(array):
+    """\
+    Build a list of triangles from a triangle array.
+
+    @param array: The M{M x 3 x 3} (or M{M x 9}) triangle array.
+    @type array: C{numpy.ndarray}
+    @return: The triangles.
+    @rtype: C{list} of L{Triangle}
+    """
+    return [Triangle(Point(*row[0:3]), Point(*row[3:6]), Point(*row[6:9])) \
+        for row in np.asarray(array, dtype=float).reshape(-1, 9).tolist()]
+
+
+def triangle_points(triangles, reverse=False):
+    """\
+    Directional points at the centres of triangles, directed along their
+    normals (cf. L{Face.normal_angles}).
+
+    @param triangles: The M{M x 3 x 3} (or M{M x 9}) triangle array.
+    @type triangles: C{numpy.ndarray}
+    @param reverse: If true, reverse the orientation of the faces.
+    @type reverse: C{bool}
+    @return: The M{M x 5} point array.
+    @rtype: C{numpy.ndarray}
+    """
+    triangles = np.asarray(triangles, dtype=float).reshape(-1, 3, 3)
+    normals = unit_vectors(np.cross(triangles[:, 1] - triangles[:, 0],
+        triangles[:, 2] - triangles[:, 1]))
+    if reverse:
+        normals = -normals
+    rho, eta = direction_angles(normals)
+    return np.column_stack((triangles.mean(axis=1), rho, eta))
+
+
+def _first_unique(keys):
+    """\
+    Identify the unique rows of an integer key array, numbered in order of
+    first appearance.
+
+    @param keys: The M{N x K} key array.
+    @type keys: C{numpy.ndarray}
+    @return: The (increasing) indices of the first appearance of each unique
+        row, and the index of the unique row of each row.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    order = np.lexsort(keys.T[::-1])
+    new = np.ones(len(keys), dtype=bool)
+    new[1:] = (keys[order][1:] != keys[order][:-1]).any(axis=1)
+    # The sort is stable, so each group starts with its first appearance.
+    first = order[new]
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    index = np.empty(len(keys), dtype=np.int64)
+    index[order] = rank[np.cumsum(new) - 1]
+    return np.sort(first), index
+
+
+def _pack_pairs(rows, columns, count):
+    """\
+    Pack index pairs into the offset and data arrays of the sorted lists of
+    columns of each row, without duplicates (cf.
+    L{adolphus.meshcache.pack_lists}).
+
+    @param rows: The row indices.
+    @type rows: C{numpy.ndarray}
+    @param columns: The column indices.
+    @type columns: C{numpy.ndarray}
+    @param count: The number of rows.
+    @type count: C{int}
+    @return: The offset and data arrays.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    order = np.lexsort((columns, rows))
+    rows, columns = rows[order], columns[order]
+    new = np.ones(len(rows), dtype=bool)
+    new[1:] = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(rows[new], minlength=count))
+    return offsets, columns[new].astype(np.int64)
+
+
+def triangle_topology(triangles):
+    """\
+    Compute the topology of a triangle mesh as a set of arrays (cf.
+    L{adolphus.solid.RenderDynamic.topology_arrays}). Degenerate triangles are
+    skipped, coincident vertices are merged (to the precision of point
+    hashing), and vertices and edges are numbered in order of first
+    appearance.
+
+    @param triangles: The M{M x 3 x 3} (or M{M x 9}) triangle array.
+    @type triangles: C{numpy.ndarray}
+    @return: The named topology arrays.
+    @rtype: C{dict} of C{numpy.ndarray}
+    """
+    triangles = np.asarray(triangles, dtype=float).reshape(-1, 3, 3)
+    normals = np.cross(triangles[:, 1] - triangles[:, 0],
+        triangles[:, 2] - triangles[:, 1])
+    magnitude = np.sqrt((normals ** 2).sum(axis=1))
+    faces = np.flatnonzero(magnitude > 0)
+    topology = {'faces': faces.astype(np.int64),
+        'normals': (normals[faces].T / magnitude[faces]).T.reshape(-1, 3)}
+    points = triangles[faces].reshape(-1, 3)
+    first, index = _first_unique(np.round(points / 1e-4).astype(np.int64))
+    topology['vertices'] = points[first]
+    topology['face_vertices'] = face_vertices = index.reshape(-1, 3)
+    # The edges of each face, as (0, 2), (1, 0), and (2, 1).
+    a = face_vertices.ravel()
+    b = face_vertices[:, [2, 0, 1]].ravel()
+    first, edge_index = _first_unique(np.column_stack((np.minimum(a, b),
+        np.maximum(a, b))))
+    topology['edges'] = edges = np.column_stack((a[first], b[first]))
+    owners = np.repeat(np.arange(len(faces), dtype=np.int64), 3)
+    count = len(topology['vertices'])
+    topology['vertex_faces_o'], topology['vertex_faces_d'] = \
+        _pack_pairs(a, owners, count)
+    topology['vertex_edges_o'], topology['vertex_edges_d'] = \
+        _pack_pairs(edges.ravel(), np.repeat(np.arange(len(edges),
+        dtype=np.int64), 2), count)
+    topology['edge_faces_o'], topology['edge_faces_d'] = \
+        _pack_pairs(edge_index, owners, len(edges))
+    return topology
+
+
+def read_raw(filename):
+    """\
+    Read a raw ASCII triangle mesh file (nine vertex coordinates per line) into
+    a triangle array.
+
+    @param filename: The path of the raw file.
+    @type filename: C{str}
+    @return: The M{M x 9} triangle array.
+    @rtype: C{numpy.ndarray}
+    """
+    with open(filename, 'r') as f:
+        text = f.read()
+    lines = [line for line in text.splitlines() if line.strip()]
+    values = text.split()
+    if len(values) != 9 * len(lines):
+        # Lines with extra values: keep the first nine of each line.
+        values = [value for line in lines for value in line.split()[:9]]
+    return np.array(values, dtype=float).reshape(-1, 9)
+
+
+def read_stl(filename):
+    """\
+    Read a binary or ASCII STL file into a triangle array. Facet normals in the
+    file are ignored (normals follow the vertex order, as in L{Face.normal}).
+
+    @param filename: The path of the STL file.
+    @type filename: C{str}
+    @return: The M{M x 9} triangle array.
+    @rtype: C{numpy.ndarray}
+    """
+    with open(filename, 'rb') as f:
+        header = f.read(84)
+        if len(header) == 84:
+            count = struct.unpack('<I', header[80:84])[0]
+            if os.path.getsize(filename) == 84 + 50 * count:
+                facets = np.fromfile(f, dtype=STL_FACET, count=count)
+                return facets['vertices'].astype(float)
+        f.seek(0)
+        text = f.read().decode('ascii', 'replace')
+    vertices = re.findall(r'vertex\s+(\S+)\s+(\S+)\s+(\S+)', text, re.I)
+    return np.array(vertices, dtype=float).reshape(-1, 9)
+
+
+def read_obj(filename):
+    """\
+    Read the faces of a Wavefront OBJ file into a triangle array. Polygonal
+    faces are triangulated as fans about their first vertex.
+
+    @param filename: The path of the OBJ file.
+    @type filename: C{str}
+    @return: The M{M x 9} triangle array.
+    @rtype: C{numpy.ndarray}
+    """
+    vertices, indices = [], []
+    with open(filename, 'r') as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            elif fields[0] == 'v':
+                vertices.append(fields[1:4])
+            elif fields[0] == 'f':
+                # Relative (negative) indices count back from the last vertex
+                # defined before this face.
+                face = [int(v.split('/')[0]) for v in fields[1:]]
+                face = [v - 1 if v > 0 else len(vertices) + v for v in face]
+                for i in range(1, len(face) - 1):
+                    indices.append((face[0], face[i], face[i + 1]))
+    vertices = np.array(vertices, dtype=float).reshape(-1, 3)
+    indices = np.array(indices, dtype=int).reshape(-1, 3)
+    return vertices[indices].reshape(-1, 9)
+
+
+MESH_READERS = {'.raw': read_raw, '.stl': read_stl, '.obj': read_obj}
+
+
+def read_triangles(filename):
+    """\
+    Read a triangle mesh file (raw, STL, or OBJ, by extension) into a triangle
+    array.
+
+    @param filename: The path of the mesh file.
+    @type filename: C{str}
+    @return: The M{M x 9} triangle array.
+    @rtype: C{numpy.ndarray}
+    """
+    try:
+        reader = MESH_READERS[os.path.splitext(filename)[1].lower()]
+    except KeyError:
+        raise ValueError('unsupported mesh format: %s' % filename)
+    return reader(filename)
+
+
+def quaternion_matrices(quaternions):
+    """\
+    Rotation matrices of an array of unit quaternions (cf. L{Rotation}).
+
+    @param quaternions: The M{N x 4} array of quaternions (M{a, b, c, d}).
+    @type quaternions: C{numpy.ndarray}
+    @return: The M{N x 3 x 3} array of rotation matrices.
+    @rtype: C{numpy.ndarray}
+    """
+    a, b, c, d = quaternions.T
+    return np.array([[a * a + b * b - c * c - d * d, 2 * (b * c - a * d),
+                      2 * (b * d + a * c)],
+                     [2 * (b * c + a * d), a * a - b * b + c * c - d * d,
+                      2 * (c * d - a * b)],
+                     [2 * (b * d - a * c), 2 * (c * d + a * b),
+                      a * a - b * b - c * c + d * d]]).transpose(2, 0, 1)
+
+
+def planing_arrays(triangles):
+    """\
+    Planing rotations of an array of triangles, and the triangles mapped into
+    the x-y plane with the first vertex at the origin (cf.
+    L{Face.planing_pose}).
+
+    @param triangles: The M{M x 3 x 3} triangle array.
+    @type triangles: C{numpy.ndarray}
+    @return: The mask of non-degenerate triangles, the M{M x 4} array of
+        planing rotation quaternions, and the M{M x 3 x 3} planed triangle
+        array.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    v0 = triangles[:, 0, :]
+    normals = np.cross(triangles[:, 1, :] - v0,
+        triangles[:, 2, :] - triangles[:, 1, :])
+    magnitude = np.sqrt((normals ** 2).sum(axis=1))
+    valid = magnitude > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normals = (normals.T / magnitude).T
+        theta = np.arccos(np.clip(normals[:, 2], -1.0, 1.0))
+        axes = np.column_stack((normals[:, 1], -normals[:, 0],
+            np.zeros(len(normals))))
+        norm = np.sqrt((axes ** 2).sum(axis=1))
+        quaternions = np.column_stack((np.cos(theta / 2.0),
+            (axes.T / norm * np.sin(theta / 2.0)).T))
+        # Degenerate triangles have NaN angles and axes.
+        identity = ~valid | (norm == 0) | ((np.abs(theta) < 1e-4) \
+            & (np.abs(axes) < 1e-4).all(axis=1))
+    quaternions[identity] = (1.0, 0.0, 0.0, 0.0)
+    quaternions = (quaternions.T / np.sqrt((quaternions ** 2).sum(axis=1))).T
+    R = quaternion_matrices(quaternions)
+    planed = (R[:, np.newaxis, :, :] \
+        * (triangles - v0[:, np.newaxis, :])[:, :, np.newaxis, :]).sum(axis=3)
+    return valid, quaternions, planed
+
+
+def intersections(triangles, origins, ends, limit=False):
+    """\
+    Return the distances from the origins to the points of intersection of the
+    lines or line segments between the given points with each triangle (cf.
+    L{Triangle.intersection}).
+
+    @param triangles: The M{M x 3 x 3} triangle array.
+    @type triangles: C{numpy.ndarray}
+    @param origins: The M{N x 3} array of segment origins.
+    @type origins: C{numpy.ndarray}
+    @param ends: The M{N x 3} array of segment ends.
+    @type ends: C{numpy.ndarray}
+    @param limit: If true, limit intersection to the line segments.
+    @type limit: C{bool}
+    @return: The M{N x M} array of distances (NaN for no intersection).
+    @rtype: C{numpy.ndarray}
+    """
+    origins = np.asarray(origins, dtype=float).reshape(-1, 3)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 3)
+    length = np.sqrt(((ends - origins) ** 2).sum(axis=1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        direction = ((ends - origins).T / length).T[:, np.newaxis, :]
+        v0 = triangles[np.newaxis, :, 0, :]
+        e0 = triangles[np.newaxis, :, 1, :] - v0
+        e2 = triangles[np.newaxis, :, 2, :] - v0
+        P = np.cross(direction, e2)
+        det = (e0 * P).sum(axis=2)
+        inv_det = 1.0 / det
+        T = origins[:, np.newaxis, :] - v0
+        u = (T * P).sum(axis=2) * inv_det
+        Q = np.cross(T, e0)
+        v = (direction * Q).sum(axis=2) * inv_det
+        t = (Q * e2).sum(axis=2) * inv_det
+        hit = (np.abs(det) >= 1e-4) & (u >= 0) & (u <= 1.0) & (v >= 0) \
+            & (u + v <= 1.0)
+        if limit:
+            hit &= (t >= 1e-4) & (t <= length[:, np.newaxis] - 1e-4)
+    return np.where(hit, t, np.nan)
+
+
+def occluded(triangles, origin, points, chunk=2 ** 18):
+    """\
+    Return whether the line segments from an origin to each of the points are
+    occluded by any of the triangles (cf. L{Model.occluded}).
+
+    @param triangles: The M{M x 3 x 3} triangle array.
+    @type triangles: C{numpy.ndarray}
+    @param origin: The origin of the segments.
+    @type origin: L{Point}
+    @param points: The M{N x 3} array of points.
+    @type points: C{numpy.ndarray}
+    @param chunk: The maximum number of segment-triangle pairs tested at once.
+    @type chunk: C{int}
+    @return: The occlusion mask.
+    @rtype: C{numpy.ndarray} of C{bool}
+    """
+    result = np.zeros(len(points), dtype=bool)
+    if not len(triangles):
+        return result
+    origin = np.array(tuple(origin), dtype=float)
+    step = max(1, chunk // len(triangles))
+    for i in range(0, len(points), step):
+        result[i:i + step] = ~np.isnan(intersections(triangles, origin,
+            points[i:i + step], True)).all(axis=1)
+    return result
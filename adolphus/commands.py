@@ -9,9 +9,18 @@ following:
   - C{pickle} - pickled Python object generated with C{pickle.dumps()}
   - C{csv} - comma-delimited values terminated with hash (C{#}) character
   - C{text} - human-readable text format (can include newlines)
+  - C{binary} - packed array (see L{pack_array}), only for commands decorated
+    with C{@binary}
 
 Commands may raise any type of exception, but these will be re-raised as
 L{CommandError} so that they may be appropriately handled by the interface.
+Commands which only affect the displays are additionally decorated with
+C{@needs_display}, and fail in a headless experiment. Commands which neither
+change the experiment nor update any of its caches are additionally decorated
+with C{@readonly}, and may be executed concurrently by the command server (see
+L{adolphus.server}). Commands additionally decorated with C{@payload} take a
+fourth positional argument, the binary payload of the request (an empty string
+if there is none).
 
 Custom commands may be added simply by importing the C{@command} decorator from
 this module and wrapping an appropriately-formed base function.
@@ -28,34 +37,103 @@ except ImportError:
     import pickle
 
 import yaml
+import struct
+import numpy as np
 
 from .robot import Robot
 from .solid import Solid
 from .laser import RangeModel
 from .tensor import TensorModel
-from .yamlparser import YAMLParser
+from .yamlparser import load_experiment
 from .geometry import Angle, Point, DirectionalPoint, Quaternion, Rotation, Pose
+from .arrays import points_array
+from .jobs import Job, JobPart
 
 
 commands = {}
 
+# Header of a packed array: magic, version, rows, columns.
+ARRAY_HEADER = struct.Struct('<4sIII')
+ARRAY_MAGIC = b'ADAR'
+
 class CommandError(Exception):
     "Command failed (usually non-fatal)."
     pass
 
 def command(f):
-    def wrapped(ex, args, response='pickle'):
-        assert response in ['pickle', 'csv', 'text']
+    takes_payload = getattr(f, 'payload', False)
+    def wrapped(ex, args, response='pickle', data=''):
+        assert response in ['pickle', 'csv', 'text', 'binary']
+        if response == 'binary' and not getattr(f, 'binary', False):
+            raise CommandError('command cannot return binary response')
         try:
+            if takes_payload:
+                return f(ex, args, response, data)
             return f(ex, args, response)
         except CommandError as e:
             raise e
         except Exception, e:
             raise CommandError('%s: %s' % (type(e).__name__, e))
     wrapped.__doc__ = f.__doc__
+    wrapped.readonly = getattr(f, 'readonly', False)
     commands[f.__name__] = wrapped
     return wrapped
 
+def readonly(f):
+    f.readonly = True
+    return f
+
+def payload(f):
+    f.payload = True
+    return f
+
+def binary(f):
+    f.binary = True
+    return f
+
+def pack_array(array):
+    """\
+    Pack a 2D array for a binary response: a 16-byte header (the magic string
+    C{ADAR}, then the format version, number of rows, and number of columns as
+    little-endian 32-bit unsigned integers) followed by the values as
+    little-endian doubles in row-major order. A client can read the values
+    without copying using C{numpy.frombuffer(data, '<f8', offset=16)}.
+
+    @param array: The array (a 1D array is packed as a single column).
+    @type array: C{numpy.ndarray}
+    @return: The packed array.
+    @rtype: C{str}
+    """
+    array = np.asarray(array, dtype='<f8')
+    if array.ndim == 1:
+        array = array.reshape(-1, 1)
+    return ARRAY_HEADER.pack(ARRAY_MAGIC, 1, array.shape[0], array.shape[1]) \
+        + np.ascontiguousarray(array).tobytes()
+
+def unpack_array(data):
+    """\
+    Unpack a packed array (see L{pack_array}) without copying.
+
+    @param data: The packed array.
+    @type data: C{str}
+    @return: The (read-only) array.
+    @rtype: C{numpy.ndarray}
+    """
+    magic, version, rows, columns = ARRAY_HEADER.unpack_from(data)
+    if magic != ARRAY_MAGIC or version != 1:
+        raise ValueError('not a packed array')
+    return np.frombuffer(data, dtype='<f8', count=rows * columns,
+        offset=ARRAY_HEADER.size).reshape(rows, columns)
+
+def needs_display(f):
+    def wrapped(ex, args, response):
+        if ex.headless:
+            raise CommandError('command requires a display')
+        return f(ex, args, response)
+    wrapped.__doc__ = f.__doc__
+    wrapped.__name__ = f.__name__
+    return wrapped
+
 
 @command
 def alias(ex, args, response):
@@ -65,10 +143,10 @@ def alias(ex, args, response):
 
     usage: %s alias command [argument]*
     """
-    def wrapped(wex, wargs, response):
-        assert response in ['pickle', 'csv', 'text']
+    def wrapped(wex, wargs, response, data=''):
+        assert response in ['pickle', 'csv', 'text', 'binary']
         try:
-            return globals()[args[1]](wex, args[2:] + wargs, response)
+            return globals()[args[1]](wex, args[2:] + wargs, response, data)
         except CommandError as e:
             raise e
         except Exception, e:
@@ -84,17 +162,19 @@ def loadmodel(ex, args, response):
     usage: %s filename
     """
     clear(ex, [])
-    modify(ex, [])
-    cameraview(ex, [])
-    cameranames(ex, [])
-    hidetasks(ex, [])
-    for sceneobject in ex.model:
-        ex.model[sceneobject].visible = False
-        for triangle in ex.model[sceneobject].triangles:
-            triangle.visible = False
-    ex.model, ex.tasks = YAMLParser(args[0]).experiment
-    ex.model.visualize()
-    ex.display.select()
+    if not ex.headless:
+        modify(ex, [])
+        cameraview(ex, [])
+        cameranames(ex, [])
+        hidetasks(ex, [])
+        for sceneobject in ex.model:
+            ex.model[sceneobject].visible = False
+            for triangle in ex.model[sceneobject].triangles:
+                triangle.visible = False
+    ex.model, ex.tasks = load_experiment(args[0])
+    if not ex.headless:
+        ex.model.visualize()
+        ex.display.select()
 
 @command
 def loadconfig(ex, args, response):
@@ -136,7 +216,8 @@ def exit(ex, args, response):
     """
     for display in ex.altdisplays:
         display.visible = False
-    ex.display.visible = False
+    if ex.display:
+        ex.display.visible = False
     ex.exit = True
 
 @command
@@ -148,6 +229,7 @@ def clear(ex, args, response):
         del ex.coverage[key]
 
 @command
+@needs_display
 def axes(ex, args, response):
     """\
     Toggle display of 3D axes.
@@ -155,6 +237,7 @@ def axes(ex, args, response):
     ex.axes.visible = not ex.axes.visible
 
 @command
+@needs_display
 def centerdot(ex, args, response):
     """\
     Toggle display of a center indicator dot.
@@ -162,6 +245,7 @@ def centerdot(ex, args, response):
     ex.centerdot.visible = not ex.centerdot.visible
 
 @command
+@needs_display
 def setcenter(ex, args, response):
     """\
     Set the position of the display center.
@@ -175,6 +259,7 @@ def setcenter(ex, args, response):
     ex.centerdot.pos = pos
 
 @command
+@needs_display
 def shiftcenter(ex, args, response):
     """\
     Shift the display center from its current position by the amount specified.
@@ -190,6 +275,8 @@ def shiftcenter(ex, args, response):
     ex.centerdot.pos = tuple(pos)
 
 @command
+@readonly
+@needs_display
 def getcenter(ex, args, response):
     """\
     Get the position of the display center.
@@ -204,6 +291,7 @@ def getcenter(ex, args, response):
         return '(%s, %s, %s)' % tuple(ex.centerdot.pos)
 
 @command
+@needs_display
 def triangles(ex, args, response):
     """\
     Toggle display of occluding triangles.
@@ -219,6 +307,7 @@ def cameranames(ex, args, response):
     ex.camera_names()
 
 @command
+@needs_display
 def guide(ex, args, response):
     """\
     Toggle display of guide (camera frustum, laser triangle) for the specified
@@ -229,6 +318,7 @@ def guide(ex, args, response):
     ex.guide(args[0], task=(args[1] if len(args) > 1 else None))
 
 @command
+@readonly
 def activeguides(ex, args, response):
     if response == 'pickle':
         return pickle.dumps(ex.guides.keys())
@@ -238,6 +328,7 @@ def activeguides(ex, args, response):
         return ' '.join(ex.guides.keys())
 
 @command
+@needs_display
 def cameraview(ex, args, response):
     """\
     Switch to camera view for the specified camera.
@@ -314,6 +405,7 @@ def format_pose_text(pose, rformat):
         raise CommandError('invalid rotation format')
 
 @command
+@readonly
 def getpose(ex, args, response):
     """\
     Return the (absolute) pose of an object. If using CSV or text response,
@@ -333,6 +425,7 @@ def getpose(ex, args, response):
         return format_pose_text(pose, rformat)
 
 @command
+@readonly
 def getrelativepose(ex, args, response):
     """\
     Return the relative pose of an object or task.
@@ -382,7 +475,7 @@ def setpose(ex, args, response):
     pose = parse_pose(args[1:])
     obj.absolute_pose = pose
     obj.update_visualization()
-    if ex.modifier.parent == obj:
+    if ex.modifier and ex.modifier.parent == obj:
         ex.modifier.pos = tuple(obj.pose.T)
 
 @command
@@ -396,10 +489,11 @@ def setrelativepose(ex, args, response):
     pose = parse_pose(args[1:])
     obj.relative_pose = pose
     obj.update_visualization()
-    if ex.modifier.parent == obj:
+    if ex.modifier and ex.modifier.parent == obj:
         ex.modifier.pos = tuple(obj.pose.T)
 
 @command
+@needs_display
 def modify(ex, args, response):
     """\
     Enable interactive pose modification for the specified object, or disable
@@ -433,6 +527,7 @@ def setparam(ex, args, response):
         obj.setparam(args[1], [float(a) for a in args[2:]])
 
 @command
+@readonly
 def getparams(ex, args, response):
     """\
     Get the parameters of an object.
@@ -464,6 +559,7 @@ def setactive(ex, args, response):
             setactive(ex, [camera])
 
 @command
+@readonly
 def getactive(ex, args, response):
     """\
     Get the active state of the specified camera.
@@ -490,6 +586,7 @@ def setactivelaser(ex, args, response):
         raise CommandError('not a range coverage model')
 
 @command
+@readonly
 def getactivelaser(ex, args, response):
     """\
     Get the active laser.
@@ -518,6 +615,7 @@ def setposition(ex, args, response):
     ex.model[args[0]].update_visualization()
 
 @command
+@readonly
 def getposition(ex, args, response):
     """\
     Get the position of the specified robot.
@@ -533,6 +631,7 @@ def getposition(ex, args, response):
         return str(ex.model[args[0]].config)
 
 @command
+@readonly
 def getjoints(ex, args, response):
     """\
     Get the joint information dict (names, types, limits, home positions) from
@@ -569,6 +668,88 @@ def strength(ex, args, response):
         return '%f' % strength
 
 @command
+@payload
+@binary
+def strengthbatch(ex, args, response, data):
+    """\
+    Return the coverage strength of an array of points with respect to the
+    task parameters of the specified task. The points are given in the binary
+    payload as little-endian double precision values, with 3 (x, y, z) or 5
+    (x, y, z, rho, eta) columns per point.
+
+    usage: %s task [columns]
+    """
+    task = ex.tasks[args[0]]
+    columns = int(args[1]) if len(args) > 1 else 3
+    if not columns in (3, 5):
+        raise CommandError('invalid number of columns')
+    if not data or len(data) % (8 * columns):
+        raise CommandError('invalid point data')
+    points = np.frombuffer(data, dtype='<f8').reshape(-1, columns)
+    strengths = ex.model.strength_array(points, task.params)
+    if response == 'pickle':
+        return pickle.dumps(strengths)
+    elif response == 'csv':
+        return ','.join(['%f' % s for s in strengths]) + '#'
+    elif response == 'text':
+        return '\n'.join(['%f' % s for s in strengths])
+    elif response == 'binary':
+        return pack_array(strengths)
+
+@command
+def batch(ex, args, response):
+    """\
+    Execute a list of commands, separated by semicolons, and return all of
+    their results. A command which fails does not stop the batch; its result
+    is the error (a L{CommandError} for a pickle response).
+
+    usage: %s command [; command]*
+    """
+    results = []
+    for cmd in ' '.join(args).split(';'):
+        if not cmd.strip():
+            continue
+        try:
+            results.append(ex.execute(cmd, response=response))
+        except CommandError as e:
+            results.append(e)
+    if response == 'pickle':
+        return pickle.dumps([r if isinstance(r, CommandError) else \
+            (pickle.loads(r) if r else None) for r in results])
+    elif response == 'csv':
+        return ''.join([('%s#' % r) if isinstance(r, CommandError) else \
+            (r or '#') for r in results])
+    elif response == 'text':
+        return '\n'.join([str(r) if isinstance(r, CommandError) else \
+            (r or '') for r in results])
+
+@command
+@binary
+def pointcoverage(ex, args, response):
+    """\
+    Return the coverage strength of each point of the specified task, as an
+    array with one row per point: the point coordinates (x, y, z, and, for
+    directional tasks, rho and eta) followed by the coverage strength.
+
+    usage: %s task
+    """
+    task = ex.tasks[args[0]]
+    points = points_array(list(task.mapped.keys()))
+    result = np.column_stack((points,
+        ex.model.strength_array(points, task.params)))
+    if response == 'pickle':
+        return pickle.dumps(result)
+    elif response == 'csv':
+        return ''.join([','.join(['%f' % v for v in row]) + '#' \
+            for row in result])
+    elif response == 'text':
+        return '\n'.join([' '.join(['%.4f' % v for v in row]) \
+            for row in result])
+    elif response == 'binary':
+        return pack_array(result)
+
+@command
+@readonly
 def tasks(ex, args, response):
     if response == 'pickle':
         return pickle.dumps(ex.tasks.keys())
@@ -578,6 +759,7 @@ def tasks(ex, args, response):
         return '\n'.join(ex.tasks.keys())
 
 @command
+@needs_display
 def showtask(ex, args, response):
     """\
     Show the points of the specified task.
@@ -600,6 +782,7 @@ def hidetasks(ex, args, response):
             pass
 
 @command
+@needs_display
 def showtensors(ex, args, response):
     """\
     Toggle the visualization of the triangle tensors in the model.
@@ -627,13 +810,15 @@ def coverage(ex, args, response):
     if type(ex.model) == TensorModel:
         return tensorcoverage(ex, args, response)
     try:
-        ex.display.userspin = False
+        if ex.display:
+            ex.display.userspin = False
         performance = {}
         if not args:
             args = ex.tasks.keys()
         for arg in args:
             ex.coverage[arg] = ex.model.coverage(ex.tasks[arg])
-            ex.coverage[arg].visualize()
+            if not ex.headless:
+                ex.coverage[arg].visualize()
             performance[arg] = ex.model.performance(ex.tasks[arg],
                 coverage=ex.coverage[arg])
         if response == 'pickle':
@@ -645,7 +830,8 @@ def coverage(ex, args, response):
             return ('\n'.join(['%s: %.4f' % (key, performance[key])
                     for key in performance]))
     finally:
-        ex.display.userspin = True
+        if ex.display:
+            ex.display.userspin = True
 
 @command
 def tensorcoverage(ex, args, response):
@@ -656,7 +842,8 @@ def tensorcoverage(ex, args, response):
     """
     clear(ex, [])
     try:
-        ex.display.userspin = False
+        if ex.display:
+            ex.display.userspin = False
         performance = {}
         if not args:
             args = []
@@ -665,7 +852,8 @@ def tensorcoverage(ex, args, response):
                     args.append(item)
         for arg in args:
             ex.coverage[arg] = ex.model.coverage(ex.model[arg])
-            ex.coverage[arg].visualize()
+            if not ex.headless:
+                ex.coverage[arg].visualize()
             performance[arg] = ex.model.performance(ex.model[arg], \
                 coverage=ex.coverage[arg])
         if response == 'pickle':
@@ -677,26 +865,41 @@ def tensorcoverage(ex, args, response):
             return ('\n'.join(['%s: %.4f' % (key, performance[key])
                     for key in performance]))
     finally:
-        ex.display.userspin = True
+        if ex.display:
+            ex.display.userspin = True
+
+def _linear_target_transport(ex, args):
+    """\
+    Build a linear target transport from the optional transport axis and
+    encoder resolution arguments of the L{rangecoveragelt} command.
+    """
+    taxis, resolution = None, None
+    if len(args) >= 3:
+        taxis = Point(*[float(t) for t in args[:3]])
+        args = args[3:]
+    if args:
+        resolution = float(args[0])
+    return RangeModel.LinearTargetTransport(ex.model, taxis=taxis,
+        resolution=resolution)
 
 @command
 def rangecoveragelt(ex, args, response):
     """\
-    TODO
+    Return the range coverage performance for the specified task, transporting
+    its mount linearly through the laser plane along the specified axis (by
+    default, the laser plane normal) in steps of the specified encoder
+    resolution (by default, one stop per distinct crossing offset).
 
-    usage: %s task [tx ty tz]
+    usage: %s task [tx ty tz] [resolution]
     """
     clear(ex, [])
     try:
-        ex.display.userspin = False
-        try:
-            taxis = Point(*[float(t) for t in args[1:4]])
-        except (TypeError, IndexError):
-            taxis = None
-        transport = RangeModel.LinearTargetTransport(ex.model)
+        if ex.display:
+            ex.display.userspin = False
         ex.coverage['range'] = ex.model.range_coverage(ex.tasks[args[0]],
-                               transport, taxis=taxis)
-        ex.coverage['range'].visualize()
+                               _linear_target_transport(ex, args[1:]))
+        if not ex.headless:
+            ex.coverage['range'].visualize()
         performance = ex.model.performance(ex.tasks[args[0]],
             coverage=ex.coverage['range'])
         if response == 'pickle':
@@ -706,9 +909,122 @@ def rangecoveragelt(ex, args, response):
         elif response == 'text':
             return 'range: %.4f' % performance
     finally:
-        ex.display.userspin = True
+        if ex.display:
+            ex.display.userspin = True
+
+def _coverage_parts(ex, args):
+    """\
+    Build the job parts for the L{coverage} command.
+    """
+    if type(ex.model) == TensorModel:
+        return _tensorcoverage_parts(ex, args)
+    return [JobPart(arg, len(ex.tasks[arg].mapped),
+        ex.model.coverage_stream(ex.tasks[arg]),
+        ex.tasks[arg].mapped.__getitem__) for arg in args or ex.tasks.keys()]
+
+def _tensorcoverage_parts(ex, args):
+    """\
+    Build the job parts for the L{tensorcoverage} command.
+    """
+    if not args:
+        args = [item for item in ex.model.keys()
+                if type(ex.model[item]) == Solid]
+    return [JobPart(arg, len(ex.model[arg].face_array()),
+        ex.model.coverage_stream(ex.model[arg])) for arg in args]
+
+def _rangecoveragelt_parts(ex, args):
+    """\
+    Build the job parts for the L{rangecoveragelt} command.
+    """
+    task = ex.tasks[args[0]]
+    return [JobPart('range', len(task.mapped),
+        ex.model.range_coverage_stream(task,
+            _linear_target_transport(ex, args[1:])),
+        task.mapped.__getitem__)]
+
+JOB_PARTS = {'coverage': _coverage_parts,
+             'tensorcoverage': _tensorcoverage_parts,
+             'rangecoveragelt': _rangecoveragelt_parts}
+
+@command
+def job(ex, args, response):
+    """\
+    Start a coverage command (coverage, tensorcoverage, or rangecoveragelt) as
+    a background job and return its ID. The coverage of each task is stored
+    as it completes, and visualized by the display loop; use jobstatus to
+    follow its progress.
+
+    usage: %s command [argument]*
+    """
+    if not args or args[0] not in JOB_PARTS:
+        raise CommandError('command cannot be run as a job')
+    parts = JOB_PARTS[args[0]](ex, args[1:])
+    clear(ex, [])
+    def finish(part):
+        ex.coverage[part.name] = part.coverage
+        if not ex.headless:
+            ex.visualizations.append(part.coverage.visualize)
+    j = Job(ex.lock, ' '.join(args), parts, finish=finish)
+    ex.jobs[j.id] = j
+    j.start()
+    if response == 'pickle':
+        return pickle.dumps(j.id)
+    elif response == 'csv':
+        return '%d#' % j.id
+    elif response == 'text':
+        return 'job %d' % j.id
+
+@command
+@readonly
+def jobstatus(ex, args, response):
+    """\
+    Return the status of a background job (or of all jobs): its state (running,
+    done, cancelled, or failed), the number of points done and in total, the
+    elapsed time, the rate in points per second, and the performance of each
+    task (partial until the job is done).
+
+    usage: %s [id]
+    """
+    if args:
+        try:
+            status = [ex.jobs[int(args[0])].status()]
+        except (ValueError, KeyError):
+            raise CommandError('invalid job ID')
+    else:
+        status = [ex.jobs[j].status() for j in sorted(ex.jobs.keys())]
+    if response == 'pickle':
+        return pickle.dumps(status[0] if args else status)
+    elif response == 'csv':
+        return ','.join(['%d:%s:%d:%d:%f:%f' % (s['id'], s['state'],
+            s['done'], s['total'], s['elapsed'], s['rate'])
+            for s in status]) + '#'
+    elif response == 'text':
+        lines = []
+        for s in status:
+            lines.append('%d: %s [%s] %d/%d points, %.1f s, %.1f points/s'
+                % (s['id'], s['command'], s['state'], s['done'], s['total'],
+                s['elapsed'], s['rate']))
+            for key in s['performance']:
+                lines.append('  %s: %.4f' % (key, s['performance'][key]))
+            if s['error']:
+                lines.append('  %s' % s['error'])
+        return '\n'.join(lines)
+
+@command
+@readonly
+def jobcancel(ex, args, response):
+    """\
+    Cancel a background job.
+
+    usage: %s id
+    """
+    try:
+        ex.jobs[int(args[0])].cancel()
+    except (IndexError, ValueError, KeyError):
+        raise CommandError('invalid job ID')
 
 @command
+@readonly
 def objecthierarchy(ex, args, response):
     """\
     Return a scene object hierarchy in the form C{{'object': (parent, type)}}.
@@ -743,6 +1059,7 @@ def select(ex, args, response):
         ex.select(ex.model[args[0]])
 
 @command
+@readonly
 def help(ex, args, response):
     """\
     Print the documentation for a command.
@@ -11,8 +11,10 @@ classes.
 
 from copy import deepcopy
 from numbers import Number
+from multiprocessing import Pool
 from itertools import combinations
 from math import pi, sin, cos, tan, atan, atan2
+import numpy as np
 
 HYPERGRAPH_ENABLED = True
 try:
@@ -22,7 +24,110 @@ except ImportError:
 
 from .posable import Posable, SceneObject
 from .visualization import Visualizable, VISUAL_SETTINGS
-from .geometry import Angle, Point, Pose, triangle_frustum_intersection, avg_points
+from .geometry import Angle, Point, Pose, Rotation, \
+    triangle_frustum_intersection, avg_points
+from .arrays import points_array, array_points, split_points, transform, \
+    occluded
+
+
+def limit(x, bounds):
+    """\
+    Evaluate a coverage component limit over an array of values. The bounds
+    are a triple C{(lo, hi, ramps)}: values outside the open interval
+    M{(lo, hi)} are zero, and otherwise the component is the minimum of the
+    linear falloffs M{(x - a) / (i - a)} from acceptable value M{a} to ideal
+    value M{i} for each C{(a, i)} in C{ramps}, clipped to M{[0, 1]}.
+
+    @param x: The values.
+    @type x: C{numpy.ndarray}
+    @param bounds: The component bounds.
+    @type bounds: C{tuple}
+    @return: The component values in M{[0, 1]}.
+    @rtype: C{numpy.ndarray}
+    """
+    lo, hi, ramps = bounds
+    value = np.ones(x.shape)
+    for a, i in ramps:
+        value = np.minimum(value, (x - a) / (i - a))
+    return np.clip(value, 0.0, 1.0) * ((x > lo) & (x < hi))
+
+
+def ramp_bounds(acceptable, ideal):
+    """\
+    Return the bounds (see L{limit}) for a pair of threshold values, as used by
+    the resolution, focus, and view angle components. Infinite acceptable
+    values impose no limit.
+
+    @param acceptable: Acceptable thresholds (near/lower, far/upper).
+    @type acceptable: C{tuple} of C{float}
+    @param ideal: Ideal thresholds (near/lower, far/upper).
+    @type ideal: C{tuple} of C{float}
+    @return: The component bounds.
+    @rtype: C{tuple}
+    """
+    lo, hi, ramps = -float('inf'), float('inf'), []
+    if acceptable[0] == ideal[0]:
+        lo = acceptable[0]
+    elif abs(acceptable[0]) != float('inf'):
+        ramps.append((acceptable[0], ideal[0]))
+    if acceptable[1] == ideal[1]:
+        hi = acceptable[1]
+    elif abs(acceptable[1]) != float('inf'):
+        ramps.append((acceptable[1], ideal[1]))
+    return lo, hi, ramps
+
+
+_trajectory_context = None
+
+
+def _trajectory_init(context):
+    """\
+    Initialize a trajectory coverage worker process (see
+    L{Model.trajectory_coverage}).
+
+    @param context: The trajectory context.
+    @type context: C{dict}
+    """
+    global _trajectory_context
+    _trajectory_context = context
+
+
+def _trajectory_strengths(waypoints, context=None):
+    """\
+    Compute the coverage strength of the task points at a set of waypoints of
+    a trajectory (see L{Model.trajectory_coverage}).
+
+    @param waypoints: The waypoint indices.
+    @type waypoints: C{list} of C{int}
+    @param context: The trajectory context (defaults to that of the worker).
+    @type context: C{dict}
+    @return: The coverage strength of each point at each waypoint.
+    @rtype: C{numpy.ndarray}
+    """
+    context = context or _trajectory_context
+    points = context['points']
+    positions = split_points(points)[0]
+    result = np.zeros((len(waypoints), len(points)))
+    for row, k in enumerate(waypoints):
+        triangles = np.concatenate([context['static']] + [np.dot(local,
+            R[k].T) + T[k] for local, R, T in context['moving']])
+        strengths = {}
+        for key, camera in context['cameras'].items():
+            try:
+                R, T = context['poses'][key]
+                pose = Pose(Point(*T[k]),
+                    Rotation.from_rotation_matrix(R[k].tolist()))
+            except KeyError:
+                pose = camera.pose
+            strength = camera.strength_array(points, context['params'], pose)
+            indices = np.flatnonzero(strength)
+            strength[indices[occluded(triangles, pose.T,
+                positions[indices])]] = 0.0
+            strengths[key] = strength
+        for view in context['views']:
+            result[row] = np.maximum(result[row],
+                np.min([strengths[camera] for camera in view], axis=0))
+    return result
 
 
 class PointCache(dict):
@@ -154,16 +259,6 @@ class Task(Posable):
             self.setparam(param, params[param])
         self._original = original
 
-    def _pose_changed_hook(self):
-        """\
-        Hook called on pose change.
-        """
-        try:
-            del self._mapped
-        except AttributeError:
-            pass
-        super(Task, self)._pose_changed_hook()
-
     @property
     def original(self):
         """\
@@ -176,13 +271,13 @@ class Task(Posable):
         """\
         Actual (mapped) task model points.
         """
-        try:
-            return self._mapped
-        except AttributeError:
+        generation = self.generation()
+        if getattr(self, '_mapped_generation', None) != generation:
             self._mapped = PointCache()
             for point in self.original:
                 self._mapped[self.pose.map(point)] = self.original[point]
-            return self._mapped
+            self._mapped_generation = generation
+        return self._mapped
 
     @property
     def params(self):
@@ -272,6 +367,10 @@ class Camera(SceneObject):
     """
     param_keys = ['A', 'dim', 'f', 'o', 's', 'zS']
 
+    # task parameters on which the precomputed coverage thresholds depend
+    threshold_params = ['boundary_padding', 'res_max', 'res_min', 'blur_max',
+                        'angle_max']
+
     def __init__(self, name, params, pose=Pose(), mount_pose=Pose(), mount=None,
                  primitives=list(), triangles=list()):
         """\
@@ -340,6 +439,7 @@ class Camera(SceneObject):
             value = [value, value]
         self._params[param] = value
         # Clear cached values if they depend on the parameter.
+        self._thresholds = {}
         if param in ['f', 's', 'o', 'dim']:
             try:
                 del self._fov
@@ -537,6 +637,166 @@ class Camera(SceneObject):
             ai = cos(tp['angle_max'][0])
             return min(max((sigma - aa) / (ai - aa), 0.0), 1.0)
 
+    def thresholds(self, task_params):
+        """\
+        Pre-computed coverage component thresholds for the given task
+        parameters, shared by the batch coverage components. These are cached
+        per distinct set of task parameter values.
+
+        @param task_params: Task parameters.
+        @type task_params: C{dict}
+        @return: The thresholds.
+        @rtype: C{dict}
+        """
+        key = tuple([tuple(task_params[param]) \
+            if hasattr(task_params[param], '__iter__') \
+            else task_params[param] for param in self.threshold_params])
+        try:
+            return self._thresholds[key]
+        except AttributeError:
+            self._thresholds = {}
+        except KeyError:
+            pass
+        self._thresholds[key] = self._compute_thresholds(task_params)
+        return self._thresholds[key]
+
+    def _compute_thresholds(self, tp):
+        """\
+        Compute the coverage component thresholds for the given task
+        parameters.
+
+        @param tp: Task parameters.
+        @type tp: C{dict}
+        @return: The thresholds.
+        @rtype: C{dict}
+        """
+        th = {}
+        if tp['boundary_padding']:
+            th['gh'] = tp['boundary_padding'] / \
+                float(self._params['dim'][0]) * self.fov['tah']
+            th['gv'] = tp['boundary_padding'] / \
+                float(self._params['dim'][1]) * self.fov['tav']
+        else:
+            th['gh'] = th['gv'] = None
+        th['cr'] = ramp_bounds((self.zres(tp['res_max'][1]),
+            self.zres(tp['res_min'][1])), (self.zres(tp['res_max'][0]),
+            self.zres(tp['res_min'][0])))
+        zn, zf = self.zc(tp['blur_max'][1] * min(self._params['s']))
+        zl, zr = self.zc(tp['blur_max'][0] * min(self._params['s']))
+        th['cf'] = ramp_bounds((zn, zf), (zl, zr))
+        th['cd'] = ramp_bounds((cos(tp['angle_max'][1]), float('inf')),
+            (cos(tp['angle_max'][0]), float('inf')))
+        return th
+
+    def cv_array(self, p, tp):
+        """\
+        Visibility component of the coverage function over an array of points.
+
+        @param p: The M{N x 3} array of points (in camera coordinates).
+        @type p: C{numpy.ndarray}
+        @param tp: Task parameters.
+        @type tp: C{dict}
+        @return: The visibility coverage component values in M{[0, 1]}.
+        @rtype: C{numpy.ndarray}
+        """
+        th = self.thresholds(tp)
+        front = p[:, 2] > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xz = p[:, 0] / p[:, 2]
+            yz = p[:, 1] / p[:, 2]
+        if th['gh'] is None:
+            return (front & (xz > self.fov['tahl']) & (xz < self.fov['tahr']) \
+                & (yz > self.fov['tavt']) & (yz < self.fov['tavb'])) * 1.0
+        ch = np.clip(np.minimum(xz - self.fov['tahl'],
+            self.fov['tahr'] - xz) / th['gh'], 0.0, 1.0)
+        cv = np.clip(np.minimum(yz - self.fov['tavt'],
+            self.fov['tavb'] - yz) / th['gv'], 0.0, 1.0)
+        return np.where(front, np.minimum(ch, cv), 0.0)
+
+    def cr_array(self, p, tp):
+        """\
+        Resolution component of the coverage function over an array of points.
+
+        @param p: The M{N x 3} array of points (in camera coordinates).
+        @type p: C{numpy.ndarray}
+        @param tp: Task parameters.
+        @type tp: C{dict}
+        @return: The resolution coverage component values in M{[0, 1]}.
+        @rtype: C{numpy.ndarray}
+        """
+        return limit(p[:, 2], self.thresholds(tp)['cr'])
+
+    def cf_array(self, p, tp):
+        """\
+        Focus component of the coverage function over an array of points.
+
+        @param p: The M{N x 3} array of points (in camera coordinates).
+        @type p: C{numpy.ndarray}
+        @param tp: Task parameters.
+        @type tp: C{dict}
+        @return: The focus coverage component values in M{[0, 1]}.
+        @rtype: C{numpy.ndarray}
+        """
+        return limit(p[:, 2], self.thresholds(tp)['cf'])
+
+    def cd_array(self, p, d, tp):
+        """\
+        View angle component of the coverage function over an array of points.
+        Points at the origin and non-directional points (C{d} is C{None} or
+        the row is NaN) have full coverage.
+
+        @param p: The M{N x 3} array of points (in camera coordinates).
+        @type p: C{numpy.ndarray}
+        @param d: The M{N x 3} array of unit directions (in camera coordinates).
+        @type d: C{numpy.ndarray}
+        @param tp: Task parameters.
+        @type tp: C{dict}
+        @return: The view angle coverage component values in M{[0, 1]}.
+        @rtype: C{numpy.ndarray}
+        """
+        if d is None:
+            return np.ones(len(p))
+        norm = np.sqrt((p ** 2).sum(axis=1))
+        valid = (norm > 0) & ~np.isnan(d[:, 0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigma = -(p * d).sum(axis=1) / norm
+        return np.where(valid, limit(np.where(valid, sigma, 0.0),
+            self.thresholds(tp)['cd']), 1.0)
+
+    def camera_points(self, points, pose=None):
+        """\
+        Map a point array to camera coordinates.
+
+        @param points: The point array (see L{adolphus.arrays}).
+        @type points: C{numpy.ndarray}
+        @param pose: The pose of the camera (defaults to its current pose).
+        @type pose: L{Pose}
+        @return: Positions and unit directions in camera coordinates.
+        @rtype: C{tuple} of C{numpy.ndarray}
+        """
+        p, d = split_points(points)
+        return transform((pose or self.pose).inverse(), p, d)
+
+    def strength_array(self, points, task_params, pose=None):
+        """\
+        Return the coverage strength for an array of (directional) points.
+        This is the batch equivalent of L{strength}, and likewise does not
+        account for occlusion.
+
+        @param points: The point array (see L{adolphus.arrays}).
+        @type points: C{numpy.ndarray}
+        @param task_params: Task parameters.
+        @type task_params: C{dict}
+        @param pose: The pose of the camera (defaults to its current pose).
+        @type pose: L{Pose}
+        @return: The coverage strength of each point.
+        @rtype: C{numpy.ndarray}
+        """
+        cp, cd = self.camera_points(points, pose)
+        return self.cv_array(cp, task_params) * self.cr_array(cp, task_params) \
+             * self.cf_array(cp, task_params) \
+             * self.cd_array(cp, cd, task_params)
+
     def occluded_by(self, triangle, task_params):
         """\
         Return whether this camera's field of view is occluded (in part) by the
@@ -656,6 +916,31 @@ class Camera(SceneObject):
         return Pose(Point(x,y,z), pose.R)
 
 
+class ModelBatch(object):
+    """\
+    Context manager for a batch of changes to a L{Model} (see L{Model.batch}).
+    Batches may be nested.
+    """
+    def __init__(self, model):
+        """\
+        Constructor.
+
+        @param model: The model.
+        @type model: L{Model}
+        """
+        self.model = model
+
+    def __enter__(self):
+        self.model._batch_depth += 1
+        return self.model
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        model = self.model
+        model._batch_depth -= 1
+        if not model._batch_depth:
+            model._flush_dirty()
+
+
 class Model(dict):
     """\
     Multi-camera I{k}-ocular coverage strength model.
@@ -677,8 +962,11 @@ class Model(dict):
         self.cameras = set()
         self._occlusion_cache = {}
         self._oc_updated = {}
+        self._oc_triangles = {}
         self._oc_needs_update = {}
         self._oc_mask = set()
+        self._batch_depth = 0
+        self._dirty = set()
 
     def __setitem__(self, key, value):
         # Mark occlusion cache for update.
@@ -686,10 +974,7 @@ class Model(dict):
             self._oc_updated[ckey][key] = False
             self._oc_needs_update[ckey] = True
         # Register pose/parameter change callbacks.
-        def callback():
-            for ckey in self._occlusion_cache:
-                self._oc_updated[ckey][key] = False
-                self._oc_needs_update[ckey] = True
+        callback = self._occlusion_cache_callback(key)
         value.posecallbacks['occlusion_cache'] = callback
         if hasattr(value, 'paramcallbacks'):
             value.paramcallbacks['occlusion_cache'] = callback
@@ -698,6 +983,26 @@ class Model(dict):
             self.cameras.add(key)
         super(Model, self).__setitem__(key, value)
 
+    def __reduce__(self):
+        # Scene objects are added through __setitem__ on unpickling, so that
+        # their callbacks are registered again; the occlusion cache is not
+        # pickled.
+        state = dict(self.__dict__)
+        state['_occlusion_cache'] = {}
+        state['_oc_updated'] = {}
+        state['_oc_triangles'] = {}
+        state['_oc_needs_update'] = {}
+        state['_batch_depth'] = 0
+        state['_dirty'] = set()
+        return (type(self), (), state, None, self.iteritems())
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for sceneobject in self._oc_mask:
+            del self[sceneobject].posecallbacks['occlusion_cache']
+            if hasattr(self[sceneobject], 'paramcallbacks'):
+                del self[sceneobject].paramcallbacks['occlusion_cache']
+
     def __delitem__(self, key):
         self[key].visible = False
         self[key].__del__()
@@ -709,6 +1014,59 @@ class Model(dict):
         for sceneobject in self:
             self[sceneobject].visible = False
 
+    def _occlusion_cache_callback(self, key):
+        """\
+        Create the pose/parameter change callback marking an object for update
+        in the occlusion cache. Within a batch (see L{batch}), the object is
+        only recorded, and marked for update once at the end of the batch.
+
+        @param key: The object ID.
+        @type key: C{str}
+        @return: The callback.
+        @rtype: C{function}
+        """
+        def callback():
+            if self._batch_depth:
+                self._dirty.add(key)
+                return
+            for ckey in self._occlusion_cache:
+                self._oc_updated[ckey][key] = False
+                self._oc_needs_update[ckey] = True
+        return callback
+
+    def _flush_dirty(self):
+        """\
+        Apply a single occlusion cache invalidation for all objects changed
+        within a batch (see L{batch}) so far.
+        """
+        dirty = self._dirty & set(self.keys())
+        self._dirty = set()
+        if dirty:
+            for ckey in self._occlusion_cache:
+                for key in dirty:
+                    self._oc_updated[ckey][key] = False
+                self._oc_needs_update[ckey] = True
+
+    def batch(self):
+        """\
+        Return a context manager batching changes to the scene, e.g.::
+
+            with model.batch():
+                model['A'].set_absolute_pose(pose)
+                model['B'].setparam('zS', 600.0)
+
+        Within the batch, pose and parameter changes only record the changed
+        objects; the occlusion cache is invalidated once for all of them when
+        the (outermost) batch ends, or before it is next read within the batch
+        (e.g. by L{coverage}), so reads always reflect the current scene. Other
+        pose-derived values (e.g. mapped task points and tensors) are
+        recomputed lazily on use regardless.
+
+        @return: The batch context manager.
+        @rtype: L{ModelBatch}
+        """
+        return ModelBatch(self)
+
     @property
     def active_cameras(self):
         """\
@@ -760,7 +1118,7 @@ class Model(dict):
             for oc_set in self.oc_sets]))
         for ckey in self._occlusion_cache:
             for obj in obj_set:
-                for triangle in self[sceneobject].triangles:
+                for triangle in self[sceneobject].occluders:
                     try:
                         del self._occlusion_cache[ckey][obj]\
                             [triangle.triangle]
@@ -791,15 +1149,37 @@ class Model(dict):
             self._oc_updated[ckey][sceneobject] = False
             self._oc_needs_update[ckey] = True
         # Reinstate occlusion cache callbacks.
-        def callback():
-            for ckey in self._occlusion_cache:
-                self._oc_updated[ckey][sceneobject] = False
-                self._oc_needs_update[ckey] = True
+        callback = self._occlusion_cache_callback(sceneobject)
         self[sceneobject].posecallbacks['occlusion_cache'] = callback
         if hasattr(self[sceneobject], 'paramcallbacks'):
             self[sceneobject].paramcallbacks['occlusion_cache'] = callback
 
+    def simplify_occluders(self, sceneobject, error=None, target=0):
+        """\
+        Use a simplified (level of detail) set of occluding triangles for an
+        object in the occlusion cache (see L{SceneObject.simplify_occluders}).
+        The opaque triangles of the object are unchanged.
+
+        @param sceneobject: The object to simplify.
+        @type sceneobject: C{str}
+        @param error: The error bound (if None, revert to the opaque triangles).
+        @type error: C{float}
+        @param target: The minimum number of triangles (optional).
+        @type target: C{int}
+        """
+        # Masking removes the current occluders from the cache, and unmasking
+        # marks the object for update with the new ones.
+        masked = sceneobject in self._oc_mask
+        if not masked:
+            self.occlusion_cache_mask(sceneobject)
+        self[sceneobject].simplify_occluders(error, target)
+        if not masked:
+            self.occlusion_cache_unmask(sceneobject)
+
     def _update_occlusion_cache(self, task_params=None):
+        # Apply invalidations pending within a batch before reading the cache.
+        if self._dirty:
+            self._flush_dirty()
         if task_params:
             # The key is a hash on the values defining the frustum depth.
             key = (task_params['res_min'][1], task_params['blur_max'][1])
@@ -809,6 +1189,7 @@ class Model(dict):
             # Build a new occlusion cache entry if necessary.
             self._occlusion_cache[key] = {}
             self._oc_updated[key] = {}
+            self._oc_triangles[key] = {}
             for sceneobject in self:
                 self._oc_updated[key][sceneobject] = False
             self._oc_needs_update[key] = True
@@ -825,11 +1206,11 @@ class Model(dict):
                     if sceneobject in self._oc_mask:
                         continue
                     if key is None:
-                        for triangle in self[sceneobject].triangles:
+                        for triangle in self[sceneobject].occluder_list():
                             self._occlusion_cache[key][obj]\
                                 [triangle.triangle] = triangle.mapped_triangle()
                     else:
-                        for triangle in self[sceneobject].triangles:
+                        for triangle in self[sceneobject].occluder_list():
                             mt = triangle.mapped_triangle()
                             if self[obj].occluded_by(mt, task_params):
                                 self._occlusion_cache[key][obj]\
@@ -840,13 +1221,21 @@ class Model(dict):
             if sceneobject in self._oc_mask:
                 continue
             if not self._oc_updated[key][sceneobject]:
+                # Remove the triangles which are no longer occluders.
+                triangles = set([triangle.triangle for triangle \
+                    in self[sceneobject].occluder_list()])
+                removed = self._oc_triangles[key].get(sceneobject, set()) \
+                    - triangles
+                self._oc_triangles[key][sceneobject] = triangles
                 for obj in obj_set:
+                    for triangle in removed:
+                        self._occlusion_cache[key][obj].pop(triangle, None)
                     if key is None:
-                        for triangle in self[sceneobject].triangles:
+                        for triangle in self[sceneobject].occluder_list():
                             self._occlusion_cache[key][obj]\
                                 [triangle.triangle] = triangle.mapped_triangle()
                     else:
-                        for triangle in self[sceneobject].triangles:
+                        for triangle in self[sceneobject].occluder_list():
                             mt = triangle.mapped_triangle()
                             if self[obj].occluded_by(mt, task_params):
                                 self._occlusion_cache[key][obj]\
@@ -927,6 +1316,41 @@ class Model(dict):
                 break
         return maxstrength
 
+    def strength_array(self, points, task_params, subset=None,
+                       triangle_set=None):
+        """\
+        Return the individual coverage strength of an array of points in the
+        coverage strength model. Occlusion is checked only for points with
+        nonzero strength in each camera.
+
+        @param points: The point array.
+        @type points: C{numpy.ndarray}
+        @param task_params: Task parameters.
+        @type task_params: C{dict}
+        @param subset: Subset of cameras (defaults to all active cameras).
+        @type subset: C{set}
+        @param triangle_set: Set of additional triangles for occlusion.
+        @type triangle_set: C{list} of L{Triangle}
+        @return: The coverage strength of each point.
+        @rtype: C{numpy.ndarray}
+        """
+        points = np.asarray(points, dtype=float)
+        strengths = {}
+        for camera in subset or self.active_cameras:
+            strength = self[camera].strength_array(points, task_params)
+            indices = np.flatnonzero(strength)
+            for i, point in zip(indices, array_points(points[indices])):
+                if self.occluded(point, camera, task_params=task_params) or \
+                (triangle_set and self.occluded(point, camera,
+                triangle_set=triangle_set)):
+                    strength[i] = 0.0
+            strengths[camera] = strength
+        maxstrength = np.zeros(len(points))
+        for view in self.views(ocular=task_params['ocular'], subset=subset):
+            maxstrength = np.maximum(maxstrength,
+                np.min([strengths[camera] for camera in view], axis=0))
+        return maxstrength
+
     def coverage(self, task, subset=None):
         """\
         Return the coverage model of this multi-camera network with respect to
@@ -940,11 +1364,97 @@ class Model(dict):
         @rtype: L{PointCache}
         """
         coverage = PointCache()
-        for point in task.mapped:
-            # Calculate coverage strength for each mapped task point.
-            coverage[point] = self.strength(point, task.params, subset)
+        for point, strength in self.coverage_stream(task, subset):
+            coverage[point] = strength
         return coverage
 
+    def coverage_stream(self, task, subset=None):
+        """\
+        Generator which yields the coverage strength of each point in a given
+        task model (cf. L{coverage}).
+
+        @param task: The task model.
+        @type task: L{Task}
+        @param subset: Subset of cameras (defaults to all active cameras).
+        @type subset: C{set}
+        @return: Task point and coverage strength pair.
+        @rtype: L{Point}, C{float}
+        """
+        for point in list(task.mapped):
+            # Calculate coverage strength for each mapped task point.
+            yield point, self.strength(point, task.params, subset)
+
+    def trajectory_coverage(self, robot, trajectory, task, subset=None,
+                            processes=1):
+        """\
+        Return the coverage of the points in a given task model at each
+        waypoint of a joint trajectory of a robot, without changing the
+        configuration of the robot. The poses of the links and of the objects
+        (e.g. cameras) mounted on the robot are computed for all waypoints at
+        once (see L{Robot.forward_kinematics}), and the occluding triangles of
+        the rest of the scene are mapped once for all waypoints. The task model
+        must not be mounted on the robot.
+
+        @param robot: The robot ID.
+        @type robot: C{str}
+        @param trajectory: The M{N x n} array of joint configurations.
+        @type trajectory: C{numpy.ndarray}
+        @param task: The task model.
+        @type task: L{Task}
+        @param subset: Subset of cameras (defaults to all active cameras).
+        @type subset: C{set}
+        @param processes: The number of worker processes.
+        @type processes: C{int}
+        @return: The task point array, and the M{N x P} arrays of coverage
+            strength of each point at each waypoint and of cumulative (union)
+            coverage strength of each point up to each waypoint.
+        @rtype: C{tuple} of C{numpy.ndarray}
+        """
+        robot = self[robot]
+        trajectory = np.atleast_2d(np.asarray(trajectory, dtype=float))
+        R, T = robot.forward_kinematics(trajectory)
+        mounted = robot.mounted_poses(trajectory, (R, T))
+        if task in mounted:
+            raise ValueError('task model is mounted on the robot')
+        moving = [(link.local_occluders(), R[:, i], T[:, i]) \
+            for i, link in enumerate(robot.links)]
+        static = [np.zeros((0, 3, 3))]
+        for key in self:
+            sceneobject = self[key]
+            # Objects masked from the occlusion cache do not occlude (cf.
+            # coverage).
+            if sceneobject is robot or key in self._oc_mask:
+                continue
+            elif sceneobject in mounted:
+                # A mounted robot moves with its links in separate frames.
+                for part in getattr(sceneobject, 'links', [sceneobject]):
+                    moving.append((part.local_occluders(),) + mounted[part])
+            else:
+                static.append(sceneobject.mapped_occluders())
+        cameras = subset or self.active_cameras
+        context = {'points': points_array(list(task.mapped.keys())),
+                   'params': task.params,
+                   'cameras': dict([(key, self[key]) for key in cameras]),
+                   'poses': dict([(key, mounted[self[key]]) \
+                        for key in cameras if self[key] in mounted]),
+                   'views': list(self.views(ocular=task.params['ocular'],
+                        subset=subset)),
+                   'static': np.concatenate(static),
+                   'moving': moving}
+        if processes > 1:
+            chunks = np.array_split(np.arange(len(trajectory)), processes * 4)
+            pool = Pool(processes, _trajectory_init, (context,))
+            try:
+                strengths = np.concatenate(pool.map(_trajectory_strengths,
+                    [chunk.tolist() for chunk in chunks]))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            strengths = _trajectory_strengths(range(len(trajectory)), context)
+        return context['points'], strengths, \
+            np.maximum.accumulate(strengths, axis=0)
+
     def performance(self, task, subset=None, coverage=None):
         """\
         Return the coverage performance of this multi-camera network with
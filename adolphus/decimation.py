@@ -0,0 +1,252 @@
+"""\
+Mesh decimation module. Simplifies triangle meshes by quadric error edge
+collapse, e.g. for use as level-of-detail occlusion geometry.
+
+    - M. Garland and P.S. Heckbert, "Surface Simplification Using Quadric
+      Error Metrics," in Proc. SIGGRAPH, 1997, pp. 209-216.
+
+@author: Aaron Mavrinac
+@organization: University of Windsor
+@contact: mavrin1@uwindsor.ca
+@license: GPL-3
+"""
+
+import numpy as np
+from heapq import heapify, heappush, heappop
+
+
+def weld(triangles, tolerance=1e-4):
+    """\
+    Merge the coincident vertices of a triangle array into an indexed mesh.
+
+    @param triangles: The M{M x 3 x 3} (or M{M x 9}) triangle array.
+    @type triangles: C{numpy.ndarray}
+    @param tolerance: The distance below which vertices are merged.
+    @type tolerance: C{float}
+    @return: The M{V x 3} vertex array and the M{M x 3} face index array.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    points = np.asarray(triangles, dtype=float).reshape(-1, 3)
+    keys = np.round(points / tolerance).astype(np.int64)
+    order = np.lexsort(keys.T[::-1])
+    new = np.ones(len(points), dtype=bool)
+    new[1:] = (np.diff(keys[order], axis=0) != 0).any(axis=1)
+    index = np.empty(len(points), dtype=np.int64)
+    index[order] = np.cumsum(new) - 1
+    return points[order[new]], index.reshape(-1, 3)
+
+
+def mesh_edges(faces):
+    """\
+    Find the edges of an indexed mesh.
+
+    @param faces: The M{M x 3} face index array.
+    @type faces: C{numpy.ndarray}
+    @return: The M{E x 2} edge array (with sorted vertex indices), the number
+        of faces sharing each edge, and one face of each edge.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    edges = np.concatenate((faces[:, [0, 1]], faces[:, [1, 2]],
+        faces[:, [2, 0]]))
+    edges.sort(axis=1)
+    owners = np.tile(np.arange(len(faces)), 3)
+    order = np.lexsort((edges[:, 1], edges[:, 0]))
+    edges, owners = edges[order], owners[order]
+    new = np.ones(len(edges), dtype=bool)
+    new[1:] = (np.diff(edges, axis=0) != 0).any(axis=1)
+    starts = np.flatnonzero(new)
+    counts = np.diff(np.append(starts, len(edges)))
+    return edges[starts], counts, owners[starts]
+
+
+def _cross(u, v):
+    """\
+    Cross products of arrays of vectors (cheaper than C{numpy.cross} for the
+    small arrays handled per collapse).
+
+    @param u: The M{... x 3} array of first vectors.
+    @type u: C{numpy.ndarray}
+    @param v: The M{... x 3} array of second vectors.
+    @type v: C{numpy.ndarray}
+    @return: The M{... x 3} array of cross products.
+    @rtype: C{numpy.ndarray}
+    """
+    return u[..., [1, 2, 0]] * v[..., [2, 0, 1]] \
+        - u[..., [2, 0, 1]] * v[..., [1, 2, 0]]
+
+
+def plane_quadrics(planes):
+    """\
+    Fundamental error quadrics of an array of planes.
+
+    @param planes: The M{N x 4} array of planes (unit normal and offset).
+    @type planes: C{numpy.ndarray}
+    @return: The M{N x 4 x 4} array of quadrics.
+    @rtype: C{numpy.ndarray}
+    """
+    return planes[:, :, np.newaxis] * planes[:, np.newaxis, :]
+
+
+def _accumulate(quadrics, indices, count):
+    """\
+    Sum an array of quadrics by index.
+
+    @param quadrics: The M{N x 4 x 4} array of quadrics.
+    @type quadrics: C{numpy.ndarray}
+    @param indices: The index of each quadric.
+    @type indices: C{numpy.ndarray}
+    @param count: The number of indices.
+    @type count: C{int}
+    @return: The M{count x 4 x 4} array of summed quadrics.
+    @rtype: C{numpy.ndarray}
+    """
+    quadrics = quadrics.reshape(-1, 16)
+    result = np.zeros((count, 16))
+    for c in range(16):
+        result[:, c] = np.bincount(indices, weights=quadrics[:, c],
+            minlength=count)
+    return result.reshape(count, 4, 4)
+
+
+def collapse_costs(quadrics, a, b):
+    """\
+    Compute the optimal positions and errors of a set of vertex pair
+    collapses. The position minimizing the summed quadric is used where it is
+    well defined; otherwise, the best of the endpoints and midpoint is used.
+
+    @param quadrics: The M{N x 4 x 4} array of summed quadrics of each pair.
+    @type quadrics: C{numpy.ndarray}
+    @param a: The M{N x 3} array of first vertices.
+    @type a: C{numpy.ndarray}
+    @param b: The M{N x 3} array of second vertices.
+    @type b: C{numpy.ndarray}
+    @return: The M{N x 3} array of positions and the errors.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    A = quadrics[:, :3, :3]
+    g = -quadrics[:, :3, 3]
+    # Columns of the adjugate of A (symmetric) are the cross products of its
+    # rows.
+    C = _cross(A[:, [1, 2, 0]], A[:, [2, 0, 1]])
+    det = (A[:, 0] * C[:, 0]).sum(axis=1)
+    scale = ((A ** 2).sum(axis=2).sum(axis=1)) ** 1.5
+    with np.errstate(divide='ignore', invalid='ignore'):
+        optimal = ((C * g[:, :, np.newaxis]).sum(axis=1).T / det).T
+    optimal[~(np.abs(det) > 1e-10 * scale)] = np.nan
+    candidates = np.array([optimal, a, b, (a + b) / 2.0])
+    h = np.concatenate((candidates, np.ones(candidates.shape[:2] + (1,))),
+        axis=2)
+    costs = (h[:, :, :, np.newaxis] * quadrics[np.newaxis] \
+        * h[:, :, np.newaxis, :]).sum(axis=3).sum(axis=2)
+    costs[np.isnan(costs)] = np.inf
+    best = costs.argmin(axis=0)
+    index = np.arange(len(a))
+    return candidates[best, index], np.maximum(costs[best, index], 0.0)
+
+
+def decimate(triangles, error, target=0, tolerance=1e-4):
+    """\
+    Simplify a triangle mesh by quadric error edge collapse.
+
+    Edges are collapsed in order of increasing error until no collapse within
+    the error bound remains or the number of triangles reaches the target.
+    Mesh boundaries are preserved by constraint planes, and collapses which
+    would fold a face over or make the mesh non-manifold are rejected. Face
+    orientation is preserved.
+
+    @param triangles: The M{M x 3 x 3} (or M{M x 9}) triangle array.
+    @type triangles: C{numpy.ndarray}
+    @param error: The error bound (distance from the original surface).
+    @type error: C{float}
+    @param target: The minimum number of triangles (optional).
+    @type target: C{int}
+    @param tolerance: The distance below which vertices are merged.
+    @type tolerance: C{float}
+    @return: The M{M' x 9} simplified triangle array.
+    @rtype: C{numpy.ndarray}
+    """
+    vertices, faces = weld(triangles, tolerance)
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2])
+        & (faces[:, 2] != faces[:, 0])]
+    p = vertices[faces]
+    normals = _cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    magnitude = np.sqrt((normals ** 2).sum(axis=1))
+    faces, p = faces[magnitude > 0], p[magnitude > 0]
+    normals = (normals[magnitude > 0].T / magnitude[magnitude > 0]).T
+    planes = np.column_stack((normals, -(normals * p[:, 0]).sum(axis=1)))
+    Q = _accumulate(np.repeat(plane_quadrics(planes), 3, axis=0),
+        faces.ravel(), len(vertices))
+    # Constrain boundary edges by planes perpendicular to their faces.
+    edges, counts, owners = mesh_edges(faces)
+    border, bowners = edges[counts == 1], owners[counts == 1]
+    if len(border):
+        va = vertices[border[:, 0]]
+        bnormals = _cross(vertices[border[:, 1]] - va, normals[bowners])
+        bnormals = (bnormals.T / np.sqrt((bnormals ** 2).sum(axis=1))).T
+        bplanes = np.column_stack((bnormals, -(bnormals * va).sum(axis=1)))
+        Q += _accumulate(np.repeat(plane_quadrics(bplanes), 2, axis=0),
+            border.ravel(), len(vertices))
+    # Initialize the collapse queue.
+    positions = vertices.copy()
+    faces = faces.tolist()
+    alive = [True] * len(faces)
+    vfaces = [set() for v in range(len(vertices))]
+    for f, face in enumerate(faces):
+        for v in face:
+            vfaces[v].add(f)
+    version = [0] * len(vertices)
+    targets, costs = collapse_costs(Q[edges[:, 0]] + Q[edges[:, 1]],
+        vertices[edges[:, 0]], vertices[edges[:, 1]])
+    heap = [(cost, a, b, 0, 0, tuple(x)) for cost, (a, b), x \
+        in zip(costs.tolist(), edges.tolist(), targets.tolist())]
+    heapify(heap)
+    neighbors = lambda v: set([u for f in vfaces[v] for u in faces[f]]) \
+        - set([v])
+    remaining = len(faces)
+    bound = error ** 2
+    while heap and remaining > target:
+        cost, a, b, va, vb, x = heappop(heap)
+        if cost > bound:
+            break
+        if version[a] != va or version[b] != vb:
+            continue
+        shared = vfaces[a] & vfaces[b]
+        # Link condition (preserves manifold topology).
+        if not shared or len(neighbors(a) & neighbors(b)) != len(shared) \
+        or remaining - len(shared) < target:
+            continue
+        # Reject collapses which fold over any remaining face.
+        moved = list((vfaces[a] | vfaces[b]) - shared)
+        if moved:
+            old = positions[np.array([faces[f] for f in moved])]
+            new = old.copy()
+            new[np.array([[v in (a, b) for v in faces[f]] \
+                for f in moved])] = x
+            both = np.array([old, new])
+            n = _cross(both[:, :, 1] - both[:, :, 0],
+                both[:, :, 2] - both[:, :, 0])
+            if ((n[0] * n[1]).sum(axis=1) <= 0).any():
+                continue
+        # Collapse b into a.
+        for f in shared:
+            alive[f] = False
+            remaining -= 1
+            for v in faces[f]:
+                vfaces[v].discard(f)
+        for f in vfaces[b]:
+            faces[f] = [a if v == b else v for v in faces[f]]
+        vfaces[a] |= vfaces[b]
+        vfaces[b] = set()
+        positions[a] = x
+        Q[a] += Q[b]
+        version[a] += 1
+        version[b] = -1
+        around = list(neighbors(a))
+        if around:
+            targets, costs = collapse_costs(Q[a] + Q[around],
+                np.tile(positions[a], (len(around), 1)), positions[around])
+            for cost, v, x in zip(costs.tolist(), around, targets.tolist()):
+                heappush(heap, (cost, a, v, version[a], version[v], tuple(x)))
+    faces = np.array([face for f, face in enumerate(faces) if alive[f]],
+        dtype=np.int64).reshape(-1, 3)
+    return positions[faces].reshape(-1, 9)
@@ -0,0 +1,160 @@
+"""\
+Visual display module. Imported by the interface module only when an
+experiment with a display is created.
+
+@author: Aaron Mavrinac
+@organization: University of Windsor
+@contact: mavrin1@uwindsor.ca
+@license: GPL-3
+"""
+
+import visual
+
+from .geometry import Point
+from .visualization import Visualizable, VISUAL_SETTINGS
+
+
+class Display(visual.display):
+    """\
+    Visual display class.
+
+    The L{Display} class is a Visual display with some default properties, a few
+    useful methods for controlling the view, and some messaging and prompting
+    functionality.
+    """
+    def __init__(self, zoom=False, center=(0, 0, 0), title='Adolphus Viewer'):
+        """\
+        Constructor.
+
+        @param zoom: Toggle user zoom enable.
+        @type zoom: C{bool}
+        @param center: Location of the center point.
+        @type center: C{tuple} of C{float}
+        """
+        super(Display, self).__init__(title=title, center=center,
+            background=(1, 1, 1), foreground=(0.3, 0.3, 0.3), visible=False)
+        self.forward = (-1, -1, -1)
+        self.up = (0, 0, 1)
+        self.userzoom = zoom
+        self.range = 1500
+        self.rmin = 30
+        self.rmax = 18000
+        self.message_time = 0
+        self._stored_view = None
+
+        # command/message box
+        self._messagebox = visual.label(pos=center, background=(0, 0, 0),
+            height= int(VISUAL_SETTINGS['textsize'] * 1.5), color=(1, 1, 1),
+            visible=False)
+
+    def set_center(self, pos=(0, 0, 0)):
+        """\
+        Set the center of the view.
+
+        @param pos: The position of the center.
+        @type pos: C{tuple} of C{float}
+        """
+        self.center = visual.vector(pos)
+        self._messagebox.pos = self.center
+
+    def camera_view(self, camera=None):
+        """\
+        Toggle camera view, displaying the scene from the point of view of a
+        specific camera.
+
+        @param camera: The camera object.
+        @type camera: L{coverage.Camera}
+        """
+        if self.userzoom:
+            raise RuntimeError('zoom must be disabled for camera view')
+        if camera:
+            if self._stored_view:
+                self.camera_view()
+            self.userspin = False
+            for display in camera.actuals:
+                if Visualizable.displays[display] == self:
+                    camera.actuals[display].visible = False
+            self._stored_view = {'camera': camera,
+                                 'forward': tuple(self.forward),
+                                 'center': tuple(self.center),
+                                 'fov': self.fov,
+                                 'range': self.range}
+            self.center = tuple(camera.pose.map(Point(0, 0,
+                camera.getparam('zS'))))
+            self.forward = tuple(camera.pose.R.rotate(Point(0, 0, 1)))
+            self.up = tuple(camera.pose.R.rotate(Point(0, -1, 0)))
+            self.fov = max(camera.fov['ah'], camera.fov['av'])
+            # FIXME: zoom still isn't exactly right
+            self.range = max(camera.fov['tahl'], camera.fov['tahr'],
+                             camera.fov['tavb'], camera.fov['tavt']) \
+                         * camera.getparam('zS') * 1.2
+            self._messagebox.pos = self.center
+        else:
+            if not self._stored_view:
+                return
+            for display in self._stored_view['camera'].actuals:
+                if Visualizable.displays[display] == self:
+                    self._stored_view['camera'].actuals[display].visible = True
+            del self._stored_view['camera']
+            for key in self._stored_view:
+                self.__setattr__(key, self._stored_view[key])
+            self.up = (0, 0, 1)
+            self.userspin = True
+            self._messagebox.pos = self.center
+            self._stored_view = None
+
+    @property
+    def in_camera_view(self):
+        """\
+        Return whether the display is in camera view.
+
+        rtype: C{bool}
+        """
+        if self._stored_view:
+            return True
+        return False
+
+    def message(self, text=None):
+        """\
+        Display a message on the screen.
+
+        @param text: The message to display.
+        @type text: C{str}
+        """
+        self.message_time = 0
+        if not text:
+            self._messagebox.visible = False
+        else:
+            self._messagebox.text = text
+            self._messagebox.visible = True
+
+    def prompt(self, initial=''):
+        """\
+        Display a prompt and process the command entered by the user.
+
+        @return: The command string to be processed by the parent object.
+        @rtype: C{str}
+        """
+        self.userspin = False
+        self.message(initial + ' ')
+        cmd = ''
+        process_cmd = False
+        while True:
+            visual.rate(VISUAL_SETTINGS['rate'] * 2)
+            if self.kb.keys:
+                k = self.kb.getkey()
+                if k == '\n':
+                    process_cmd = True
+                    self.message()
+                    break
+                elif k == 'backspace':
+                    if len(cmd) > 0:
+                        cmd = cmd[:-1]
+                    else:
+                        self.message()
+                        break
+                elif k.isalnum() or k in " -_(),.[]+*%=|&:<>'~/\\":
+                    cmd += k
+            self.message(initial + ' ' + cmd)
+        self.userspin = True
+        return cmd if process_cmd else None
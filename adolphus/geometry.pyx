@@ -904,7 +904,7 @@ cdef class Face:
         self.vertices = args
 
     def __reduce__(self):
-        return (Face, (self.vertices,))
+        return (type(self), tuple(self.vertices))
 
     def __hash__(self):
         return hash(self.vertices)
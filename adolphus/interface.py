@@ -1,5 +1,7 @@
 """\
-Visual interface module.
+Interface module. The Visual display stack is imported only when an experiment
+with a display is created; a headless experiment runs the same commands without
+it.
 
 @author: Aaron Mavrinac
 @organization: University of Windsor
@@ -7,162 +9,18 @@ Visual interface module.
 @license: GPL-3
 """
 
-import visual
-from threading import Thread, Event
+from time import sleep
+from threading import Thread, Event, local
 from math import copysign
+from collections import deque
 
 import commands
 from .geometry import Point, Rotation, Pose
 from .coverage import Model
 from .posable import SceneObject
-from .sprite import Sprite
-from .visualization import VisualizationError, Visualizable, VISUAL_SETTINGS
-
-
-class Display(visual.display):
-    """\
-    Visual display class.
-
-    The L{Display} class is a Visual display with some default properties, a few
-    useful methods for controlling the view, and some messaging and prompting
-    functionality.
-    """
-    def __init__(self, zoom=False, center=(0, 0, 0), title='Adolphus Viewer'):
-        """\
-        Constructor.
-
-        @param zoom: Toggle user zoom enable.
-        @type zoom: C{bool}
-        @param center: Location of the center point.
-        @type center: C{tuple} of C{float}
-        """
-        super(Display, self).__init__(title=title, center=center,
-            background=(1, 1, 1), foreground=(0.3, 0.3, 0.3), visible=False)
-        self.forward = (-1, -1, -1)
-        self.up = (0, 0, 1)
-        self.userzoom = zoom
-        self.range = 1500
-        self.rmin = 30
-        self.rmax = 18000
-        self.message_time = 0
-        self._stored_view = None
-
-        # command/message box
-        self._messagebox = visual.label(pos=center, background=(0, 0, 0),
-            height= int(VISUAL_SETTINGS['textsize'] * 1.5), color=(1, 1, 1),
-            visible=False)
-
-    def set_center(self, pos=(0, 0, 0)):
-        """\
-        Set the center of the view.
-
-        @param pos: The position of the center.
-        @type pos: C{tuple} of C{float}
-        """
-        self.center = visual.vector(pos)
-        self._messagebox.pos = self.center
-
-    def camera_view(self, camera=None):
-        """\
-        Toggle camera view, displaying the scene from the point of view of a
-        specific camera.
-
-        @param camera: The camera object.
-        @type camera: L{coverage.Camera}
-        """
-        if self.userzoom:
-            raise RuntimeError('zoom must be disabled for camera view')
-        if camera:
-            if self._stored_view:
-                self.camera_view()
-            self.userspin = False
-            for display in camera.actuals:
-                if Visualizable.displays[display] == self:
-                    camera.actuals[display].visible = False
-            self._stored_view = {'camera': camera,
-                                 'forward': tuple(self.forward),
-                                 'center': tuple(self.center),
-                                 'fov': self.fov,
-                                 'range': self.range}
-            self.center = tuple(camera.pose.map(Point(0, 0,
-                camera.getparam('zS'))))
-            self.forward = tuple(camera.pose.R.rotate(Point(0, 0, 1)))
-            self.up = tuple(camera.pose.R.rotate(Point(0, -1, 0)))
-            self.fov = max(camera.fov['ah'], camera.fov['av'])
-            # FIXME: zoom still isn't exactly right
-            self.range = max(camera.fov['tahl'], camera.fov['tahr'],
-                             camera.fov['tavb'], camera.fov['tavt']) \
-                         * camera.getparam('zS') * 1.2
-            self._messagebox.pos = self.center
-        else:
-            if not self._stored_view:
-                return
-            for display in self._stored_view['camera'].actuals:
-                if Visualizable.displays[display] == self:
-                    self._stored_view['camera'].actuals[display].visible = True
-            del self._stored_view['camera']
-            for key in self._stored_view:
-                self.__setattr__(key, self._stored_view[key])
-            self.up = (0, 0, 1)
-            self.userspin = True
-            self._messagebox.pos = self.center
-            self._stored_view = None
-
-    @property
-    def in_camera_view(self):
-        """\
-        Return whether the display is in camera view.
-
-        rtype: C{bool}
-        """
-        if self._stored_view:
-            return True
-        return False
-
-    def message(self, text=None):
-        """\
-        Display a message on the screen.
-
-        @param text: The message to display.
-        @type text: C{str}
-        """
-        self.message_time = 0
-        if not text:
-            self._messagebox.visible = False
-        else:
-            self._messagebox.text = text
-            self._messagebox.visible = True
-
-    def prompt(self, initial=''):
-        """\
-        Display a prompt and process the command entered by the user.
-
-        @return: The command string to be processed by the parent object.
-        @rtype: C{str}
-        """
-        self.userspin = False
-        self.message(initial + ' ')
-        cmd = ''
-        process_cmd = False
-        while True:
-            visual.rate(VISUAL_SETTINGS['rate'] * 2)
-            if self.kb.keys:
-                k = self.kb.getkey()
-                if k == '\n':
-                    process_cmd = True
-                    self.message()
-                    break
-                elif k == 'backspace':
-                    if len(cmd) > 0:
-                        cmd = cmd[:-1]
-                    else:
-                        self.message()
-                        break
-                elif k.isalnum() or k in " -_(),.[]+*%=|&:<>'~/\\":
-                    cmd += k
-            self.message(initial + ' ' + cmd)
-        self.userspin = True
-        return cmd if process_cmd else None
+from .server import ReadWriteLock
+from .visualization import VisualizationError, Visualizable, VISUAL_SETTINGS, \
+    load_visual
 
 
 class Experiment(Thread):
@@ -171,27 +29,38 @@ class Experiment(Thread):
 
     An L{Experiment} object is the main interface component of Adolphus. It
     manages a L{Model} along with any task models, and provides one or more
-    Visual displays and command-based interaction.
+    Visual displays and command-based interaction. A headless experiment has
+    no displays (and does not import Visual), and supports all commands which
+    do not require a display.
     """
-    def __init__(self, zoom=False):
+    def __init__(self, zoom=False, headless=False):
         """\
         Constructor.
 
         @param zoom: Use Visual's userzoom (disables camera view).
         @type zoom: C{bool}
+        @param headless: Run without displays.
+        @type headless: C{bool}
         """
-        if not visual:
-            raise VisualizationError('visual module not loaded')
-
         # displays
-        self.display = Display(zoom=zoom)
-        Visualizable.displays['main'] = self.display
-        self.display.select()
+        self.headless = headless
+        self.display = None
         self.altdisplays = []
+        self.centerdot = None
+        self.axes = None
+        self.modifier = None
 
         # generic event flag
         self.event = Event()
 
+        # lock serializing commands, pose changes, and background jobs
+        self.lock = ReadWriteLock()
+        self._executing = local()
+        self.jobs = {}
+
+        # visualization calls from other threads, made by the display loop
+        self.visualizations = deque()
+
         # state variables
         self.selected = None
         self._camera_names = True
@@ -207,6 +76,28 @@ class Experiment(Thread):
         self.keybindings = {}
         self.mousebindings = {}
 
+        if not headless:
+            self._init_display(zoom)
+
+        super(Experiment, self).__init__()
+
+    def _init_display(self, zoom):
+        """\
+        Create the main display and its visual aids.
+
+        @param zoom: Use Visual's userzoom (disables camera view).
+        @type zoom: C{bool}
+        """
+        visual = load_visual()
+        if not visual:
+            raise VisualizationError('visual module not loaded')
+        from .display import Display
+        from .sprite import Sprite
+
+        self.display = Display(zoom=zoom)
+        Visualizable.displays['main'] = self.display
+        self.display.select()
+
         # center marker
         self.centerdot = Sprite([{'type':       'sphere',
                                   'radius':     5,
@@ -254,8 +145,6 @@ class Experiment(Thread):
         self.modifier = Sprite(primitives)
         self.modifier.visible = False
 
-        super(Experiment, self).__init__()
-
     def add_display(self, zoom=False):
         """\
         Add an alternate display to this experiment.
@@ -263,6 +152,9 @@ class Experiment(Thread):
         @param zoom: Use Visual's userzoom (disables camera view).
         @type zoom: C{bool}
         """
+        if self.headless:
+            raise VisualizationError('headless experiment')
+        from .display import Display
         self.altdisplays.append(Display(zoom=zoom))
         Visualizable.displays['alt%d' % (len(self.altdisplays) - 1)] = \
             self.altdisplays[-1]
@@ -309,11 +201,13 @@ class Experiment(Thread):
                     task = self.tasks[self.display.prompt('Task:')]
             else:
                 raise ValueError('no task to parameterize frustum')
+            from .sprite import Sprite
             self.display.select()
             self.guides[obj] = \
                 Sprite(self.model[obj].frustum_primitives(task.params), \
                     frame=self.model[obj].actuals['main'])
         elif hasattr(self.model, 'lasers') and obj in self.model.lasers:
+            from .sprite import Sprite
             self.display.select()
             self.guides[obj] = Sprite(self.model[obj].triangle_primitives(), \
                 frame=self.model[obj].actuals['main'])
@@ -324,13 +218,14 @@ class Experiment(Thread):
         """\
         Toggle display of camera names.
         """
-        if not self.is_alive():
+        if self.headless or not self.is_alive():
             return
         self._camera_names = not self._camera_names
         for camera in self.model.cameras:
             try:
                 self.model[camera].nametag.visible = self._camera_names
             except AttributeError:
+                from .sprite import Sprite
                 self.model[camera].nametag = Sprite([{'type': 'label',
                     'color': [1, 1, 1], 'height': VISUAL_SETTINGS['textsize'],
                     'background': [0, 0, 0],
@@ -338,22 +233,60 @@ class Experiment(Thread):
                 self.model[camera].nametag.frame = \
                     self.model[camera].actuals['main']
 
-    def execute(self, cmd, response='pickle'):
+    def execute(self, cmd, response='pickle', data=''):
         """\
-        Execute a command.
+        Execute a command, holding the experiment lock as a reader for a
+        read-only command (see L{commands.readonly}) or as a writer otherwise.
+        Commands executed by another command (e.g. L{commands.batch}) run under
+        the lock already held.
 
         @param cmd: The command string to execute.
         @type cmd: C{str}
         @param response: Response format for client (see commands.py).
         @type response: C{str}
+        @param data: Binary payload for the command (see commands.py).
+        @type data: C{str}
         @return: The return string of the command.
         @rtype: C{str}
         """
-        cmd, args = cmd.split()[0], cmd.split()[1:]
+        try:
+            cmd, args = cmd.split()[0], cmd.split()[1:]
+        except IndexError:
+            raise commands.CommandError('invalid command')
         if cmd not in commands.commands:
             raise commands.CommandError('invalid command')
+        if getattr(self._executing, 'value', False):
+            return self._execute(cmd, args, response, data)
+        if getattr(commands.commands[cmd], 'readonly', False):
+            acquire, release = self.lock.acquire_read, self.lock.release_read
+        else:
+            acquire, release = self.lock.acquire_write, self.lock.release_write
+        acquire()
+        self._executing.value = True
         try:
-            return commands.commands[cmd](self, args, response=response)
+            return self._execute(cmd, args, response, data)
+        finally:
+            self._executing.value = False
+            release()
+
+    def _execute(self, cmd, args, response, data):
+        """\
+        Execute a command (holding the lock).
+
+        @param cmd: The command name.
+        @type cmd: C{str}
+        @param args: The command arguments.
+        @type args: C{list} of C{str}
+        @param response: Response format for client (see commands.py).
+        @type response: C{str}
+        @param data: Binary payload for the command (see commands.py).
+        @type data: C{str}
+        @return: The return string of the command.
+        @rtype: C{str}
+        """
+        try:
+            return commands.commands[cmd](self, args, response=response,
+                data=data)
         except commands.CommandError as e:
             es = str(e)
             if commands.commands[cmd].__doc__:
@@ -368,6 +301,12 @@ class Experiment(Thread):
         """\
         Run this experiment.
         """
+        if self.headless:
+            # Commands are executed by other threads until exit.
+            while not self.exit:
+                sleep(1.0 / VISUAL_SETTINGS['rate'])
+            return
+        visual = load_visual()
         self.display.visible = True
         for display in self.altdisplays:
             display.visible = True
@@ -391,6 +330,14 @@ class Experiment(Thread):
             if self.select_time > VISUAL_SETTINGS['rate'] * 2:
                 self.selected.unhighlight()
                 self.select_time = 0
+            # make visualization calls queued by other threads
+            if self.visualizations:
+                self.lock.acquire_write()
+                try:
+                    while self.visualizations:
+                        self.visualizations.popleft()()
+                finally:
+                    self.lock.release_write()
             # process mouse events
             if self.display.mouse.events:
                 m = self.display.mouse.getevent()
@@ -440,12 +387,16 @@ class Experiment(Thread):
                 newpos = self.display.mouse.project(normal=self.display.forward,
                     point=self.modifier.pos)
                 if newpos != lastpos:
-                    newpose = Pose(self.modifier.parent.pose.T + moving *\
-                        (moving.dot(Point(*newpos)) - moving.dot(\
-                        Point(*lastpos))), self.modifier.parent.pose.R)
-                    self.modifier.parent.absolute_pose = newpose
-                    self.modifier.pos = tuple(self.modifier.parent.pose.T)
-                    self.modifier.parent.update_visualization()
+                    self.lock.acquire_write()
+                    try:
+                        newpose = Pose(self.modifier.parent.pose.T + moving *\
+                            (moving.dot(Point(*newpos)) - moving.dot(\
+                            Point(*lastpos))), self.modifier.parent.pose.R)
+                        self.modifier.parent.absolute_pose = newpose
+                        self.modifier.pos = tuple(self.modifier.parent.pose.T)
+                        self.modifier.parent.update_visualization()
+                    finally:
+                        self.lock.release_write()
                     lastpos = newpos
             elif rotating:
                 newpos = self.display.mouse.project(normal=tuple(rotating),
@@ -456,12 +407,16 @@ class Experiment(Thread):
                     zdiff = (lastpos - newpos).proj(planey)
                     if zdiff.mag < self.display.rmin / 10.0:
                         continue
-                    newpose = Pose(self.modifier.parent.pose.T, self.modifier.\
-                        parent.pose.R + Rotation.from_axis_angle(\
-                        copysign(zdiff.mag, zdiff.z) * 0.01,
-                        (-self.modifier.parent.pose).R.rotate(rotating)))
-                    self.modifier.parent.absolute_pose = newpose
-                    self.modifier.parent.update_visualization()
+                    self.lock.acquire_write()
+                    try:
+                        newpose = Pose(self.modifier.parent.pose.T, self.\
+                            modifier.parent.pose.R + Rotation.from_axis_angle(\
+                            copysign(zdiff.mag, zdiff.z) * 0.01,
+                            (-self.modifier.parent.pose).R.rotate(rotating)))
+                        self.modifier.parent.absolute_pose = newpose
+                        self.modifier.parent.update_visualization()
+                    finally:
+                        self.lock.release_write()
                     lastpos = newpos
             elif zoom:
                 newpos = self.display.mouse.pos
@@ -0,0 +1,213 @@
+"""\
+Background job module. Runs long coverage computations (see
+L{adolphus.commands.job}) in a separate thread, so that the experiment remains
+responsive to other commands and to the display while they progress.
+
+A job consists of one or more parts, each of which consumes a stream of
+C{(point, strength)} pairs (e.g. L{adolphus.coverage.Model.coverage_stream})
+into a coverage cache. The stream is advanced in steps of a fixed number of
+points while holding the experiment lock as a writer, so commands executed
+between steps see a consistent model, but may see intermediate state of the
+computation (e.g. an object displaced by a range transport). A job may be
+cancelled between steps.
+
+@author: Aaron Mavrinac
+@organization: University of Windsor
+@contact: mavrin1@uwindsor.ca
+@license: GPL-3
+"""
+
+from time import time
+from itertools import count
+from threading import Thread, Event, Lock
+
+from .coverage import PointCache
+
+
+RUNNING, DONE, CANCELLED, FAILED = 'running', 'done', 'cancelled', 'failed'
+
+_ids = count(1)
+
+
+class JobPart(object):
+    """\
+    Job part, computing the coverage of a single task.
+    """
+    def __init__(self, name, total, stream, weight=None):
+        """\
+        Constructor.
+
+        @param name: The name of the coverage cache (usually the task name).
+        @type name: C{str}
+        @param total: The number of points in the stream.
+        @type total: C{int}
+        @param stream: Generator of task point and coverage strength pairs.
+        @type stream: C{generator}
+        @param weight: Relevance of a task point for performance (defaults to
+            uniform).
+        @type weight: C{callable}
+        """
+        self.name = name
+        self.total = total
+        self.stream = stream
+        self.weight = weight or (lambda point: 1.0)
+        self.coverage = PointCache()
+        self.Fn, self.Fd = 0.0, 0.0
+
+    @property
+    def performance(self):
+        """\
+        Performance of the points computed so far (C{None} if there are none).
+        """
+        try:
+            return self.Fn / self.Fd
+        except ZeroDivisionError:
+            return None
+
+
+class Job(Thread):
+    """\
+    Background coverage job.
+    """
+    def __init__(self, lock, command, parts, finish=None, step=256):
+        """\
+        Constructor.
+
+        @param lock: The experiment lock.
+        @type lock: L{adolphus.server.ReadWriteLock}
+        @param command: The command string which started the job.
+        @type command: C{str}
+        @param parts: The parts of the job.
+        @type parts: C{list} of L{JobPart}
+        @param finish: Called with each completed part, holding the lock.
+        @type finish: C{callable}
+        @param step: The number of points computed per step.
+        @type step: C{int}
+        """
+        self.id = next(_ids)
+        self.lock = lock
+        self.command = command
+        self.parts = parts
+        self.finish = finish
+        self.step = step
+        self.state = RUNNING
+        self.error = None
+        self.done = 0
+        self.total = sum([part.total for part in parts])
+        self.start_time = None
+        self.end_time = None
+        self._cancel = Event()
+        self._status = Lock()
+        super(Job, self).__init__()
+        self.daemon = True
+
+    @property
+    def elapsed(self):
+        """\
+        Elapsed time of the job in seconds.
+        """
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time()) - self.start_time
+
+    @property
+    def rate(self):
+        """\
+        Points computed per second.
+        """
+        try:
+            return self.done / self.elapsed
+        except ZeroDivisionError:
+            return 0.0
+
+    def cancel(self):
+        """\
+        Cancel this job (at the end of the current step).
+        """
+        self._cancel.set()
+
+    def status(self):
+        """\
+        Return the status of this job.
+
+        @return: The ID, command, state, number of points done, total number of
+            points, elapsed time, rate, performance (partial while running) of
+            each part started, and error message (if failed).
+        @rtype: C{dict}
+        """
+        with self._status:
+            return {'id': self.id, 'command': self.command,
+                    'state': self.state, 'done': self.done,
+                    'total': self.total, 'elapsed': self.elapsed,
+                    'rate': self.rate, 'error': self.error,
+                    'performance': dict([(part.name, part.performance)
+                        for part in self.parts if part.Fd])}
+
+    def _advance(self, part):
+        """\
+        Consume one step of a part's stream.
+
+        @param part: The job part.
+        @type part: L{JobPart}
+        @return: True if the stream is exhausted.
+        @rtype: C{bool}
+        """
+        for i in range(self.step):
+            try:
+                point, strength = next(part.stream)
+            except StopIteration:
+                return True
+            weight = part.weight(point)
+            with self._status:
+                part.coverage[point] = strength
+                part.Fn += strength * weight
+                part.Fd += weight
+                self.done += 1
+        return False
+
+    def _close(self, parts):
+        """\
+        Close the streams of unfinished parts (restoring any state they have
+        changed).
+
+        @param parts: The job parts.
+        @type parts: C{list} of L{JobPart}
+        """
+        self.lock.acquire_write()
+        try:
+            for part in parts:
+                part.stream.close()
+        finally:
+            self.lock.release_write()
+
+    def run(self):
+        """\
+        Run this job.
+        """
+        self.start_time = time()
+        state = DONE
+        try:
+            for i, part in enumerate(self.parts):
+                exhausted = False
+                while not exhausted:
+                    if self._cancel.is_set():
+                        state = CANCELLED
+                        break
+                    self.lock.acquire_write()
+                    try:
+                        exhausted = self._advance(part)
+                        if exhausted and self.finish:
+                            self.finish(part)
+                    finally:
+                        self.lock.release_write()
+                if state == CANCELLED:
+                    self._close(self.parts[i:])
+                    break
+        except Exception as e:
+            self._close(self.parts)
+            with self._status:
+                self.error = '%s: %s' % (type(e).__name__, e)
+            state = FAILED
+        with self._status:
+            self.end_time = time()
+            self.state = state
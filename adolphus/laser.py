@@ -10,10 +10,12 @@ modeling laser line based range imaging cameras.
 
 from math import pi, sin, tan, atan
 from copy import copy
+import numpy as np
 
 from .geometry import Angle, Pose, Point, DirectionalPoint, Triangle
 from .coverage import PointCache, Task, Camera, Model
 from .posable import SceneObject
+from .arrays import points_array, array_points, triangles_array, intersections
 
 
 class RangeTask(Task):
@@ -67,16 +69,6 @@ class LineLaser(SceneObject):
             except KeyError:
                 pass
 
-    def _pose_changed_hook(self):
-        """\
-        Hook called on pose change.
-        """
-        try:
-            del self._triangle
-        except AttributeError:
-            pass
-        super(LineLaser, self)._pose_changed_hook()
-
     @property
     def params(self):
         """\
@@ -121,14 +113,15 @@ class LineLaser(SceneObject):
         """\
         Triangle formed by the laser plane.
         """
-        try:
-            return self._triangle
-        except AttributeError:
+        generation = self.generation()
+        if getattr(self, '_triangle_generation', None) != generation \
+        or not hasattr(self, '_triangle'):
             width = self._params['depth'] * tan(self._params['fan'] / 2.0)
             self._triangle = Triangle(self.pose.T,
                 self.pose._map(Point(-width, 0, self._params['depth'])),
                 self.pose._map(Point(width, 0, self._params['depth'])))
-            return self._triangle
+            self._triangle_generation = generation
+        return self._triangle
 
     def occluded_by(self, triangle, *args):
         """\
@@ -159,6 +152,8 @@ class RangeCamera(Camera):
     """\
     Single-camera coverage strength model for laser line based range camera.
     """
+    threshold_params = Camera.threshold_params + ['hres_min']
+
     def zres(self, resolution):
         """\
         Return the depth at which the specified resolution occurs. In a range
@@ -221,6 +216,90 @@ class RangeCamera(Camera):
         else:
             return min(max((zhmina - p.z) / (zhmina - zhmini), 0.0), 1.0)
 
+    def _compute_thresholds(self, tp):
+        """\
+        Compute the coverage component thresholds for the given task
+        parameters, including the height resolution depth factors (per unit
+        sine of the view angle).
+
+        @param tp: Task parameters.
+        @type tp: C{dict}
+        @return: The thresholds.
+        @rtype: C{dict}
+        """
+        th = super(RangeCamera, self)._compute_thresholds(tp)
+        th['zh'] = []
+        for resolution in tp['hres_min']:
+            try:
+                th['zh'].append(self.zhres(resolution, pi / 2.0))
+            except ZeroDivisionError:
+                th['zh'].append(float('inf'))
+        return th
+
+    def ch_array(self, p, d, tp):
+        """\
+        Height resolution component of the coverage function over an array of
+        points. Non-directional points have zero coverage.
+
+        @param p: The M{N x 3} array of points (in camera coordinates).
+        @type p: C{numpy.ndarray}
+        @param d: The M{N x 3} array of unit directions (in camera coordinates).
+        @type d: C{numpy.ndarray}
+        @param tp: Task parameters.
+        @type tp: C{dict}
+        @return: The height resolution coverage component values in M{[0, 1]}.
+        @rtype: C{numpy.ndarray}
+        """
+        if d is None:
+            return np.zeros(len(p))
+        zhmini, zhmina = self.thresholds(tp)['zh']
+        # The sine of the angle between the direction and the ray to the
+        # camera, from the magnitude of their cross product.
+        norm = np.sqrt((p ** 2).sum(axis=1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sine = np.sqrt((np.cross(d, -p) ** 2).sum(axis=1)) / norm
+            zhi = sine * zhmini
+            zha = sine * zhmina
+            value = np.where(zha == zhi, p[:, 2] < zha,
+                np.clip((zha - p[:, 2]) / (zha - zhi), 0.0, 1.0))
+        return np.where(~np.isnan(d[:, 0]) & (norm > 0), value, 0.0)
+
+    def aligned_array(self, cd):
+        """\
+        Return which directional points in camera coordinates are aligned for
+        range coverage (with direction in the camera's M{y-z} plane). This
+        replaces the exception raised by L{strength} with a mask.
+
+        @param cd: The M{N x 3} array of unit directions (in camera coordinates).
+        @type cd: C{numpy.ndarray}
+        @return: The alignment mask.
+        @rtype: C{numpy.ndarray} of C{bool}
+        """
+        return ~np.isnan(cd[:, 0]) & (np.abs(np.nan_to_num(cd[:, 0])) <= 1e-4)
+
+    def strength_array(self, points, task_params, pose=None):
+        """\
+        Return the coverage strength for an array of directional points.
+        Includes the height resolution component. Points which are not aligned
+        for range coverage (see L{aligned_array}) have zero coverage.
+
+        @param points: The M{N x 5} directional point array.
+        @type points: C{numpy.ndarray}
+        @param task_params: Task parameters.
+        @type task_params: C{dict}
+        @param pose: The pose of the camera (defaults to its current pose).
+        @type pose: L{Pose}
+        @return: The coverage strength of each point.
+        @rtype: C{numpy.ndarray}
+        """
+        cp, cd = self.camera_points(points, pose)
+        if cd is None:
+            raise TypeError('points must be directional for range coverage')
+        return self.aligned_array(cd) * self.cv_array(cp, task_params) \
+             * self.cr_array(cp, task_params) * self.cf_array(cp, task_params) \
+             * self.cd_array(cp, cd, task_params) \
+             * self.ch_array(cp, cd, task_params)
+
     def strength(self, point, task_params):
         """\
         Return the coverage strength for a directional point. Includes the
@@ -395,7 +474,7 @@ class RangeModel(Model):
             @return: The recursive set of triangles.
             @rtype: C{list} of L{Triangle}
             """
-            triangles = [t.mapped_triangle() for t in sceneobject.triangles]
+            triangles = [t.mapped_triangle() for t in sceneobject.occluders]
             for child in sceneobject.children:
                 if isinstance(child, SceneObject):
                     triangles += self.get_triangles(child)
@@ -418,6 +497,28 @@ class RangeModel(Model):
             @return: Task point and mapped directional point pair.
             @rtype: L{Point}, L{DirectionalPoint}
             """
+            for points, mapped, triangles in self.stops():
+                if mapped is None:
+                    for point in points:
+                        yield point, None, None
+                    continue
+                for point, mdp in zip(points, array_points(mapped)):
+                    yield point, mdp, triangles
+
+        def stops(self, cache=True):
+            """\
+            Generator which performs the transport and yields, for each stop in
+            scan order, the original task points transported at that stop, their
+            transported directional point counterparts, and the transported
+            triangle set. Task points not covered by the laser are yielded first
+            with no mapped points or triangles.
+
+            @param cache: If true, cache the stops for subsequent transports.
+            @type cache: C{bool}
+            @return: Task points, mapped directional point array, and triangles.
+            @rtype: C{list} of L{Point}, C{numpy.ndarray}, C{list} of
+                L{Triangle}
+            """
             raise NotImplementedError
 
     class LinearTargetTransport(Transport):
@@ -426,7 +527,7 @@ class RangeModel(Model):
         along a specified axis through the laser plane. Assumes that the task's
         mount is the object to be transported.
         """
-        def __init__(self, model, taxis=None):
+        def __init__(self, model, taxis=None, resolution=None):
             """\
             Constructor.
 
@@ -434,8 +535,13 @@ class RangeModel(Model):
             @type model: L{RangeModel}
             @param taxis: The axis along which to transport the object.
             @type taxis: L{Point}
+            @param resolution: The encoder resolution (transport distance
+                between stops). If unspecified, each distinct offset at which
+                a task point crosses the laser plane is a stop.
+            @type resolution: C{float}
             """
             super(RangeModel.LinearTargetTransport, self).__init__(model)
+            self.resolution = resolution
             if not taxis:
                 # Translate normal to the laser plane if no axis is specified.
                 self.taxis = self.laser.triangle.normal()
@@ -454,40 +560,105 @@ class RangeModel(Model):
             """
             return self.task.mount
 
-        def transport(self):
+        def stops(self, cache=True):
             """\
-            Generator which performs the transport and yields the original task
-            points and their transported directional point counterparts.
-
-            @return: Task point and mapped directional point pair.
-            @rtype: L{Point}, L{DirectionalPoint}
+            Generator which performs the transport and yields, for each stop in
+            scan order, the original task points transported at that stop, their
+            transported directional point counterparts, and the transported
+            triangle set. Each task point is transported to the stop nearest
+            the offset at which it crosses the laser plane.
+
+            @param cache: If true, cache the stops for subsequent transports.
+            @type cache: C{bool}
+            @return: Task points, mapped directional point array, and triangles.
+            @rtype: C{list} of L{Point}, C{numpy.ndarray}, C{list} of
+                L{Triangle}
             """
             if self._transport_cache:
                 for stop in self._transport_cache:
                     yield stop
-            else:
-                # Obtain angles for directional point along the projection axis.
-                rho, eta = self.laser.pose._dmap(\
-                    DirectionalPoint(0, 0, 0, pi, 0))[3:5]
-                # Store the original set of mapped task points of the task.
-                task_original = PointCache(self.task.mapped)
-                for point in task_original:
-                    lp = self.laser.triangle.intersection(point,
-                        point + self.taxis, False)
-                    # If no intersection exists, point not covered by the laser.
-                    if lp is None:
-                        self._transport_cache.append((point, None, None))
-                        yield self._transport_cache[-1]
-                        continue
-                    # Translate the object so the point lies in the laser plane.
-                    pose = Pose(T=(lp - point))
-                    self.tobject.absolute_pose = self.original_pose + pose
-                    # Yield the mapped directional point.
-                    mp = pose._map(point)
-                    triangles = self.get_triangles(self.tobject)
-                    self._transport_cache.append((point, DirectionalPoint(mp.x,
-                        mp.y, mp.z, rho, eta), triangles))
-                    yield self._transport_cache[-1]
+                return
+            # Obtain angles for directional point along the projection axis.
+            rho, eta = self.laser.pose._dmap(\
+                DirectionalPoint(0, 0, 0, pi, 0))[3:5]
+            # Find the offset along the transport axis at which each of the
+            # mapped task points crosses the laser plane.
+            points = list(self.task.mapped)
+            positions = points_array(points)[:, :3]
+            taxis = np.array(tuple(self.taxis.unit()))
+            offsets = intersections(triangles_array([self.laser.triangle]),
+                positions, positions + taxis)[:, 0]
+            # If no intersection exists, point not covered by the laser.
+            missed = np.isnan(offsets)
+            if missed.any():
+                stop = ([points[i] for i in np.flatnonzero(missed)], None, None)
+                if cache:
+                    self._transport_cache.append(stop)
+                yield stop
+            # Quantize the offsets to encoder stops and sort into scan order.
+            indices = np.flatnonzero(~missed)
+            if self.resolution:
+                offsets[indices] = np.round(offsets[indices] / \
+                    self.resolution) * self.resolution
+            indices = indices[np.argsort(offsets[indices], kind='mergesort')]
+            bounds = np.flatnonzero(np.diff(offsets[indices])) + 1
+            for bucket in np.split(indices, bounds):
+                if not len(bucket):
+                    continue
+                # Translate the object to the stop.
+                T = taxis * offsets[bucket[0]]
+                self.tobject.absolute_pose = self.original_pose + \
+                    Pose(T=Point(*T))
+                mapped = np.column_stack((positions[bucket] + T,
+                    np.tile((rho, eta), (len(bucket), 1))))
+                stop = ([points[i] for i in bucket], mapped,
+                    self.get_triangles(self.tobject))
+                if cache:
+                    self._transport_cache.append(stop)
+                yield stop
+
+    def range_coverage_stream(self, task, transport, subset=None, cache=False):
+        """\
+        Generator which yields the range coverage of each task point in scan
+        order according to the given transport class. Points are evaluated a
+        stop at a time against the triangle set transported for that stop, so
+        unless caching is requested, memory use is bounded by the largest stop.
+
+        @param task: The range coverage task.
+        @type task: L{RangeTask}
+        @param transport: Transport class.
+        @type transport: L{RangeModel.Transport}
+        @param subset: Subset of cameras (defaults to all active cameras).
+        @type subset: C{set}
+        @param cache: If true, cache the transport stops.
+        @type cache: C{bool}
+        @return: Task point and coverage strength pair.
+        @rtype: L{Point}, C{float}
+        """
+        if not isinstance(task, RangeTask):
+            raise TypeError('task is not a range coverage task')
+        # Give the transport object a task context (required).
+        transport.task = task
+        with transport:
+            for points, mapped, triangles in transport.stops(cache=cache):
+                strength = np.zeros(len(points))
+                if mapped is not None:
+                    # Compute the laser coverage (occlusion and incidence
+                    # angle).
+                    covered = np.zeros(len(points), dtype=bool)
+                    for i, mdp in enumerate(array_points(mapped)):
+                        occluded = self.occluded(mdp, self.active_laser)[0]
+                        toccluded, inc_angle = self.occluded(mdp,
+                            self.active_laser, triangle_set=triangles)
+                        covered[i] = not (occluded or toccluded \
+                            or inc_angle > task.params['inc_angle_max'])
+                    # Compute the camera coverage.
+                    if covered.any():
+                        strength[covered] = self.strength_array(
+                            mapped[covered], task.params, subset=subset,
+                            triangle_set=triangles)
+                for point, value in zip(points, strength):
+                    yield point, float(value)
 
     def range_coverage(self, task, transport, subset=None, **kwargs):
         """\
@@ -507,25 +678,8 @@ class RangeModel(Model):
         @return: The coverage model.
         @rtype: L{PointCache}
         """
-        if not isinstance(task, RangeTask):
-            raise TypeError('task is not a range coverage task')
         coverage = PointCache()
-        # Give the transport object a task context (required).
-        transport.task = task
-        with transport:
-            for point, mdp, triangles in transport.transport():
-                if not mdp:
-                    coverage[point] = 0.0
-                    continue
-                # Compute the laser coverage (occlusion and incidence angle).
-                occluded = self.occluded(mdp, self.active_laser)[0]
-                toccluded, inc_angle = self.occluded(mdp, self.active_laser,
-                                                     triangle_set=triangles)
-                if occluded or toccluded \
-                    or inc_angle > task.params['inc_angle_max']:
-                    coverage[point] = 0.0
-                    continue
-                # Compute the camera coverage.
-                coverage[point] = self.strength(mdp, task.params, subset=subset,
-                    triangle_set=triangles)
+        for point, strength in self.range_coverage_stream(task, transport,
+            subset=subset, cache=True):
+            coverage[point] = strength
         return coverage
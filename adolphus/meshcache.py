@@ -0,0 +1,182 @@
+"""\
+Binary mesh cache module. Stores the arrays describing a parsed mesh (vertices,
+indices, normals, adjacency) in a compact binary file which is read back by
+memory mapping, so that reloading a mesh skips parsing entirely and several
+processes loading the same mesh share its pages.
+
+A cache file is keyed by the absolute path of its source file, and is valid
+only as long as the size and modification time of the source are unchanged.
+The file consists of a header, a table of arrays (name, dtype, shape, offset),
+and the array data, aligned to L{ALIGN} bytes.
+
+@author: Aaron Mavrinac
+@organization: University of Windsor
+@contact: mavrin1@uwindsor.ca
+@license: GPL-3
+"""
+
+import os
+import struct
+import tempfile
+import numpy as np
+from hashlib import sha1
+
+MAGIC = b'ADOLMESH'
+VERSION = 1
+ALIGN = 16
+CACHE_DIR = os.environ.get('ADOLPHUS_CACHE',
+    os.path.join(os.path.expanduser('~'), '.adolphus', 'meshcache'))
+
+_HEADER = struct.Struct('<8sIqdII')
+_ENTRY = struct.Struct('<16s4sqqq')
+
+
+def cache_path(source, directory=None):
+    """\
+    Return the path of the cache file for a source file.
+
+    @param source: The path of the source file.
+    @type source: C{str}
+    @param directory: The cache directory (optional).
+    @type directory: C{str}
+    @return: The path of the cache file.
+    @rtype: C{str}
+    """
+    key = sha1(os.path.abspath(source).encode('utf-8')).hexdigest()
+    return os.path.join(directory or CACHE_DIR, key + '.mesh')
+
+
+def _source_key(source):
+    """\
+    Return the absolute path, size, and modification time of a source file.
+
+    @param source: The path of the source file.
+    @type source: C{str}
+    @return: The path, size, and modification time.
+    @rtype: C{tuple}
+    """
+    stat = os.stat(source)
+    return os.path.abspath(source).encode('utf-8'), stat.st_size, \
+        stat.st_mtime
+
+
+def write_mesh(source, arrays, directory=None):
+    """\
+    Write the cache file for a source file. Failure to write the cache (e.g.
+    an unwritable cache directory) is not an error.
+
+    @param source: The path of the source file.
+    @type source: C{str}
+    @param arrays: The named arrays (one- or two-dimensional).
+    @type arrays: C{dict} of C{numpy.ndarray}
+    @param directory: The cache directory (optional).
+    @type directory: C{str}
+    @return: True if the cache file was written.
+    @rtype: C{bool}
+    """
+    path = cache_path(source, directory)
+    spath, size, mtime = _source_key(source)
+    names = sorted(arrays.keys())
+    arrays = [np.ascontiguousarray(arrays[name]) for name in names]
+    offset = _HEADER.size + len(spath) + _ENTRY.size * len(names)
+    entries = []
+    for name, a in zip(names, arrays):
+        offset += -offset % ALIGN
+        rows = a.shape[0]
+        cols = a.shape[1] if a.ndim > 1 else 0
+        entries.append(_ENTRY.pack(name.encode('ascii'),
+            a.dtype.str.encode('ascii'), rows, cols, offset))
+        offset += a.nbytes
+    tmp = None
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, size, mtime, len(spath),
+                len(names)))
+            f.write(spath)
+            for entry in entries:
+                f.write(entry)
+            for entry, a in zip(entries, arrays):
+                f.seek(_ENTRY.unpack(entry)[4])
+                a.tofile(f)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            os.remove(path)
+            os.rename(tmp, path)
+    except (IOError, OSError):
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    return True
+
+
+def read_mesh(source, directory=None):
+    """\
+    Read the cache file for a source file by memory mapping its arrays.
+
+    @param source: The path of the source file.
+    @type source: C{str}
+    @param directory: The cache directory (optional).
+    @type directory: C{str}
+    @return: The named arrays, or C{None} if there is no valid cache.
+    @rtype: C{dict} of C{numpy.ndarray}
+    """
+    path = cache_path(source, directory)
+    try:
+        spath, size, mtime = _source_key(source)
+        with open(path, 'rb') as f:
+            magic, version, csize, cmtime, plen, count = \
+                _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION or csize != size \
+            or cmtime != mtime or f.read(plen) != spath:
+                return None
+            entries = [_ENTRY.unpack(f.read(_ENTRY.size)) \
+                for i in range(count)]
+        arrays = {}
+        for name, dtype, rows, cols, offset in entries:
+            shape = (rows, cols) if cols else (rows,)
+            name = name.rstrip(b'\0').decode('ascii')
+            if not rows:
+                arrays[name] = np.zeros(shape, dtype=dtype.rstrip(b'\0'))
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype.rstrip(b'\0'),
+                mode='r', offset=offset, shape=shape)
+        return arrays
+    except (IOError, OSError, struct.error, ValueError):
+        return None
+
+
+def pack_lists(lists):
+    """\
+    Pack a list of integer lists into offset and data arrays (compressed
+    sparse row form).
+
+    @param lists: The lists.
+    @type lists: C{list} of C{list} of C{int}
+    @return: The offset and data arrays.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(l) for l in lists])
+    data = np.fromiter((i for l in lists for i in l), dtype=np.int64,
+        count=offsets[-1])
+    return offsets, data
+
+
+def unpack_lists(offsets, data):
+    """\
+    Unpack offset and data arrays into a list of integer lists.
+
+    @param offsets: The offset array.
+    @type offsets: C{numpy.ndarray}
+    @param data: The data array.
+    @type data: C{numpy.ndarray}
+    @return: The lists.
+    @rtype: C{list} of C{list} of C{int}
+    """
+    offsets = offsets.tolist()
+    data = data.tolist()
+    return [data[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
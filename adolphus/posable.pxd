@@ -7,7 +7,6 @@ Posable objects module definition file.
 @license: GPL-3
 """
 
-from cpython cimport bool
 from geometry cimport Pose
 
 
@@ -15,11 +14,13 @@ cdef class Posable:
     cdef public object children, posecallbacks
     cdef public Pose _pose, _mount_pose, _absolute_pose
     cdef public Posable _mount
-    cdef public bool _absolute_pose_c
+    cdef public unsigned long _changed, _computed, _notified
+    cpdef unsigned long generation(self)
     cpdef Pose get_absolute_pose(self)
     cpdef set_absolute_pose(self, Pose value)
     cpdef Pose get_relative_pose(self)
     cpdef set_relative_pose(self, Pose value)
     cpdef _pose_changed_hook(self)
+    cdef _notify(self)
     cpdef Posable get_mount(self)
     cpdef set_mount(self, Posable value)
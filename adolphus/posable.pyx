@@ -7,15 +7,56 @@ Posable objects module.
 @license: GPL-3
 """
 
-VISUAL_ENABLED = True
-try:
-    import visual
-except ImportError:
-    VISUAL_ENABLED = False
+import numpy as np
 
-from geometry import Point, Pose, Triangle
+from geometry import Point, Pose, Rotation, Quaternion, Triangle
 from geometry cimport Pose
-from visualization import Visualizable
+from visualization import Visualizable, load_visual, visual_module
+from arrays import planing_arrays, pose_arrays
+from decimation import decimate
+
+
+# The global pose generation, incremented on every pose change.
+cdef unsigned long _generation = 0
+
+# The global pose generation as of the latest absolute pose query.
+cdef unsigned long _observed = 0
+
+
+class _PoseCallbacks(dict):
+    """\
+    Pose change callbacks of a L{Posable}. Registering a callback cancels the
+    coalescing of notifications of pending changes to the posable (see
+    L{Posable}), so that it is called on the next change.
+    """
+    def __init__(self, posable):
+        """\
+        Constructor.
+
+        @param posable: The posable.
+        @type posable: L{Posable}
+        """
+        super(_PoseCallbacks, self).__init__()
+        self.posable = posable
+
+    def __setitem__(self, key, value):
+        super(_PoseCallbacks, self).__setitem__(key, value)
+        posable = self.posable
+        while posable is not None:
+            posable._notified = 0
+            posable = posable._mount
+
+
+def _rebuild(cls):
+    """\
+    Create an uninitialized instance of a class (for unpickling).
+
+    @param cls: The class.
+    @type cls: C{type}
+    @return: The instance.
+    @rtype: C{object}
+    """
+    return cls.__new__(cls)
 
 
 cdef class Posable:
@@ -29,6 +70,20 @@ cdef class Posable:
     pose is computed by composition with the pose (and mount pose) of the object
     on which it is mounted. The mount pose is a pose relative to the object
     describing the "starting point" of the pose of a mounted object.
+
+    Pose changes are not propagated eagerly to mounted objects. Instead, each
+    change is stamped with a global generation, and the absolute pose (or other
+    pose-derived state) of an object is recomputed on demand if the generation
+    of its pose (see L{generation}) is newer than that of its cached value.
+    Only mounted objects with pose change callbacks (or with mounted objects of
+    their own) are visited on a change, to call their callbacks.
+
+    Pose change callbacks are coalesced: if an object has already been notified
+    of a change since the latest absolute pose query (of any object), neither
+    its callbacks nor those of the objects mounted on it are called again, since
+    nothing can have acted on the previous notification yet (registering a
+    callback cancels this). Callbacks should therefore only invalidate state
+    derived from poses, not recompute it.
     """
     def __init__(self, Pose pose=Pose(), Pose mount_pose=Pose(),
                  Posable mount=None):
@@ -45,23 +100,72 @@ cdef class Posable:
         self._pose = pose
         self._mount_pose = mount_pose
         self.children = set()
-        self.posecallbacks = {}
+        self.posecallbacks = _PoseCallbacks(self)
         self._mount = None
         self.set_mount(mount)
 
+    def __reduce__(self):
+        return (_rebuild, (type(self),), self.__getstate__())
+
+    def __getstate__(self):
+        """\
+        Return the state of this posable for pickling. Pose change callbacks are
+        not pickled; their owners (e.g. L{adolphus.coverage.Model}) register
+        them again.
+
+        @return: The state.
+        @rtype: C{dict}
+        """
+        state = dict(getattr(self, '__dict__', {}))
+        state['_posable'] = (self._pose, self._mount_pose, self._mount,
+            self.children)
+        return state
+
+    def __setstate__(self, state):
+        """\
+        Restore the state of this posable from unpickling.
+
+        @param state: The state.
+        @type state: C{dict}
+        """
+        state = dict(state)
+        self._pose, self._mount_pose, self._mount, self.children = \
+            state.pop('_posable')
+        self.posecallbacks = _PoseCallbacks(self)
+        global _generation
+        _generation += 1
+        self._changed = _generation
+        self._computed = 0
+        if state:
+            self.__dict__.update(state)
+
+    cpdef unsigned long generation(self):
+        """\
+        The generation of the pose of this object: the latest generation at
+        which its relative pose, its mount, or the pose of any object in its
+        mount chain changed. Values derived from the absolute pose remain valid
+        as long as the generation is unchanged.
+
+        @rtype: C{int}
+        """
+        if self._mount is None:
+            return self._changed
+        return max(self._changed, self._mount.generation())
+
     cpdef Pose get_absolute_pose(self):
         """\
         The (absolute) pose of the object.
         """
-        if self._absolute_pose_c:
-            return self._absolute_pose
-        else:
+        global _observed
+        cdef unsigned long generation = self.generation()
+        _observed = _generation
+        if self._computed != generation:
             if self._mount is None:
                 self._absolute_pose = self._pose
             else:
                 self._absolute_pose = self._pose._add(self._mount.mount_pose())
-            self._absolute_pose_c = True
-            return self._absolute_pose
+            self._computed = generation
+        return self._absolute_pose
 
     cpdef set_absolute_pose(self, Pose value):
         if value != self.get_absolute_pose():
@@ -91,9 +195,23 @@ cdef class Posable:
         """\
         Hook called on pose change.
         """
-        self._absolute_pose_c = False
+        global _generation
+        _generation += 1
+        self._changed = _generation
+        self._notify()
+
+    cdef _notify(self):
+        """\
+        Call the pose change callbacks of this object and of all objects mounted
+        on it, unless already notified since the latest absolute pose query.
+        """
+        cdef Posable child
+        if self._notified > _observed:
+            return
+        self._notified = _generation
         for child in self.children:
-            child._pose_changed_hook()
+            if child.children or child.posecallbacks:
+                child._notify()
         for callback in self.posecallbacks.values():
             callback()
 
@@ -149,18 +267,127 @@ class OcclusionTriangle(Posable, Visualizable):
         # pose is composed onto the given relative pose. Among other things,
         # this avoids strange visualization behavior.
         planing_pose = Triangle(*vertices).planing_pose()
-        self.triangle = Triangle(*[planing_pose.map(v) for v in vertices])
-        Posable.__init__(self, pose=(planing_pose.inverse() + pose),
-            mount=mount)
-        # Attempt to build the primitive set (relies on Visual).
-        if VISUAL_ENABLED:
-            polygon = visual.Polygon([v[0:2] for v in self.triangle.vertices])
-            primitives = [{'type':      'extrusion',
-                           'pos':       [(0, 0, 0.01), (0, 0, -0.01)],
-                           'shape':     polygon}]
-        else:
-            primitives = []
-        Visualizable.__init__(self, primitives=primitives)
+        self._init_planed(Triangle(*[planing_pose.map(v) for v in vertices]),
+            planing_pose.inverse() + pose, mount)
+
+    @classmethod
+    def from_array(cls, triangles, Pose pose=None, Posable mount=None):
+        """\
+        Construct occlusion triangles in bulk from a triangle array, computing
+        the planing poses of all triangles at once. Degenerate triangles are
+        skipped.
+
+        @param triangles: The M{M x 3 x 3} (or M{M x 9}) triangle array.
+        @type triangles: C{numpy.ndarray}
+        @param pose: The pose of the triangle normals (from z-hat, optional).
+        @type pose: L{Pose}
+        @param mount: The mount of the triangles (optional).
+        @type mount: L{Posable}
+        @return: The occlusion triangles.
+        @rtype: C{list} of L{OcclusionTriangle}
+        """
+        triangles = np.asarray(triangles, dtype=float).reshape(-1, 3, 3)
+        valid, quaternions, planed = planing_arrays(triangles)
+        result = []
+        for v0, q, p in zip(triangles[valid, 0, :].tolist(),
+            quaternions[valid].tolist(), planed[valid].tolist()):
+            inverse = Pose(Point(*v0),
+                Rotation(Quaternion(q[0], Point(-q[1], -q[2], -q[3]))))
+            if pose is not None:
+                inverse = inverse._add(pose)
+            triangle = cls.__new__(cls)
+            triangle._init_planed(Triangle(Point(*p[0]), Point(*p[1]),
+                Point(*p[2])), inverse, mount)
+            result.append(triangle)
+        return result
+
+    def copy(self, Posable mount=None):
+        """\
+        Return a copy of this triangle. The x-y mapped triangle and relative
+        pose (both immutable) are shared with the copy.
+
+        @param mount: The mount of the copy (optional).
+        @type mount: L{Posable}
+        @return: The copy.
+        @rtype: L{OcclusionTriangle}
+        """
+        triangle = type(self).__new__(type(self))
+        triangle._init_planed(self.triangle, self._pose, mount)
+        return triangle
+
+    def _init_planed(self, triangle, Pose pose, Posable mount):
+        """\
+        Initialize from the x-y mapped triangle and its relative pose.
+
+        @param triangle: The x-y mapped triangle.
+        @type triangle: L{Triangle}
+        @param pose: The relative pose of the triangle.
+        @type pose: L{Pose}
+        @param mount: The mount of the triangle.
+        @type mount: L{Posable}
+        """
+        self.triangle = triangle
+        Posable.__init__(self, pose=pose, mount=mount)
+        Visualizable.__init__(self, primitives=self._triangle_primitives())
+
+    def _triangle_primitives(self):
+        """\
+        Build the primitive set of the x-y mapped triangle (relies on Visual,
+        and is empty if Visual has not been imported).
+
+        @return: The primitive set.
+        @rtype: C{list} of C{dict}
+        """
+        visual = visual_module()
+        if visual is None:
+            return []
+        polygon = visual.Polygon([v[0:2] for v in self.triangle.vertices])
+        return [{'type':      'extrusion',
+                 'pos':       [(0, 0, 0.01), (0, 0, -0.01)],
+                 'shape':     polygon}]
+
+    def scale(self, double value):
+        """\
+        Scale this triangle by a factor about the origin of its parent frame.
+        Scaling does not change the planing rotation, so only the x-y mapped
+        triangle and the translation of the relative pose are scaled.
+
+        @param value: The scalar factor.
+        @type value: C{float}
+        """
+        self.triangle = Triangle(*[v * value for v in self.triangle.vertices])
+        # The hook is called even if the relative pose is unchanged.
+        self._pose = Pose(self._pose.T * value, self._pose.R)
+        self._pose_changed_hook()
+        # Re-draw the triangle if visualized.
+        visualized = bool(self.actuals)
+        for display in self.actuals:
+            self.actuals[display].visible = False
+        self.actuals = {}
+        self.primitives = self._triangle_primitives()
+        if visualized:
+            self.visualize()
+
+    def __getstate__(self):
+        state = Posable.__getstate__(self)
+        state['actuals'] = {}
+        state['primitives'] = []
+        state.pop('_mapped_triangle', None)
+        state.pop('_mapped_generation', None)
+        return state
+
+    def __setstate__(self, state):
+        Posable.__setstate__(self, state)
+        self.primitives = self._triangle_primitives()
+
+    def visualize(self):
+        """\
+        Visualize this triangle, building its primitives if Visual was not
+        imported when it was constructed.
+        """
+        if not self.primitives and load_visual():
+            self.primitives = self._triangle_primitives()
+        Visualizable.visualize(self)
 
     def set_absolute_pose(self, Pose value):
         Posable.set_absolute_pose(self, value)
@@ -170,40 +397,115 @@ class OcclusionTriangle(Posable, Visualizable):
         The pose of the triangle. Triangles ignore the mount pose of the parent
         object when mounted, to simplify manual definition.
         """
-        if self._absolute_pose_c:
-            return self._absolute_pose
-        else:
+        global _observed
+        generation = self.generation()
+        _observed = _generation
+        if self._computed != generation:
             if self._mount is None:
                 self._absolute_pose = self._pose
             else:
                 self._absolute_pose = self._pose._add(self._mount.pose)
-            self._absolute_pose_c = True
-            return self._absolute_pose
+            self._computed = generation
+        return self._absolute_pose
 
     absolute_pose = property(get_absolute_pose, set_absolute_pose)
     pose = absolute_pose
 
-    def _pose_changed_hook(self):
-        """\
-        Hook called on pose change.
-        """
-        try:
-            del self._mapped_triangle
-        except AttributeError:
-            pass
-        Posable._pose_changed_hook(self)
-
     mount_pose = get_absolute_pose
 
     def mapped_triangle(self):
         """\
         Return the pose-mapped triangle.
         """
-        try:
-            return self._mapped_triangle
-        except AttributeError:
+        generation = self.generation()
+        if getattr(self, '_mapped_generation', None) != generation:
             self._mapped_triangle = self.triangle.pose_map(self.pose)
-            return self._mapped_triangle
+            self._mapped_generation = generation
+        return self._mapped_triangle
+
+
+class TriangleSet(set):
+    """\
+    Set of the opaque triangles of a L{SceneObject}. Modifying the set
+    invalidates the cached occluders of the object (see
+    L{SceneObject.occluders_changed}).
+
+    @ivar version: The number of modifications since construction.
+    @type version: C{int}
+    """
+    def __init__(self, owner, triangles=()):
+        """\
+        Constructor.
+
+        @param owner: The object owning the triangles.
+        @type owner: L{SceneObject}
+        @param triangles: The initial triangles (optional).
+        @type triangles: C{iterable} of L{OcclusionTriangle}
+        """
+        super(TriangleSet, self).__init__(triangles)
+        self.owner = owner
+        self.version = 0
+
+    def __reduce__(self):
+        return (type(self), (None, list(self)), self.__dict__)
+
+    def _changed(self):
+        self.version += 1
+        if self.owner is not None:
+            self.owner.occluders_changed()
+
+    def add(self, triangle):
+        set.add(self, triangle)
+        self._changed()
+
+    def discard(self, triangle):
+        set.discard(self, triangle)
+        self._changed()
+
+    def remove(self, triangle):
+        set.remove(self, triangle)
+        self._changed()
+
+    def pop(self):
+        triangle = set.pop(self)
+        self._changed()
+        return triangle
+
+    def clear(self):
+        set.clear(self)
+        self._changed()
+
+    def update(self, *others):
+        set.update(self, *others)
+        self._changed()
+
+    def difference_update(self, *others):
+        set.difference_update(self, *others)
+        self._changed()
+
+    def intersection_update(self, *others):
+        set.intersection_update(self, *others)
+        self._changed()
+
+    def symmetric_difference_update(self, other):
+        set.symmetric_difference_update(self, other)
+        self._changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
 
 
 class SceneObject(Posable, Visualizable):
@@ -214,8 +516,15 @@ class SceneObject(Posable, Visualizable):
     objects in the scene. Beyond the basic functionality of the parent classes,
     it allows a set of occluding triangles to be defined, which in general
     defines an occluding polyhedral solid, and maintains a public set of
-    L{OcclusionTriangle} objects.
+    L{OcclusionTriangle} objects (a L{TriangleSet}, so that changes to it
+    invalidate the cached occluders).
     """
+    _occluders = None
+    _occluder_version = 0
+    _occluder_list = None
+    _local_occluders = None
+    _mapped_occluders = None
+
     def __init__(self, name, pose=Pose(), mount_pose=Pose(), mount=None,
                  primitives=list(), triangles=list()):
         """\
@@ -238,7 +547,7 @@ class SceneObject(Posable, Visualizable):
         Posable.__init__(self, pose=pose, mount_pose=mount_pose, mount=mount)
         Visualizable.__init__(self, primitives=primitives)
         try:
-            self.triangles = set()
+            self.triangles = TriangleSet(self)
         except AttributeError:
             # Child class handles triangles separately.
             pass
@@ -248,15 +557,119 @@ class SceneObject(Posable, Visualizable):
                 self.triangles.add(triangle)
             self._triangles_view = False
 
-    def _pose_changed_hook(self):
+    def __getstate__(self):
+        state = Posable.__getstate__(self)
+        state['actuals'] = {}
+        if 'paramcallbacks' in state:
+            state['paramcallbacks'] = {}
+        for cache in ('_occluder_list', '_local_occluders',
+                      '_mapped_occluders'):
+            state.pop(cache, None)
+        return state
+
+    @property
+    def occluders(self):
         """\
-        Hook called on pose change.
+        The triangles used for occlusion: the simplified occluders if generated
+        (see L{simplify_occluders}), otherwise the opaque triangles.
         """
-        try:
-            del self._bounding_box
-        except AttributeError:
-            pass
-        Posable._pose_changed_hook(self)
+        if self._occluders is None:
+            return self.triangles
+        return self._occluders
+
+    def occluders_changed(self):
+        """\
+        Invalidate the cached occluder list and arrays of this object, and call
+        its pose change callbacks (so that e.g. the occlusion cache of a model
+        is updated). This is called automatically when its set of triangles is
+        modified; it must be called when the triangles themselves are modified
+        (e.g. scaled).
+        """
+        self._occluder_version += 1
+        self._occluder_list = None
+        self._local_occluders = None
+        self._mapped_occluders = None
+        for callback in self.posecallbacks.values():
+            callback()
+
+    def occluder_list(self):
+        """\
+        Return the occluding triangles (see L{occluders}) of this object as an
+        ordered list, in the same order as the rows of L{local_occluders} and
+        L{mapped_occluders}.
+
+        @return: The occluding triangles.
+        @rtype: C{list} of L{OcclusionTriangle}
+        """
+        if self._occluder_list is None:
+            self._occluder_list = list(self.occluders)
+        return self._occluder_list
+
+    def local_triangles(self):
+        """\
+        Return the opaque triangles of this object in its own coordinate frame.
+
+        @return: The M{M x 3 x 3} triangle array.
+        @rtype: C{numpy.ndarray}
+        """
+        return np.array([[tuple(v) for v in \
+            t.triangle.pose_map(t.relative_pose).vertices] \
+            for t in self.triangles], dtype=float).reshape(-1, 3, 3)
+
+    def local_occluders(self):
+        """\
+        Return the occluding triangles (see L{occluders}) of this object in its
+        own coordinate frame.
+
+        @return: The M{M x 3 x 3} triangle array (read-only).
+        @rtype: C{numpy.ndarray}
+        """
+        if self._local_occluders is None:
+            self._local_occluders = np.array([[tuple(v) for v in \
+                t.triangle.pose_map(t.relative_pose).vertices] \
+                for t in self.occluder_list()], dtype=float).reshape(-1, 3, 3)
+            self._local_occluders.flags.writeable = False
+        return self._local_occluders
+
+    def mapped_occluders(self):
+        """\
+        Return the occluding triangles (see L{occluders}) of this object in the
+        world frame, as one contiguous array for the array occlusion functions
+        (see L{adolphus.arrays.occluded}). The array is recomputed only when
+        the pose generation of this object changes.
+
+        @return: The M{M x 3 x 3} triangle array (read-only).
+        @rtype: C{numpy.ndarray}
+        """
+        generation = self.generation()
+        if self._mapped_occluders is None \
+        or self._mapped_occluders[0] != generation:
+            R, T = pose_arrays(self.pose)
+            mapped = np.dot(self.local_occluders(), R.T) + T
+            mapped.flags.writeable = False
+            self._mapped_occluders = (generation, mapped)
+        return self._mapped_occluders[1]
+
+    def simplify_occluders(self, error=None, target=0):
+        """\
+        Generate a simplified (level of detail) set of occluding triangles from
+        the opaque triangles of this object by quadric error edge collapse (see
+        L{adolphus.decimation.decimate}). These are used in place of the opaque
+        triangles for occlusion only.
+
+        @param error: The error bound (if None, revert to the opaque triangles).
+        @type error: C{float}
+        @param target: The minimum number of triangles (optional).
+        @type target: C{int}
+        """
+        if self._occluders is not None:
+            for triangle in self._occluders:
+                triangle.mount = None
+            self._occluders = None
+        if error is not None:
+            self._occluders = set(OcclusionTriangle.from_array(\
+                decimate(self.local_triangles(), error, target), mount=self))
+        self.occluders_changed()
 
     def toggle_triangles(self):
         """\
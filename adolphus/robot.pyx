@@ -7,11 +7,44 @@ Robot module.
 @license: GPL-3
 """
 
+import numpy as np
 from math import pi
-from functools import reduce
 
 from geometry import Point, Rotation, Pose
-from posable import SceneObject
+from posable import OcclusionTriangle, SceneObject
+from arrays import pose_arrays, compose_pose_arrays, quaternion_matrices
+
+
+def joint_pose_arrays(joint, positions):
+    """\
+    Generate the poses of the link required to effect the forward kinematic
+    transformations induced by an array of position values subject to joint
+    properties (cf. L{Robot.generate_joint_pose}).
+
+    @param joint: The joint description.
+    @type joint: C{dict}
+    @param positions: The positions.
+    @type positions: C{numpy.ndarray}
+    @return: The M{N x 3 x 3} rotation matrices and M{N x 3} translation
+        vectors of the induced poses.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    positions = np.asarray(positions, dtype=float)
+    if (positions < joint['limits'][0]).any() \
+    or (positions > joint['limits'][1]).any():
+        raise ValueError('position out of joint range')
+    axis = np.array(joint['axis'], dtype=float)
+    if joint['type'] == 'revolute':
+        theta = positions * pi / 180.0
+        axis = axis / np.sqrt((axis ** 2).sum())
+        return quaternion_matrices(np.column_stack((np.cos(theta / 2.0),
+            np.outer(np.sin(theta / 2.0), axis)))), \
+            np.zeros((len(positions), 3))
+    elif joint['type'] == 'prismatic':
+        return np.tile(np.eye(3), (len(positions), 1, 1)), \
+            np.outer(positions, axis)
+    else:
+        raise ValueError('invalid joint type')
 
 
 class RobotLink(SceneObject):
@@ -135,16 +168,22 @@ class Robot(SceneObject):
     def set_config(self, value):
         if not len(value) == len(self.links):
             raise ValueError('incorrect configuration length')
-        for i, position in enumerate(value):
-            try:
-                self.links[i + 1].relative_pose = \
-                    self.generate_joint_pose(self.joints[i], position)
-            except IndexError:
-                # The mount pose of the robot is that of the last link.
-                self._mount_pose = \
-                    self.generate_joint_pose(self.joints[i], position) + \
-                    (self.links[-1].mount_pose() - self.pose)
-            self._config[i] = position
+        poses = [self.generate_joint_pose(joint, position) \
+            for joint, position in zip(self.joints, value)]
+        # Set the link poses directly, and call the hook only on the first
+        # changed link (it reaches the rest of the chain through its children).
+        changed = None
+        for link, pose in zip(self.links[1:], poses):
+            if pose != link.relative_pose:
+                link._pose = pose
+                if changed is None:
+                    changed = link
+        if changed is not None:
+            changed._pose_changed_hook()
+        # The mount pose of the robot is that of the last link.
+        self._mount_pose = poses[-1] + \
+            (self.links[-1].mount_pose() - self.pose)
+        self._config = list(value)
         self._pose_changed_hook()
 
     config = property(get_config, set_config)
@@ -179,6 +218,15 @@ class Robot(SceneObject):
         for link in self.links:
             link.unhighlight()
 
+    def generation(self):
+        """\
+        The generation of the pose of this robot (see
+        L{Posable.generation}), which includes that of its base link.
+
+        @rtype: C{int}
+        """
+        return max(self._changed, self.links[0].generation())
+
     def get_absolute_pose(self):
         """\
         The (absolute) pose of the robot.
@@ -231,6 +279,68 @@ class Robot(SceneObject):
 
     mount = property(get_mount, set_mount)
 
+    def forward_kinematics(self, configs):
+        """\
+        Compute the poses of the links and the mount end of this robot for an
+        array of configurations at once, without changing its configuration.
+
+        @param configs: The M{N x n} array of configurations.
+        @type configs: C{numpy.ndarray}
+        @return: The M{N x (n + 1) x 3 x 3} rotation matrices and
+            M{N x (n + 1) x 3} translation vectors of the (absolute) poses of
+            the links, followed by that of the mount end, for each
+            configuration.
+        @rtype: C{tuple} of C{numpy.ndarray}
+        """
+        configs = np.atleast_2d(np.asarray(configs, dtype=float))
+        if not configs.shape[1] == len(self.links):
+            raise ValueError('incorrect configuration length')
+        R = np.empty((len(configs), len(self.links) + 1, 3, 3))
+        T = np.empty((len(configs), len(self.links) + 1, 3))
+        R[:, 0], T[:, 0] = pose_arrays(self.links[0].pose)
+        for i, joint in enumerate(self.joints):
+            # The joint pose is applied at the mount end of the previous link.
+            Ro, To = pose_arrays(self.links[i]._mount_pose)
+            Rm, Tm = compose_pose_arrays(Ro, To, R[:, i], T[:, i])
+            Rj, Tj = joint_pose_arrays(joint, configs[:, i])
+            R[:, i + 1], T[:, i + 1] = compose_pose_arrays(Rj, Tj, Rm, Tm)
+        return R, T
+
+    def mounted_poses(self, configs, poses=None):
+        """\
+        Compute the poses of all objects (e.g. cameras and tools, but not
+        occlusion triangles) mounted directly or indirectly on this robot or its
+        links for an array of configurations at once, without changing its
+        configuration.
+
+        @param configs: The M{N x n} array of configurations.
+        @type configs: C{numpy.ndarray}
+        @param poses: The result of L{forward_kinematics} (optional).
+        @type poses: C{tuple} of C{numpy.ndarray}
+        @return: The M{N x 3 x 3} rotation matrices and M{N x 3} translation
+            vectors of the (absolute) poses of each mounted object.
+        @rtype: C{dict} of C{tuple} of C{numpy.ndarray}
+        """
+        R, T = poses or self.forward_kinematics(configs)
+        # Mount ends (the robot's is that of the last link) to visit.
+        ends = [(self, R[:, -1], T[:, -1])]
+        for i, link in enumerate(self.links):
+            Ro, To = pose_arrays(link._mount_pose)
+            ends.append((link,) + compose_pose_arrays(Ro, To, R[:, i], T[:, i]))
+        links = set(self.links)
+        result = {}
+        while ends:
+            mount, Rm, Tm = ends.pop()
+            for child in mount.children - links:
+                if isinstance(child, OcclusionTriangle):
+                    continue
+                Rc, Tc = pose_arrays(child._pose)
+                result[child] = compose_pose_arrays(Rc, Tc, Rm, Tm)
+                Ro, To = pose_arrays(child._mount_pose)
+                ends.append((child,) + compose_pose_arrays(Ro, To,
+                    *result[child]))
+        return result
+
     @staticmethod
     def generate_joint_pose(joint, position=None):
         """\
@@ -259,13 +369,84 @@ class Robot(SceneObject):
         else:
             raise ValueError('invalid joint type')
 
+    def _link_occluders(self):
+        """\
+        Return the combined triangles, occluders, and ordered occluder list of
+        all links, rebuilt only when links are added or their occluders change.
+
+        @return: The triangles, occluders, and occluder list.
+        @rtype: C{tuple}
+        """
+        version = tuple([link._occluder_version for link in self.links])
+        if self._occluder_list is None or self._occluder_list[0] != version:
+            triangles, occluders, ordered = set(), set(), []
+            for link in self.links:
+                triangles |= link.triangles
+                occluders |= link.occluders
+                ordered.extend(link.occluder_list())
+            self._occluder_list = (version, triangles, occluders, ordered)
+        return self._occluder_list[1:]
+
     @property
     def triangles(self):
         """\
         Occluding triangles (of all links, combined).
         """
-        return reduce(lambda a, b: a | b,
-            [link.triangles for link in self.links])
+        return self._link_occluders()[0]
+
+    @property
+    def occluders(self):
+        """\
+        Occlusion triangles (of all links, combined).
+        """
+        return self._link_occluders()[1]
+
+    def occluder_list(self):
+        """\
+        Return the occluding triangles of all links as an ordered list, in the
+        same order as the rows of L{mapped_occluders}.
+
+        @return: The occluding triangles.
+        @rtype: C{list} of L{OcclusionTriangle}
+        """
+        return self._link_occluders()[2]
+
+    def local_occluders(self):
+        """\
+        Not defined for a robot, whose links have separate coordinate frames;
+        use the local occluders of each link (see L{links}) instead.
+        """
+        raise TypeError('robot %s has no single local frame; use the local '
+            'occluders of its links' % self.name)
+
+    def mapped_occluders(self):
+        """\
+        Return the occluding triangles of all links in the world frame, as one
+        contiguous array (see L{SceneObject.mapped_occluders}).
+
+        @return: The M{M x 3 x 3} triangle array (read-only).
+        @rtype: C{numpy.ndarray}
+        """
+        self._link_occluders()
+        key = (self._occluder_list[0], self.links[-1].generation())
+        if self._mapped_occluders is None or self._mapped_occluders[0] != key:
+            mapped = np.concatenate([np.zeros((0, 3, 3))] \
+                + [link.mapped_occluders() for link in self.links])
+            mapped.flags.writeable = False
+            self._mapped_occluders = (key, mapped)
+        return self._mapped_occluders[1]
+
+    def simplify_occluders(self, error=None, target=0):
+        """\
+        Generate simplified occluding triangles for each link.
+
+        @param error: The error bound (if None, revert to the opaque triangles).
+        @type error: C{float}
+        @param target: The minimum number of triangles per link (optional).
+        @type target: C{int}
+        """
+        for link in self.links:
+            link.simplify_occluders(error, target)
 
     def visualize(self):
         """\
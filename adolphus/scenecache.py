@@ -0,0 +1,184 @@
+"""\
+Compiled scene cache module. Stores a parsed experiment (coverage model and
+task models) in pickled form, so that reloading an experiment skips parsing its
+YAML and building its scene objects entirely.
+
+A cache file is keyed by the absolute path of its experiment file, and consists
+of a header pickle (format version, code signature, and file signatures)
+followed by the experiment pickle. It is valid only as long as the contents
+(size and SHA-1 digest) of the experiment file and of every file it references
+(directly or indirectly) are unchanged, and as long as the adolphus package
+(its version and the modules from which the pickled classes come) is unchanged.
+
+@author: Aaron Mavrinac
+@organization: University of Windsor
+@contact: mavrin1@uwindsor.ca
+@license: GPL-3
+"""
+
+import os
+import tempfile
+from hashlib import sha1
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from . import __version__
+
+VERSION = 2
+CACHE_DIR = os.environ.get('ADOLPHUS_SCENE_CACHE',
+    os.path.join(os.path.expanduser('~'), '.adolphus', 'scenecache'))
+
+
+def cache_path(source, directory=None):
+    """\
+    Return the path of the cache file for an experiment file.
+
+    @param source: The path of the experiment file.
+    @type source: C{str}
+    @param directory: The cache directory (optional).
+    @type directory: C{str}
+    @return: The path of the cache file.
+    @rtype: C{str}
+    """
+    key = sha1(os.path.abspath(source).encode('utf-8')).hexdigest()
+    return os.path.join(directory or CACHE_DIR, key + '.scene')
+
+
+_code_signature = None
+
+
+def code_signature():
+    """\
+    Return the signature of the adolphus package: its version and the SHA-1
+    digest of the names, sizes, and modification times of its modules.
+
+    @return: The signature.
+    @rtype: C{tuple}
+    """
+    global _code_signature
+    if _code_signature is None:
+        directory = os.path.dirname(os.path.abspath(__file__))
+        digest = sha1()
+        for name in sorted(os.listdir(directory)):
+            if os.path.splitext(name)[1] in ('.py', '.pyx', '.pxd', '.so',
+                                             '.pyd'):
+                stat = os.stat(os.path.join(directory, name))
+                digest.update(('%s %d %r\n' % (name, stat.st_size,
+                    stat.st_mtime)).encode('utf-8'))
+        _code_signature = (__version__, digest.hexdigest())
+    return _code_signature
+
+
+def _digest(path):
+    """\
+    Return the SHA-1 digest of the contents of a file.
+
+    @param path: The path of the file.
+    @type path: C{str}
+    @return: The hexadecimal digest.
+    @rtype: C{str}
+    """
+    digest = sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(2 ** 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _signatures(files):
+    """\
+    Return the absolute path, size, and SHA-1 digest of a list of files.
+
+    @param files: The paths of the files.
+    @type files: C{list} of C{str}
+    @return: The signatures.
+    @rtype: C{list} of C{tuple}
+    """
+    return [(os.path.abspath(path), os.path.getsize(path), _digest(path)) \
+        for path in files]
+
+
+def _valid(signatures):
+    """\
+    Return whether a list of file signatures is still valid. The sizes are
+    checked first, so that changed files are usually found without hashing.
+
+    @param signatures: The signatures.
+    @type signatures: C{list} of C{tuple}
+    @rtype: C{bool}
+    """
+    for path, size, digest in signatures:
+        if os.path.getsize(path) != size:
+            return False
+    for path, size, digest in signatures:
+        if _digest(path) != digest:
+            return False
+    return True
+
+
+def write_scene(source, files, experiment, directory=None):
+    """\
+    Write the cache file for an experiment file. Failure to write the cache
+    (e.g. an unwritable cache directory or an unpicklable object) is not an
+    error.
+
+    @param source: The path of the experiment file.
+    @type source: C{str}
+    @param files: The paths of all files read for the experiment.
+    @type files: C{list} of C{str}
+    @param experiment: The coverage model and task models.
+    @type experiment: C{tuple}
+    @param directory: The cache directory (optional).
+    @type directory: C{str}
+    @return: True if the cache file was written.
+    @rtype: C{bool}
+    """
+    path = cache_path(source, directory)
+    tmp = None
+    try:
+        header = pickle.dumps((VERSION, code_signature(),
+            _signatures(files)), pickle.HIGHEST_PROTOCOL)
+        data = pickle.dumps(experiment, pickle.HIGHEST_PROTOCOL)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(data)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            os.remove(path)
+            os.rename(tmp, path)
+    except Exception:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    return True
+
+
+def read_scene(source, directory=None):
+    """\
+    Read the cache file for an experiment file.
+
+    @param source: The path of the experiment file.
+    @type source: C{str}
+    @param directory: The cache directory (optional).
+    @type directory: C{str}
+    @return: The coverage model and task models, or C{None} if there is no
+        valid cache.
+    @rtype: C{tuple}
+    """
+    path = cache_path(source, directory)
+    try:
+        with open(path, 'rb') as f:
+            version, code, signatures = pickle.load(f)
+            if version != VERSION or code != code_signature() \
+            or not signatures or signatures[0][0] != os.path.abspath(source) \
+            or not _valid(signatures):
+                return None
+            return pickle.load(f)
+    except Exception:
+        return None
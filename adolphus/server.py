@@ -0,0 +1,328 @@
+"""\
+Command server module. Serves the commands of an experiment (see
+L{adolphus.commands}) to multiple concurrent clients over TCP or Unix domain
+sockets.
+
+Requests and responses are length-prefixed binary frames. Each frame consists
+of a fixed header (request ID, code, text length, and data length, as network
+byte order unsigned integers) followed by the text and the data. In a request,
+the code is the index of the response format in L{FORMATS}, the text is the
+command string, and the data is an optional binary payload. In a response, the
+code is L{OK} or L{ERROR}, the text is the error message (if any), and the data
+is the result of the command.
+
+Responses carry the ID of their request, so clients may pipeline requests.
+Requests from one client are executed in order. Commands from different
+clients (and steps of background jobs, see L{adolphus.jobs}) are serialized,
+except for read-only commands (see L{adolphus.commands.readonly}), which may
+run concurrently with each other.
+
+@author: Aaron Mavrinac
+@organization: University of Windsor
+@contact: mavrin1@uwindsor.ca
+@license: GPL-3
+"""
+
+import socket
+import struct
+import SocketServer
+from threading import Condition, Lock
+from itertools import count
+
+from .commands import CommandError
+
+
+HEADER = struct.Struct('!IBII')
+FORMATS = ['pickle', 'csv', 'text', 'binary']
+OK, ERROR = 0, 1
+
+
+def _recv_exactly(sock, size):
+    """\
+    Receive an exact number of bytes from a socket.
+
+    @param sock: The socket.
+    @type sock: C{socket.socket}
+    @param size: The number of bytes.
+    @type size: C{int}
+    @return: The bytes, or C{None} if the connection was closed first.
+    @rtype: C{str}
+    """
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 2 ** 16))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_frame(sock):
+    """\
+    Read a frame from a socket.
+
+    @param sock: The socket.
+    @type sock: C{socket.socket}
+    @return: The request ID, code, text, and data, or C{None} if the
+        connection was closed.
+    @rtype: C{tuple}
+    """
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    rid, code, tlen, dlen = HEADER.unpack(header)
+    body = _recv_exactly(sock, tlen + dlen)
+    if body is None:
+        return None
+    return rid, code, body[:tlen].decode('utf-8'), body[tlen:]
+
+
+def write_frame(sock, rid, code, text=u'', data=b''):
+    """\
+    Write a frame to a socket.
+
+    @param sock: The socket.
+    @type sock: C{socket.socket}
+    @param rid: The request ID.
+    @type rid: C{int}
+    @param code: The response format index or response status.
+    @type code: C{int}
+    @param text: The command string or error message.
+    @type text: C{str}
+    @param data: The binary payload or result.
+    @type data: C{str}
+    """
+    text = text.encode('utf-8')
+    sock.sendall(HEADER.pack(rid, code, len(text), len(data)) + text + data)
+
+
+class ReadWriteLock(object):
+    """\
+    Lock allowing any number of concurrent readers or a single writer. Waiting
+    writers take precedence over new readers.
+    """
+    def __init__(self):
+        """\
+        Constructor.
+        """
+        self._condition = Condition(Lock())
+        self._readers = 0
+        self._writers = 0
+        self._writing = False
+
+    def acquire_read(self):
+        with self._condition:
+            while self._writing or self._writers:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        with self._condition:
+            self._writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers -= 1
+            self._writing = True
+
+    def release_write(self):
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+
+class CommandHandler(SocketServer.BaseRequestHandler):
+    """\
+    Handler for a command server client connection.
+    """
+    def handle(self):
+        while True:
+            try:
+                frame = read_frame(self.request)
+            except socket.error:
+                break
+            if frame is None:
+                break
+            rid, code, cmd, data = frame
+            try:
+                response = self.server.execute(cmd, FORMATS[code], data)
+            except IndexError:
+                status, text, result = ERROR, u'invalid request', b''
+            except CommandError as e:
+                status, text, result = ERROR, str(e), b''
+            else:
+                status, text, result = OK, u'', response or b''
+                if not isinstance(result, bytes):
+                    result = result.encode('utf-8')
+            try:
+                write_frame(self.request, rid, status, text, result)
+            except socket.error:
+                break
+
+
+class CommandServerMixIn(SocketServer.ThreadingMixIn):
+    """\
+    Command server mix-in (see L{command_server}).
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, experiment, address):
+        """\
+        Constructor.
+
+        @param experiment: The experiment.
+        @type experiment: L{adolphus.interface.Experiment}
+        @param address: The address to listen on.
+        @type address: C{tuple} or C{str}
+        """
+        self.experiment = experiment
+        self.server_class.__init__(self, address, CommandHandler)
+
+    def execute(self, cmd, response='pickle', data=''):
+        """\
+        Execute a command (the experiment holds its lock as a reader for a
+        read-only command or as a writer otherwise, see
+        L{adolphus.interface.Experiment.execute}).
+
+        @param cmd: The command string to execute.
+        @type cmd: C{str}
+        @param response: Response format for client (see commands.py).
+        @type response: C{str}
+        @param data: Binary payload for the command (see commands.py).
+        @type data: C{str}
+        @return: The return string of the command.
+        @rtype: C{str}
+        """
+        return self.experiment.execute(cmd, response=response, data=data)
+
+
+class TCPCommandServer(CommandServerMixIn, SocketServer.TCPServer):
+    server_class = SocketServer.TCPServer
+
+
+if hasattr(socket, 'AF_UNIX'):
+    class UnixCommandServer(CommandServerMixIn, SocketServer.UnixStreamServer):
+        server_class = SocketServer.UnixStreamServer
+
+
+def command_server(experiment, address):
+    """\
+    Create a command server for an experiment. Call C{serve_forever()} on the
+    server (usually in a separate thread) to start serving.
+
+    @param experiment: The experiment.
+    @type experiment: L{adolphus.interface.Experiment}
+    @param address: A C{(host, port)} tuple for TCP, or a path for a Unix
+        domain socket.
+    @type address: C{tuple} or C{str}
+    @return: The command server.
+    @rtype: L{TCPCommandServer} or L{UnixCommandServer}
+    """
+    if isinstance(address, tuple):
+        return TCPCommandServer(experiment, address)
+    return UnixCommandServer(experiment, address)
+
+
+class CommandClient(object):
+    """\
+    Command server client.
+    """
+    def __init__(self, address):
+        """\
+        Constructor.
+
+        @param address: A C{(host, port)} tuple for TCP, or a path for a Unix
+            domain socket.
+        @type address: C{tuple} or C{str}
+        """
+        if isinstance(address, tuple):
+            self.socket = socket.create_connection(address)
+        else:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(address)
+        self._ids = count(1)
+        self._received = []
+
+    def close(self):
+        """\
+        Close the connection.
+        """
+        self.socket.close()
+
+    def send(self, cmd, response='pickle', data=b''):
+        """\
+        Send a command without waiting for its result (see L{receive}).
+
+        @param cmd: The command string.
+        @type cmd: C{str}
+        @param response: Response format (see commands.py).
+        @type response: C{str}
+        @param data: Binary payload (optional).
+        @type data: C{str}
+        @return: The request ID.
+        @rtype: C{int}
+        """
+        rid = next(self._ids)
+        write_frame(self.socket, rid, FORMATS.index(response), cmd, data)
+        return rid
+
+    def receive(self):
+        """\
+        Receive the next response. Responses received (but not returned) by
+        L{execute} are returned first.
+
+        @return: The request ID and the return string of the command, or a
+            L{CommandError} if it failed.
+        @rtype: C{tuple}
+        """
+        if self._received:
+            return self._received.pop(0)
+        return self._receive()
+
+    def _receive(self):
+        """\
+        Receive the next response from the socket.
+
+        @return: The request ID and the return string of the command, or a
+            L{CommandError} if it failed.
+        @rtype: C{tuple}
+        """
+        frame = read_frame(self.socket)
+        if frame is None:
+            raise socket.error('connection closed')
+        rid, status, text, data = frame
+        if status == ERROR:
+            return rid, CommandError(text)
+        return rid, data
+
+    def execute(self, cmd, response='pickle', data=b''):
+        """\
+        Execute a command (cf. L{adolphus.interface.Experiment.execute}).
+        Responses to requests sent earlier (see L{send}) which arrive first are
+        kept for L{receive}.
+
+        @param cmd: The command string.
+        @type cmd: C{str}
+        @param response: Response format (see commands.py).
+        @type response: C{str}
+        @param data: Binary payload (optional).
+        @type data: C{str}
+        @return: The return string of the command.
+        @rtype: C{str}
+        """
+        rid = self.send(cmd, response, data)
+        while True:
+            rrid, result = self._receive()
+            if rrid == rid:
+                break
+            self._received.append((rrid, result))
+        if isinstance(result, CommandError):
+            raise result
+        return result
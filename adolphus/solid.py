@@ -8,8 +8,7 @@ Mesh polygon library for 3D model representation.
 """
 
 
-from math import pi
-from numpy import array
+from numpy import arange, array, asarray, dot, int64
 from collada import Collada, material, source, geometry, scene
 
 HYPERGRAPH_ENABLED = True
@@ -19,81 +18,275 @@ except ImportError:
     HYPGERGRAPH_ENABLED = False
 
 from .coverage import PointCache
-from .posable import SceneObject
-from .tensor import TriangleTensor
-from .visualization import VISUAL_ENABLED
-from .geometry import Point, DirectionalPoint, Pose, Triangle, avg_points
+from .arrays import read_raw, read_stl, read_obj, triangles_array, \
+    array_triangles, array_points, triangle_points, triangle_topology, \
+    pose_arrays
+from .meshcache import read_mesh, write_mesh, pack_lists, unpack_lists
+from .posable import SceneObject, TriangleSet
+from .tensor import TriangleTensor, triangle_tensor_arrays
+from .visualization import visual_module
+from .geometry import Point, Pose, Triangle
+
+
+class topology_attribute(object):
+    """\
+    Attribute of a L{RenderDynamic} model which is built from its topology
+    arrays on first access (see L{RenderDynamic.restore_topology}), and may be
+    assigned as usual.
+    """
+    def __init__(self, build):
+        """\
+        Constructor.
+
+        @param build: Method building the attribute from the topology arrays.
+        @type build: C{function}
+        """
+        self.build = build
+        self.__name__ = build.__name__
+        self.__doc__ = build.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.__name__] = self.build(instance)
+        return value
 
 
 class RenderDynamic(object):
     """\
     Render dynamic class.
     """
-    def __init__(self, triangles):
+    _topology = None
+    _sources = None
+    # Names of the arrays returned by topology_arrays.
+    _topology_names = ['vertices', 'normals', 'faces', 'face_vertices',
+        'edges', 'vertex_faces_o', 'vertex_faces_d', 'vertex_edges_o',
+        'vertex_edges_d', 'edge_faces_o', 'edge_faces_d']
+    # Attributes built from the topology arrays on demand.
+    _topology_attributes = ['vertices', 'normals', 'edges', 'faces',
+        'collada_indices', '_originals', '_face_sources', '_face_vertices',
+        '_edge_vertices', '_vertex_faces', '_vertex_edges', '_edge_faces',
+        '_edge_ids']
+
+    def __init__(self, triangles, topology=None):
         """\
         Constructor.
 
-        @param triangles: The list of triangles of the model.
+        @param triangles: The list of triangles of the model (if None, built
+            from the C{triangles} array of the topology arrays).
         @type triangles: C{list} of L{adolphus.geometry.Triangle}
+        @param topology: Precomputed topology arrays (optional).
+        @type topology: C{dict} of C{numpy.ndarray}
         """
-        self._originals = triangles
-        self.compute_topology()
+        if topology is None:
+            self._originals = triangles
+            self.compute_topology()
+        else:
+            self.restore_topology(topology, triangles)
 
     def compute_topology(self):
         """\
-        Compute the normals and the index list of this model.
+        Compute the normals, the index list, and the adjacency of this model.
+
+        The model is built as an indexed face set from the triangle array of
+        its base set of triangles at once (see
+        L{adolphus.arrays.triangle_topology}): coincident vertices and edges
+        are merged, and vertices, edges, and faces are identified by integer
+        indices, so that all adjacency queries are constant time.
         """
-        try:
-            del self._graph
-            del self.vertices
-            del self.edges
-            del self.faces
-            del self.normals
-            del self.collada_indices
-        except:
-            pass
-        self.vertices = []
-        self.edges = []
-        self.faces = []
-        self.normals = []
-        self.collada_indices = []
-        n = 0
-        stable = []
-        for item in self._originals:
+        triangles = self._originals
+        faces = triangles_array(triangles)
+        topology = triangle_topology(faces)
+        self.restore_topology(topology, triangles)
+        self._face_array = faces[topology['faces']]
+
+    def _clear_graph(self):
+        """\
+        Clear the topology graph and legacy adjacency lists of this model.
+        """
+        for attr in ['_graph', 'vertex_vertex', 'edge_face', 'face_vertex',
+                     'edge_vertex', 'face_edge']:
             try:
-                self.normals.append(item.normal())
-            except:
-                continue
-            stable.append(item)
-            j = 2
-            for i in [0,1,2]:
-                _edge = (item.vertices[i], item.vertices[j])
-                if _edge not in self.edges and \
-                    (item.vertices[j], item.vertices[i]) not in self.edges:
-                    self.edges.append(_edge)
-                if item.vertices[i] not in self.vertices:
-                    self.vertices.append(item.vertices[i])
-                j = i
-            for vertex in item.vertices:
-                self.collada_indices.append(self.vertices.index(vertex))
-                self.collada_indices.append(n)
-            n += 1
-        del self._originals
-        self._originals = stable
+                delattr(self, attr)
+            except AttributeError:
+                pass
+
+    def topology_arrays(self):
+        """\
+        Return the topology of this model as a set of arrays, from which it may
+        be restored without recomputation (see L{restore_topology}).
+
+        @return: The named topology arrays.
+        @rtype: C{dict} of C{numpy.ndarray}
+        """
+        if self._topology is not None:
+            return dict([(name, self._topology[name]) \
+                for name in self._topology_names])
+        arrays = {}
+        arrays['vertices'] = array([tuple(v) for v in self.vertices],
+            dtype=float).reshape(-1, 3)
+        arrays['normals'] = array([tuple(n) for n in self.normals],
+            dtype=float).reshape(-1, 3)
+        arrays['faces'] = array(self._face_sources, dtype=int64)
+        arrays['face_vertices'] = array(self._face_vertices,
+            dtype=int64).reshape(-1, 3)
+        arrays['edges'] = array(self._edge_vertices,
+            dtype=int64).reshape(-1, 2)
+        for name in ['vertex_faces', 'vertex_edges', 'edge_faces']:
+            arrays[name + '_o'], arrays[name + '_d'] = \
+                pack_lists(getattr(self, '_' + name))
+        return arrays
+
+    def restore_topology(self, arrays, triangles=None):
+        """\
+        Restore the topology of this model from a set of arrays computed by
+        L{topology_arrays} for the same base set of triangles.
+
+        The arrays (which may be memory mapped, see L{adolphus.meshcache}) are
+        kept as the backing store of this model, and the vertices, edges,
+        faces, and adjacency lists are only built from them when first
+        accessed.
+
+        @param arrays: The named topology arrays.
+        @type arrays: C{dict} of C{numpy.ndarray}
+        @param triangles: The base set of triangles (defaults to the
+            C{triangles} array, if any, or else the current base set).
+        @type triangles: C{list} of L{adolphus.geometry.Triangle}
+        """
+        if triangles is None and not 'triangles' in arrays:
+            triangles = self._originals
+        self._clear_graph()
+        for name in self._topology_attributes:
+            self.__dict__.pop(name, None)
+        self._topology = arrays
+        self._sources = triangles
+        self._vertex_ids = None
+        self._face_ids = None
+        self._face_array = None
+
+    def _source_triangles(self):
+        """\
+        Return the base set of triangles from which the topology arrays were
+        computed.
+
+        @return: The triangles.
+        @rtype: C{list} of L{adolphus.geometry.Triangle}
+        """
+        if self._sources is not None:
+            return self._sources
+        return array_triangles(self._topology['triangles'])
+
+    def _materialize(self):
+        """\
+        Build all attributes from the topology arrays, and release the arrays
+        (before modifying the model in place).
+        """
+        for name in self._topology_attributes:
+            getattr(self, name)
+        self._topology = None
+        self._sources = None
+
+    @topology_attribute
+    def vertices(self):
+        return [Point(*v) for v in self._topology['vertices'].tolist()]
+
+    @topology_attribute
+    def normals(self):
+        return [Point(*n) for n in self._topology['normals'].tolist()]
+
+    @topology_attribute
+    def _face_sources(self):
+        return self._topology['faces'].tolist()
+
+    @topology_attribute
+    def _originals(self):
+        sources = self._source_triangles()
+        return [sources[i] for i in self._face_sources]
+
+    @topology_attribute
+    def faces(self):
+        return self._originals
+
+    @topology_attribute
+    def _face_vertices(self):
+        return self._topology['face_vertices'].tolist()
+
+    @topology_attribute
+    def _edge_vertices(self):
+        return [tuple(e) for e in self._topology['edges'].tolist()]
+
+    @topology_attribute
+    def edges(self):
+        return [(self.vertices[a], self.vertices[b]) \
+            for a, b in self._edge_vertices]
+
+    @topology_attribute
+    def _vertex_faces(self):
+        return unpack_lists(self._topology['vertex_faces_o'],
+            self._topology['vertex_faces_d'])
+
+    @topology_attribute
+    def _vertex_edges(self):
+        return unpack_lists(self._topology['vertex_edges_o'],
+            self._topology['vertex_edges_d'])
+
+    @topology_attribute
+    def _edge_faces(self):
+        return unpack_lists(self._topology['edge_faces_o'],
+            self._topology['edge_faces_d'])
+
+    @topology_attribute
+    def _edge_ids(self):
+        return dict(zip([(min(a, b), max(a, b)) \
+            for a, b in self._edge_vertices], range(len(self._edge_vertices))))
+
+    @topology_attribute
+    def collada_indices(self):
+        indices = []
+        for n, ids in enumerate(self._face_vertices):
+            for v in ids:
+                indices.append(v)
+                indices.append(n)
+        return indices
+
+    def face_array(self):
+        """\
+        Return the faces of this model as a triangle array.
+
+        @return: The M{M x 3 x 3} triangle array.
+        @rtype: C{numpy.ndarray}
+        """
+        if self._face_array is None:
+            self._face_array = triangles_array(self.faces)
+        return self._face_array
+
+    def scale(self, value):
+        """\
+        Scale the model by a factor on its x, y, and z coordinates. Scaling does
+        not change the topology (or the normals), so only the vertex positions
+        are updated.
+
+        @param value: The scalar factor.
+        @type value: C{float}
+        """
+        if not value:
+            raise ValueError('scale factor must be nonzero')
+        self._clear_graph()
+        self._materialize()
+        # The face array may be a read-only view of the mesh cache.
+        faces = self._face_array = self.face_array() * value
+        self._originals = array_triangles(faces)
         self.faces = self._originals
+        self.vertices = [vertex * value for vertex in self.vertices]
+        self.edges = [(self.vertices[a], self.vertices[b]) \
+            for a, b in self._edge_vertices]
+        self._vertex_ids = None
+        self._face_ids = None
 
     def set_originals(self, triangles):
         """\
         Set the base set of triangles of this model
         """
-        try:
-            del self.vertex_vertex
-            del self.edge_face
-            del self.face_vertex
-            del self.edge_vertex
-            del self.face_edge
-        except:
-            pass
         self._originals = triangles
         self.compute_topology()
 
@@ -105,6 +298,38 @@ class RenderDynamic(object):
 
     originals = property(get_originals, set_originals)
 
+    def _vertex_id(self, vertex):
+        """\
+        Return the index of a vertex.
+
+        @param vertex: The vertex.
+        @type vertex: L{adolphus.geometry.Point}
+        @return: The index of the vertex.
+        @rtype: C{int}
+        """
+        if self._vertex_ids is None:
+            self._vertex_ids = dict(zip(self.vertices,
+                range(len(self.vertices))))
+        try:
+            return self._vertex_ids[vertex]
+        except KeyError:
+            raise ValueError('vertex not in model')
+
+    def _edge_id(self, edge):
+        """\
+        Return the index of an edge (in either orientation).
+
+        @param edge: The edge.
+        @type edge: C{tuple} of L{adolphus.geometry.Point}
+        @return: The index of the edge.
+        @rtype: C{int}
+        """
+        a, b = [self._vertex_id(vertex) for vertex in edge]
+        try:
+            return self._edge_ids[(min(a, b), max(a, b))]
+        except KeyError:
+            raise ValueError('edge not in model')
+
     def _build_graph(self):
         """\
         Build the topology graph of this object.
@@ -134,14 +359,8 @@ class RenderDynamic(object):
         """\
         Generate the vertex-vertex list.
         """
-        try:
-            del self.vertex_vertex
-        except:
-            pass
-        self.vertex_vertex = []
-        for vertex in self.vertices:
-            neighbors = self.graph.neighbors(vertex)
-            self.vertex_vertex.append([n for n in neighbors])
+        self.vertex_vertex = [self.vertex_neighbors(vertex) \
+            for vertex in self.vertices]
 
     def vertex_neighbors(self, vertex):
         """\
@@ -152,29 +371,19 @@ class RenderDynamic(object):
         @return: The vertices around the given vertex.
         @rtype: C{list} of L{adolphus.geometry.Point}
         """
-        index = self.vertices.index(vertex)
-        try:
-            return self.vertex_vertex[index]
-        except:
-            self._vertex_vertex()
-            return self.vertex_neighbors(vertex)
+        index = self._vertex_id(vertex)
+        neighbors = []
+        for e in self._vertex_edges[index]:
+            a, b = self._edge_vertices[e]
+            if a != b:
+                neighbors.append(self.vertices[b if a == index else a])
+        return neighbors
 
     def _edge_face(self):
         """\
         Generate the edge-face list.
         """
-        try:
-            del self.edge_face
-        except:
-            pass
-        self.edge_face = []
-        for face in self.faces:
-            j = 2
-            edges = []
-            for i in [0,1,2]:
-                edges.append((face.vertices[i], face.vertices[j]))
-                j = i
-            self.edge_face.append(edges)
+        self.edge_face = [self.edges_of_face(face) for face in self.faces]
 
     def edges_of_face(self, face):
         """\
@@ -185,28 +394,21 @@ class RenderDynamic(object):
         @return: The edges of the given face.
         @rtype: C{list} of C{tuple} of L{adolphus.geometry.Point}
         """
-        index = self.faces.index(face)
+        if self._face_ids is None:
+            self._face_ids = {}
+            for n, item in enumerate(self.faces):
+                self._face_ids.setdefault(item, n)
         try:
-            return self.edge_face[index]
-        except:
-            self._edge_face()
-            return self.edges_of_face(face)
+            v = self.faces[self._face_ids[face]].vertices
+        except KeyError:
+            raise ValueError('face not in model')
+        return [(v[0], v[2]), (v[1], v[0]), (v[2], v[1])]
 
     def _face_vertex(self):
         """\
         Generate the face-vertex list.
         """
-        try:
-            del self.face_vertex
-        except:
-            pass
-        self.face_vertex = []
-        for vertex in self.vertices:
-            faces = []
-            for i in range(len(self.faces)):
-                if vertex in self.faces[i].vertices:
-                    faces.append(i)
-            self.face_vertex.append(faces)
+        self.face_vertex = self._vertex_faces
 
     def faces_of_vertex(self, vertex):
         """\
@@ -217,25 +419,14 @@ class RenderDynamic(object):
         @return: The indices of the faces around a vertex.
         @rtype: C{list} of C{int}
         """
-        index = self.vertices.index(vertex)
-        try:
-            return self.face_vertex[index]
-        except:
-            self._face_vertex()
-            return self.faces_of_vertex(vertex)
+        return self._vertex_faces[self._vertex_id(vertex)]
 
     def _edge_vertex(self):
         """\
         Generate the edge-vertex list.
         """
-        try:
-            del self.edge_vertex
-        except:
-            pass
-        self.edge_vertex = []
-        for vertex in self.vertices:
-            self.edge_vertex.append([edge for edge in self.edges \
-                if vertex in edge])
+        self.edge_vertex = [self.edges_of_vertex(vertex) \
+            for vertex in self.vertices]
 
     def edges_of_vertex(self, vertex):
         """\
@@ -246,31 +437,14 @@ class RenderDynamic(object):
         @return: The edges around a vertex.
         @rtype: C{list} of C{tuple} of L{adolphus.geometry.Point}
         """
-        index = self.vertices.index(vertex)
-        try:
-            return self.edge_vertex[index]
-        except:
-            self._edge_vertex()
-            return self.edges_of_vertex(vertex)
+        return [self.edges[e] for e in \
+            self._vertex_edges[self._vertex_id(vertex)]]
 
     def _face_edge(self):
         """\
         Generate the face-edge list.
         """
-        try:
-            del self.face_edge
-        except:
-            pass
-        if not hasattr(self, 'edge_face'):
-            self._edge_face()
-        self.face_edge = []
-        for edge in self.edges:
-            faces = []
-            for i in range(len(self.edge_face)):
-                if edge in self.edge_face[i] or \
-                    (edge[1], edge[0]) in self.edge_face[i]:
-                    faces.append(i)
-            self.face_edge.append(faces)
+        self.face_edge = self._edge_faces
 
     def faces_of_edge(self, edge):
         """\
@@ -281,12 +455,7 @@ class RenderDynamic(object):
         @return: The indices of the faces of the edge.
         @rtype: C{list} of C{int}
         """
-        index = self.edges.index(edge)
-        try:
-            return self.face_edge[index]
-        except:
-            self._face_edge()
-            return self.faces_of_edge(edge)
+        return self._edge_faces[self._edge_id(edge)]
 
     def faces_of_face(self, index):
         """\
@@ -297,12 +466,10 @@ class RenderDynamic(object):
         @return: The indices of the faces that touch the given face.
         @rtype: C{list} of C{int}
         """
-        if not hasattr(self, 'face_vertex'):
-            self._face_vertex()
-        faces = []
-        for v in self.faces[index].vertices:
-            faces += self.faces_of_vertex(v)
-        return list(set(faces) - set([index]))
+        faces = set()
+        for v in self._face_vertices[index]:
+            faces.update(self._vertex_faces[v])
+        return list(faces - set([index]))
 
     def flook(self, a, b, c):
         """\
@@ -319,12 +486,10 @@ class RenderDynamic(object):
         @rtype: C{int}
         """
         assert(a!=b and b!=c and a!=c), "Invalid triangle."
-        if not hasattr(self, 'face_vertex'):
-            self._face_vertex()
         aa = set(self.faces_of_vertex(a))
         bb = set(self.faces_of_vertex(b))
         cc = set(self.faces_of_vertex(c))
-        tri = list(aa & bb & cc)
+        tri = sorted(aa & bb & cc)
         return tri[0] if tri else None
 
     def gen_render_dynamic(self):
@@ -344,12 +509,8 @@ class RenderDynamic(object):
         @return: The edges in the boundary of this model.
         @rtype: C{list} of C{tuple} of L{adolphus.geometry.Point}
         """
-        if not hasattr(self, 'face_edge'):
-            self._face_edge()
-        indices = [i for i in range(len(self.face_edge)) \
-            if len(self.face_edge[i]) == 1]
-        edges = [self.edges[i] for i in indices]
-        return edges
+        return [self.edges[i] for i in range(len(self.edges)) \
+            if len(self._edge_faces[i]) == 1]
 
     def remove_face(self, indices):
         """\
@@ -358,9 +519,9 @@ class RenderDynamic(object):
         @param indices: The indices of the faces to remove.
         @type indices: C{list} of C{int}
         """
-        faces = [self.faces[i] for i in indices]
-        for face in faces:
-            self.faces.pop(self.faces.index(face))
+        indices = set(indices)
+        self._originals = [face for i, face in enumerate(self.faces) \
+            if not i in indices]
         self.compute_topology()
         self.gen_render_dynamic()
 
@@ -372,7 +533,13 @@ class Solid(RenderDynamic, SceneObject):
     Refer to http://en.wikipedia.org/wiki/Polygon_mesh for a description
     of render dynamic.
     """
-    def __init__(self, file, name, pose=Pose(), mount_pose=Pose(), mount=None):
+    _triangle_tensors = None
+    _triangle_list = None
+    _tensor_arrays = None
+    _topology_attributes = RenderDynamic._topology_attributes + ['_triangles']
+
+    def __init__(self, file, name, pose=Pose(), mount_pose=Pose(), mount=None,
+                 cache=True):
         """\
         Constructor.
 
@@ -386,107 +553,268 @@ class Solid(RenderDynamic, SceneObject):
         @type mount_pose: L{Pose}
         @param mount: Mount for this object (optional).
         @type mount: C{object}
+        @param cache: Use the binary mesh cache (see L{adolphus.meshcache}).
+        @type cache: C{bool}
         """
         self._single = PointCache()
         self._single_c = False
-        if file[-4:] == '.raw':
-            self._import_raw(file)
-        elif file[-4:] == '.dae':
-            self._import_dae(file)
+        self._single_reverse = False
+        topology = cache and read_mesh(file) or None
+        if topology is None:
+            if file[-4:] == '.raw':
+                triangles = self._import_raw(file)
+            elif file[-4:] == '.dae':
+                triangles = self._import_dae(file)
+            elif file[-4:].lower() == '.stl':
+                triangles = self._import_stl(file)
+            elif file[-4:].lower() == '.obj':
+                triangles = self._import_obj(file)
+            else:
+                raise Exception("File format not supported.")
+            topology = triangle_topology(triangles)
+            topology['triangles'] = triangles.reshape(-1, 9)
+            if cache:
+                write_mesh(file, topology)
+        # The triangles and the mesh are built from the topology arrays on
+        # demand.
+        RenderDynamic.__init__(self, None, topology)
+        self._set_face_array(topology)
+
+        # Initialize this class' interface with Adolphus. The triangle tensors
+        # are built on first access (see triangles).
+        SceneObject.__init__(self, name, pose=pose, mount_pose=mount_pose, \
+            mount=mount, primitives=[])
+        self._triangles_view = False
+        if visual_module():
+            self.visualize()
+
+    def _set_face_array(self, topology):
+        """\
+        Set the face array from the topology arrays. If every triangle is a
+        face, the (possibly memory mapped) triangle array is shared.
+
+        @param topology: The named topology arrays.
+        @type topology: C{dict} of C{numpy.ndarray}
+        """
+        triangles = topology['triangles'].reshape(-1, 3, 3)
+        if len(topology['faces']) == len(triangles):
+            self._face_array = triangles
         else:
-            raise Exception("File format not supported.")
+            self._face_array = triangles[topology['faces']]
 
-        RenderDynamic.__init__(self, self._triangles)
+    @topology_attribute
+    def _triangles(self):
+        return array_triangles(self._topology['triangles'])
 
-        # Initialize this class' interface with Adolphus.
-        occ_triangle = []
-        for triangle in self.faces:
-            occ_triangle.append(TriangleTensor(triangle.vertices, Pose(), None))
-        SceneObject.__init__(self, name, pose=pose, mount_pose=mount_pose, \
-            mount=mount, primitives=[], triangles=occ_triangle)
-        if VISUAL_ENABLED:
-            self.visualize()
+    def _source_triangles(self):
+        return self._triangles
 
     def __del__(self):
-        for triangle in self.triangles:
+        for triangle in self._triangle_tensors or []:
             triangle.visible = False
 
+    # Attributes rebuilt from the topology arrays on unpickling.
+    _derived = ['vertices', 'edges', 'normals', 'faces', 'collada_indices',
+        '_originals', '_triangles', '_vertex_ids', '_edge_ids', '_face_ids',
+        '_face_array', '_edge_vertices', '_face_vertices', '_vertex_faces',
+        '_vertex_edges', '_edge_faces', '_face_sources', '_graph',
+        'vertex_vertex', 'edge_face', 'face_vertex', 'edge_vertex',
+        'face_edge', '_triangle_tensors', '_triangle_list', '_tensor_arrays',
+        '_single',
+        '_topology', '_sources']
+
+    def __getstate__(self):
+        """\
+        Return the state of this model for pickling. The mesh is stored as its
+        topology arrays (see L{topology_arrays}) rather than as objects, and the
+        triangle tensors are rebuilt on demand.
+
+        @return: The state.
+        @rtype: C{dict}
+        """
+        state = SceneObject.__getstate__(self)
+        topology = dict([(name, asarray(a)) \
+            for name, a in self.topology_arrays().items()])
+        topology['triangles'] = asarray(self.face_array()).reshape(-1, 9)
+        topology['faces'] = arange(len(self.faces), dtype=int64)
+        for attr in self._derived:
+            state.pop(attr, None)
+        pose, mount_pose, mount, children = state['_posable']
+        state['_posable'] = (pose, mount_pose, mount,
+            children - (self._triangle_tensors or set()))
+        state['_single_c'] = False
+        state['_topology'] = topology
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        topology = state.pop('_topology')
+        SceneObject.__setstate__(self, state)
+        self._single = PointCache()
+        RenderDynamic.__init__(self, None, topology)
+        self._face_array = topology['triangles'].reshape(-1, 3, 3)
+
+    @property
+    def triangles(self):
+        """\
+        The opaque triangles (triangle tensors) of this model. These are built
+        in bulk from the face array on first access; where only their tensors
+        or their vertices are needed, L{tensor_arrays} and L{local_occluders}
+        avoid building them at all.
+        """
+        self._build_triangles()
+        return self._triangle_tensors
+
+    def _build_triangles(self):
+        """\
+        Build the triangle tensors of this model (in face order), unless built
+        already.
+        """
+        if self._triangle_tensors is None:
+            self._triangle_list = TriangleTensor.from_array(self.face_array(),
+                mount=self)
+            self._triangle_tensors = TriangleSet(self, self._triangle_list)
+
+    def _faces_occlude(self):
+        """\
+        Return whether the occluders of this model are its faces, i.e. the
+        occluders are not simplified and the triangles have not been modified.
+
+        @rtype: C{bool}
+        """
+        return self._occluders is None and (self._triangle_tensors is None \
+            or not self._triangle_tensors.version)
+
+    def occluder_list(self):
+        """\
+        Return the occluding triangles of this model as an ordered list (see
+        L{SceneObject.occluder_list}), in face order if they are its faces.
+
+        @return: The occluding triangles.
+        @rtype: C{list} of L{TriangleTensor}
+        """
+        if self._faces_occlude():
+            self._build_triangles()
+            return self._triangle_list
+        return SceneObject.occluder_list(self)
+
+    def local_occluders(self):
+        """\
+        Return the occluding triangles of this model in its own coordinate frame
+        (see L{SceneObject.local_occluders}). If they are its faces, this is the
+        face array, and the triangle tensors are not built.
+
+        @return: The M{M x 3 x 3} triangle array (read-only).
+        @rtype: C{numpy.ndarray}
+        """
+        if not self._faces_occlude():
+            return SceneObject.local_occluders(self)
+        if self._local_occluders is None:
+            self._local_occluders = self.face_array().view()
+            self._local_occluders.flags.writeable = False
+        return self._local_occluders
+
+    def tensor_arrays(self):
+        """\
+        Return the centres and tensor matrices of the triangle tensors of this
+        model (in the wcs), computed at once from the face array.
+
+        @return: The M{M x 3} array of centres and the M{M x 3 x 3} array of
+            tensor matrices.
+        @rtype: C{tuple} of C{numpy.ndarray}
+        """
+        if self._tensor_arrays is None:
+            self._tensor_arrays = triangle_tensor_arrays(self.face_array())
+        centres, stack = self._tensor_arrays
+        R, T = pose_arrays(self.pose)
+        return dot(centres, R.T) + T, dot(R, stack).transpose(1, 0, 2)
+
     def _import_raw(self, file):
         """\
         Import a raw triangulated mesh.
+
+        @return: The M{M x 9} triangle array.
+        @rtype: C{numpy.ndarray}
+        """
+        return read_raw(file)
+
+    def _import_stl(self, file):
+        """\
+        Import a binary or ASCII STL mesh.
+
+        @return: The M{M x 9} triangle array.
+        @rtype: C{numpy.ndarray}
         """
-        self._triangles = []
-        with open(file, 'r') as f:
-            for line in f.readlines():
-                if line[-2] == "\r":
-                    line = line[:-2].split(' ')
-                else:
-                    line = line[:-1].split(' ')
-                if line[-1] == '':
-                    line = line[:-1]
-                num = []
-                for item in line:
-                    num.append(float(item))
-                points = [Point(num[0], num[1], num[2]), \
-                          Point(num[3], num[4], num[5]), \
-                          Point(num[6], num[7], num[8])]
-                self._triangles.append(Triangle(*points))
+        return read_stl(file)
+
+    def _import_obj(self, file):
+        """\
+        Import a Wavefront OBJ mesh.
+
+        @return: The M{M x 9} triangle array.
+        @rtype: C{numpy.ndarray}
+        """
+        return read_obj(file)
 
     def _import_dae(self, file):
         """\
         Import a collada object.
+
+        @return: The M{M x 9} triangle array.
+        @rtype: C{numpy.ndarray}
         """
         solid = Collada(file)
-        self._triangles = []
+        triangles = []
         for geometry in solid.geometries:
             for triangle_set in geometry.primitives:
                 for triangle in triangle_set:
                     v = triangle.vertices
-                    try:
-                        points = [Point(v[0][0], v[0][1], v[0][2]), \
-                                  Point(v[1][0], v[1][1], v[1][2]), \
-                                  Point(v[2][0], v[2][1], v[2][2])]
-                        self._triangles.append(Triangle(*points))
-                    except IndexError:
-                        pass
+                    if len(v) >= 3:
+                        triangles.append([tuple(v[i][:3]) for i in range(3)])
+        return array(triangles, dtype=float).reshape(-1, 9)
 
     def scale(self, value):
         """\
-        Scale the model by a factor on its x, y, and z coordinates.
+        Scale the model by a factor on its x, y, and z coordinates. The mesh and
+        the occluding triangles are scaled in place.
 
         @param value: The scalar factor.
         @type value: C{float}
         """
-        new_triangles = []
-        for triangle in self._triangles:
-            new_triangles.append(Triangle(*[p * value for p in triangle.vertices]))
-        del self._triangles
-        self._triangles = new_triangles
-        self.originals = new_triangles
+        RenderDynamic.scale(self, value)
+        faces = dict(zip(self._face_sources, self.faces))
+        self._triangles = [faces[i] if i in faces \
+            else Triangle(*[p * value for p in triangle.vertices]) \
+            for i, triangle in enumerate(self._triangles)]
         self._single_c = False
+        self._tensor_arrays = None
+        for triangle in self._triangle_tensors or []:
+            triangle.scale(value)
+        if self._occluders is not None:
+            for triangle in self._occluders:
+                triangle.scale(value)
+        self.occluders_changed()
+
+    def local_triangles(self):
+        """\
+        Return the faces of this model in its own coordinate frame.
 
-        # Update visualization by re-drawing the triangles.
-        try:
-            for triangle in self.triangles:
-                triangle.visible = False
-        except:
-            pass
-        del self.triangles
-        occ_triangle = []
-        for triangle in self.faces:
-            occ_triangle.append(TriangleTensor(triangle.vertices, Pose(), None))
-        try:
-            self.triangles = set()
-        except AttributeError:
-            # Child class handles triangles separately.
-            pass
-        else:
-            for triangle in occ_triangle:
-                triangle.mount = self
-                self.triangles.add(triangle)
-            self._triangles_view = False
-        if VISUAL_ENABLED:
-            self.visualize()
+        @return: The M{M x 3 x 3} triangle array.
+        @rtype: C{numpy.ndarray}
+        """
+        return self.face_array().copy()
+
+    def single_array(self, reverse=False):
+        """\
+        Reduce the number of points per triangle to one, as a point array (see
+        L{single}).
+
+        @param reverse: If true, reverse the orientation of the faces.
+        @type reverse: C{bool}
+        @return: The M{M x 5} point array.
+        @rtype: C{numpy.ndarray}
+        """
+        return triangle_points(self.face_array(), reverse)
 
     def single(self, reverse=False):
         """\
@@ -498,20 +826,13 @@ class Solid(RenderDynamic, SceneObject):
         @return: The list of points in the model.
         @rtype: C{list} of L{adolphus.geometry.DirectionalPoint}
         """
-        if self._single_c:
-            return self._single
-        else:
+        if not self._single_c or self._single_reverse != reverse:
             del self._single
-            self._single = PointCache()
-            for triangle in self.faces:
-                average = avg_points(triangle.vertices)
-                angles = triangle.normal_angles()
-                if reverse:
-                    angles = [angles[0]-pi, angles[1]]
-                self._single[DirectionalPoint(average.x, average.y, average.z, \
-                    angles[0], angles[1])] = 1.0
+            self._single = PointCache.fromkeys(\
+                array_points(self.single_array(reverse)), 1.0)
+            self._single_reverse = reverse
             self._single_c = True
-            return self._single
+        return self._single
 
     def _save_raw(self, name):
         """\
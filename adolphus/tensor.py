@@ -9,19 +9,85 @@ between tensors. The base Tensor class is implemented as an m x n matrix.
 """
 
 import numpy as np
-from array import array
-from numbers import Number
+from numbers import Number, Integral
 from math import pi, sqrt, sin, cos, atan2
 
 
-from .visualization import VISUAL_ENABLED
+from .visualization import load_visual, visual_module
 from .posable import OcclusionTriangle, SceneObject
 from .geometry import point_segment_dis, avg_points
 from .coverage import PointCache, Task, Camera, Model
 from .geometry import Angle, Point, DirectionalPoint, Rotation, Pose
+from .arrays import unit_vectors, direction_angles, triangles_array, occluded
 
-if VISUAL_ENABLED:
-    import visual
+# Column signs of a negated tensor (the 'y' axis is unaffected).
+NEG_AXES = np.array([-1.0, -1.0, 1.0])
+
+
+def stack_tensors(tensors):
+    """\
+    Stack a sequence of tensors of the same size into an array.
+
+    @param tensors: The tensors.
+    @type tensors: C{list} of L{Tensor}
+    @return: The M{N x m x n} array of tensor matrices.
+    @rtype: C{numpy.ndarray}
+    """
+    return np.array([t.array for t in tensors], dtype=float)
+
+
+def unit_stack(stack):
+    """\
+    Normalize each of a stacked array of tensors (cf. L{Tensor.unit}).
+
+    @param stack: The M{N x 3 x 3} array of tensor matrices.
+    @type stack: C{numpy.ndarray}
+    @return: The normalized tensor matrices.
+    @rtype: C{numpy.ndarray}
+    """
+    norms = np.sqrt((stack ** 2).sum(axis=1))
+    if not norms.all():
+        raise ValueError('cannot normalize a zero vector')
+    return stack / norms[:, np.newaxis, :]
+
+
+def neg_stack(stack):
+    """\
+    Negate each of a stacked array of tensors (cf. L{Tensor.__neg__}).
+
+    @param stack: The M{N x 3 x 3} array of tensor matrices.
+    @type stack: C{numpy.ndarray}
+    @return: The negated tensor matrices.
+    @rtype: C{numpy.ndarray}
+    """
+    return stack * NEG_AXES
+
+
+def triangle_tensor_arrays(triangles):
+    """\
+    Compute the centres and tensor matrices of an array of triangles at once
+    (cf. L{TriangleTensor}), in the frame of the triangles.
+
+    @param triangles: The M{M x 3 x 3} (or M{M x 9}) triangle array.
+    @type triangles: C{numpy.ndarray}
+    @return: The M{M x 3} array of centres and the M{M x 3 x 3} array of
+        tensor matrices.
+    @rtype: C{tuple} of C{numpy.ndarray}
+    """
+    triangles = np.asarray(triangles, dtype=float).reshape(-1, 3, 3)
+    centres = triangles.mean(axis=1)
+    vectors = triangles - centres[:, np.newaxis, :]
+    # Distances from the centre to the lines of the edges (cf.
+    # point_segment_dis).
+    edges = triangles[:, [1, 2, 2], :] - triangles[:, [0, 0, 1], :]
+    mag = (np.sqrt((np.cross(vectors[:, [0, 0, 1], :],
+        vectors[:, [1, 2, 2], :]) ** 2).sum(axis=2)) \
+        / np.sqrt((edges ** 2).sum(axis=2))).min(axis=1)
+    second = unit_vectors(vectors[:, 0, :])
+    first = unit_vectors(np.cross(second, unit_vectors(vectors[:, 1, :])))
+    third = unit_vectors(np.cross(second, first))
+    stack = np.array([first, second, third]).transpose(1, 2, 0)
+    return centres, stack * mag[:, np.newaxis, np.newaxis]
 
 
 class Tensor(object):
@@ -35,121 +101,71 @@ class Tensor(object):
         @param matrix: The n x n tensor matrix.
         @type matrix: C{list} of C{list}
         """
-        self._matrix = matrix
-        self._h = len(matrix)
-        if self._h == 0:
-            self._w = 0
-            vector = []
-        else:
-            try:
-                self._w = len(matrix[0])
-                if self._w == 0:
-                    self._h = 0
-                    vector = []
-                else:
-                    vector = []
-                    for row in matrix:
-                        assert len(row) == self._w, "All rows must have the " \
-                            + "same size."
-                        for col in row:
-                            assert isinstance(col, float) or isinstance(col, int), \
-                                "No valid type cast exists from " + \
-                                type(col).__name__ + " to \'float\'."
-                            vector.append(col)
-            except TypeError:
-                self._w = 1
-                for col in matrix:
-                    assert isinstance(col, float) or isinstance(col, int), \
-                        "No valid type cast exists from " + \
-                        type(col).__name__ + " to \'float\'."
-                vector = matrix
-        self._tensor = array('d', vector)
+        try:
+            tensor = np.array(matrix)
+        except ValueError:
+            tensor = None
+        assert tensor is not None and tensor.ndim <= 2 \
+            and tensor.dtype != object, "All rows must have the same size."
+        if tensor.size == 0:
+            tensor = np.zeros((0, 0))
+        elif tensor.ndim < 2:
+            tensor = tensor.reshape(-1, 1)
+        assert tensor.dtype.kind in 'biuf', "No valid type cast exists " + \
+            "from " + tensor.dtype.name + " to \'float\'."
+        self._tensor = tensor.astype(float)
 
     def __hash__(self):
         return hash(repr(self))
 
     def __reduce__(self):
-        return (Tensor, (self._matrix))
+        return (Tensor, (self.array.tolist(),))
+
+    @staticmethod
+    def _index_range(index, n, name):
+        """\
+        Resolve a single index or slice (with inclusive stop) against a
+        dimension of the tensor.
+
+        @param index: The index or slice.
+        @type index: C{int} or C{slice}
+        @param n: The size of the dimension.
+        @type n: C{int}
+        @param name: The name of the dimension (for error messages).
+        @type name: C{str}
+        @return: The first and last index, and whether the index is single.
+        @rtype: C{tuple}
+        """
+        if isinstance(index, slice):
+            bounds = [index.start, index.stop]
+            defaults = [0, n - 1]
+        elif isinstance(index, Integral):
+            bounds = [index]
+            defaults = [None]
+        else:
+            raise TypeError("Indices must be integers or slices.")
+        for k in range(len(bounds)):
+            if bounds[k] is None:
+                bounds[k] = defaults[k]
+            elif bounds[k] < 0 and bounds[k] >= -n:
+                bounds[k] += n
+            elif not (bounds[k] >= 0 and bounds[k] < n):
+                raise IndexError(name + " index out of range.")
+        return bounds[0], bounds[-1], len(bounds) == 1
 
     def __getitem__(self, val):
-        if type(val).__name__ == 'int' or type(val).__name__ == 'slice':
+        if not isinstance(val, tuple):
             raise IndexError("Two indices are required.")
-        if type(val).__name__ == 'tuple':
-            single_i = False
-            single_j = False
-            i, j = val
-            if type(i).__name__ == 'int':
-                single_i = True
-                if i < 0 and i >= -self._h:
-                    irange = [i + self._h]
-                elif i >= 0 and i < self._h:
-                    irange = [i]
-                else:
-                    raise IndexError("Row index out of range.")
-            elif type(i).__name__ == 'slice':
-                if i.start == None:
-                    i1 = 0
-                elif i.start < 0 and i.start >= -self._h:
-                    i1 = i.start + self._h
-                elif i.start >= 0 and i.start < self._h:
-                    i1 = i.start
-                else:
-                    raise IndexError("Row index out of range.")
-                if i.stop == None:
-                    i2 = -1 + self._h
-                elif i.stop < 0 and i.stop >= -self._h:
-                    i2 = i.stop + self._h
-                elif i.stop >= 0 and i.stop < self._h:
-                    i2 = i.stop
-                else:
-                    raise IndexError("Row index out of range.")
-                irange = [item for item in range(i1, i2 + 1)]
-            if type(j).__name__ == 'int':
-                single_j = True
-                if j < 0 and j >= -self._w:
-                    jrange = [j + self._w]
-                elif j >= 0 and j < self._w:
-                    jrange = [j]
-                else:
-                    raise IndexError("Column index out of range.")
-            elif type(j).__name__ == 'slice':
-                if j.start == None:
-                    j1 = 0
-                elif j.start < 0 and j.start >= -self._w:
-                    j1 = j.start + self._w
-                elif j.start >= 0 and j.start < self._w:
-                    j1 = j.start
-                else:
-                    raise IndexError("Column index out of range.")
-                if j.stop == None:
-                    j2 = -1 + self._w
-                elif j.stop < 0 and j.stop >= -self._w:
-                    j2 = j.stop + self._w
-                elif j.stop >= 0 and j.stop < self._w:
-                    j2 = j.stop
-                else:
-                    raise IndexError("Column index out of range.")
-                jrange = [item for item in range(j1, j2 + 1)]
+        tensor = self.array
+        i1, i2, single_i = self._index_range(val[0], tensor.shape[0], "Row")
+        j1, j2, single_j = self._index_range(val[1], tensor.shape[1], "Column")
         if single_i and single_j:
-            return self._tensor.__getitem__((i * self._w) + j)
-        out = []
-        for i in irange:
-            row = []
-            for j in jrange:
-                row.append(self._tensor.__getitem__((i * self._w) + j))
-            out.append(row)
-        return out
+            return float(tensor[i1, j1])
+        return tensor[i1:i2 + 1, j1:j2 + 1].tolist()
 
     def __richcmp__(self, t, o):
-        h1, w1 = self.size
-        h2, w2 = t.size
-        assert h1 == h2 and w1 == w2, "Both tensors must be of the same size."
-        eq = True
-        for i in range(h1):
-            for j in range(w1):
-                if abs(self[i,j] - t[i,j]) > 1e-9:
-                    eq = False
-                    break
+        assert self.size == t.size, "Both tensors must be of the same size."
+        eq = not (np.abs(self.array - t.array) > 1e-9).any()
         if o == 2:
             return eq
         if o == 3:
@@ -164,55 +180,36 @@ class Tensor(object):
         @return: Negated tensor.
         @rtype: L{Tensor}
         """
-        n_matrix = [[-self[0,0], -self[0,1], self[0,2]], \
-                    [-self[1,0], -self[1,1], self[1,2]], \
-                    [-self[2,0], -self[2,1], self[2,2]]]
-        return Tensor(n_matrix)
+        return Tensor(self.array * NEG_AXES)
 
     def __repr__(self):
         """\
         Canonical string representation.
         """
-        line = type(self).__name__ + "(["
-        for i in range(self._h):
-            line += "["
-            for j in range(self._w):
-                if j < self._h - 1:
-                    line += str(self._tensor.__getitem__((i * self._w) + j)) + ", "
-                elif j == self._h - 1:
-                    line += str(self._tensor.__getitem__((i * self._w) + j))
-            if i < self._w - 1:
-                line += "],\n        "
-            elif i == self._w - 1:
-                line += "]"
-        line += "])"
-        return line
+        return type(self).__name__ + "([" + ",\n        ".join(["[" + \
+            ", ".join([str(col) for col in row]) + "]" \
+            for row in self.array.tolist()]) + "])"
 
     def __str__(self):
         """\
         String representation, displays in a tuple format.
         """
-        line = "(["
-        for i in range(self._h):
-            line += "["
-            for j in range(self._w):
-                if j < self._h - 1:
-                    line += str(self._tensor.__getitem__((i * self._w) + j)) + ", "
-                elif j == self._h - 1:
-                    line += str(self._tensor.__getitem__((i * self._w) + j))
-            if i < self._w - 1:
-                line += "],\n  "
-            elif i == self._w - 1:
-                line += "]"
-        line += "])"
-        return line
+        return "([" + ",\n  ".join(["[" + ", ".join([str(col) for col in row]) \
+            + "]" for row in self.array.tolist()]) + "])"
 
     @property
     def size(self):
         """\
         Return a tuple containing the height and width of the Tensor.
         """
-        return (self._h, self._w)
+        return self.array.shape
+
+    @property
+    def array(self):
+        """\
+        The tensor matrix as an array.
+        """
+        return self._tensor
 
     def unit(self):
         """\
@@ -222,13 +219,7 @@ class Tensor(object):
         @return: Normalized tensor.
         @rtype: L{Tensor}
         """
-        axis1 = Point(self[0,0], self[1,0], self[2,0]).unit()
-        axis2 = Point(self[0,1], self[1,1], self[2,1]).unit()
-        axis3 = Point(self[0,2], self[1,2], self[2,2]).unit()
-        matrix = [[axis1.x, axis2.x, axis3.x], \
-                  [axis1.y, axis2.y, axis3.y], \
-                  [axis1.z, axis2.z, axis3.z]]
-        return Tensor(matrix)
+        return Tensor(unit_stack(self.array[np.newaxis])[0])
 
     def schatten(self):
         """\
@@ -237,10 +228,7 @@ class Tensor(object):
         @return: The schatten norm.
         @rtype: L{float}
         """
-        lambda1 = Point(self[0,0], self[1,0], self[2,0]).magnitude()
-        lambda2 = Point(self[0,1], self[1,1], self[2,1]).magnitude()
-        lambda3 = Point(self[0,2], self[1,2], self[2,2]).magnitude()
-        return sqrt(lambda1**2 + lambda2**2 + lambda3**2)
+        return sqrt((self.array ** 2).sum())
 
     def frobenius(self, t):
         """\
@@ -251,14 +239,22 @@ class Tensor(object):
         @return: Frobenius based distance.
         @rtype: C{float}
         """
-        h1, w1 = self.size
-        h2, w2 = t.size
-        assert h1 == h2 and w1 == w2, "Both tensors must be of the same size."
-        distance = 0
-        for i in range(h1):
-            for j in range(w1):
-                distance += (t[i,j] - self[i,j]) ** 2
-        return sqrt(distance)
+        assert self.size == t.size, "Both tensors must be of the same size."
+        return sqrt(((t.array - self.array) ** 2).sum())
+
+    def frobenius_array(self, stack):
+        """\
+        Compute the Frobenius distances from this tensor to a stacked array of
+        tensors (see L{stack_tensors}).
+
+        @param stack: The M{N x m x n} array of tensor matrices.
+        @type stack: C{numpy.ndarray}
+        @return: Frobenius based distances.
+        @rtype: C{numpy.ndarray}
+        """
+        assert stack.shape[1:] == self.size, \
+            "Both tensors must be of the same size."
+        return np.sqrt(((stack - self.array) ** 2).sum(axis=2).sum(axis=1))
 
 
 class CameraTensor(Camera, Tensor):
@@ -273,6 +269,9 @@ class CameraTensor(Camera, Tensor):
                 'angle_max': [pi / 2.0] * 2}
     param_keys = ['A', 'dim', 'f', 'o', 's', 'zS']
 
+    # Identity hash (the tensor changes with the camera).
+    __hash__ = object.__hash__
+
     def __init__(self, task_params, name, params, pose=Pose(), mount_pose=Pose(), \
                  mount=None, primitives=list(), triangles=list()):
         """\
@@ -295,6 +294,7 @@ class CameraTensor(Camera, Tensor):
         @param triangles: The opaque triangles of this camera (optional).
         @type triangles: C{list} of L{OcclusionTriangle}
         """
+        self._tensor_c = False
         # Set the task parameters.
         self.task_params = self.defaults
         for param in task_params:
@@ -311,8 +311,7 @@ class CameraTensor(Camera, Tensor):
             self._params[param] = value
         Camera.__init__(self, name, self._params, pose, mount_pose, mount, \
                         primitives, triangles)
-        Tensor.__init__(self, self._get_tensor_matrix(self.task_params))
-        if VISUAL_ENABLED:
+        if visual_module():
             self.visualize()
 
     def setparam(self, param, value):
@@ -325,30 +324,25 @@ class CameraTensor(Camera, Tensor):
         @type value: C{float} or C{list} of C{float}
         """
         Camera.setparam(self, param, value)
-        tensor_matrix = self._get_tensor_matrix(self.task_params)
-        Tensor.__init__(self, tensor_matrix)
-
-    def set_absolute_pose(self, value):
-        Camera.set_absolute_pose(self, value)
-        tensor_matrix = self._get_tensor_matrix(self.task_params)
-        Tensor.__init__(self, tensor_matrix)
-
-    absolute_pose = property(Camera.get_absolute_pose, set_absolute_pose)
-    pose = absolute_pose
-
-    def set_relative_pose(self, value):
-        Camera.set_relative_pose(self, value)
-        tensor_matrix = self._get_tensor_matrix(self.task_params)
-        Tensor.__init__(self, tensor_matrix)
-
-    relative_pose = property(Camera.get_relative_pose, set_relative_pose)
+        self._tensor_c = False
 
-    def set_mount(self, value):
-        Camera.set_mount(self, value)
-        tensor_matrix = self._get_tensor_matrix(self.task_params)
-        Tensor.__init__(self, tensor_matrix)
+    def _update_tensor(self):
+        """\
+        Recompute the tensor matrix if the camera parameters or pose have
+        changed since it was last computed.
+        """
+        generation = self.generation()
+        if self._tensor_c != generation:
+            Tensor.__init__(self, self._get_tensor_matrix(self.task_params))
+            self._tensor_c = generation
 
-    mount = property(Camera.get_mount, set_mount)
+    @property
+    def array(self):
+        """\
+        The tensor matrix as an array.
+        """
+        self._update_tensor()
+        return self._tensor
 
     def _get_tensor_matrix(self, task_params):
         """\
@@ -396,6 +390,7 @@ class CameraTensor(Camera, Tensor):
             [{'type': 'curve', 'color': (1, 0, 0),
             'pos': [hull[i], hull[i + 4]]} for i in range(4)]
         # Include the orthogonal basis for the Camera Tensor.
+        visual = load_visual()
         for i in range(len(hull)):
             hull[i] = Point(*hull[i])
         centre_c = avg_points(hull)
@@ -416,6 +411,7 @@ class CameraTensor(Camera, Tensor):
         """\
         Return the location in the wcs of this camera's tensor.
         """
+        self._update_tensor()
         return self._frustum_centre
 
     @property
@@ -423,7 +419,7 @@ class CameraTensor(Camera, Tensor):
         """\
         Return the coordinates of this camera's optical axis in the camera's frame.
         """
-        return Point(self[0,0], self[1,0], self[2,0])
+        return Point(*self.array[:, 0].tolist())
 
     def vision_distance(self, other):
         """
@@ -442,6 +438,24 @@ class CameraTensor(Camera, Tensor):
         except ZeroDivisionError:
             return -1
 
+    def vision_distance_array(self, centres, stack):
+        """\
+        Compute the vision distances (see L{vision_distance}) from this tensor
+        to a stacked array of tensors.
+
+        @param centres: The M{N x 3} array of tensor centres (in the wcs).
+        @type centres: C{numpy.ndarray}
+        @param stack: The M{N x 3 x 3} array of tensor matrices.
+        @type stack: C{numpy.ndarray}
+        @return: The distances.
+        @rtype: C{numpy.ndarray}
+        """
+        euc_dist = np.sqrt(((centres - tuple(self.centre)) ** 2).sum(axis=1))
+        frob_dis = self.unit().frobenius_array(neg_stack(unit_stack(stack)))
+        scale = 1 - (frob_dis / sqrt(8))
+        with np.errstate(divide='ignore'):
+            return np.where(scale == 0, -1, (1 / scale) * (euc_dist + 1e-4))
+
     def strength(self, triangle):
         """\
         Return the equivalent to the coverage strength for a triangle tensor.
@@ -459,11 +473,34 @@ class CameraTensor(Camera, Tensor):
         dr = 0 if rr < 0 else rr
         return sqrt(de * dr)
 
+    def strength_array(self, centres, axes):
+        """\
+        Return the equivalent to the coverage strength (see L{strength}) for an
+        array of triangle tensors.
+
+        @param centres: The M{N x 3} array of triangle tensor centres.
+        @type centres: C{numpy.ndarray}
+        @param axes: The M{N x 3} array of triangle tensor axes.
+        @type axes: C{numpy.ndarray}
+        @return: The vision distances scaled to the limits of the frustum.
+        @rtype: C{numpy.ndarray}
+        """
+        centre = np.array(tuple(self.centre))
+        axis = np.array(tuple(self.axis.unit()))
+        euc_dis = np.sqrt(((centres - centre) ** 2).sum(axis=1))
+        rot_dis = np.sqrt(((unit_vectors(axes) + axis) ** 2).sum(axis=1))
+        de = np.maximum(1 - euc_dis / self.schatten() ** 2, 0)
+        dr = np.maximum(1 - rot_dis / sqrt(2), 0)
+        return np.sqrt(de * dr)
+
 
 class TriangleTensor(OcclusionTriangle, Tensor):
     """\
     Triangle Tensor class.
     """
+    # Identity hash (the tensor changes with the triangle).
+    __hash__ = object.__hash__
+
     def __init__(self, vertices, pose=Pose(), mount=None):
         """\
         Constructor.
@@ -475,53 +512,43 @@ class TriangleTensor(OcclusionTriangle, Tensor):
         @param mount: The mount of the triangle (optional).
         @type mount: L{adolphus.posable.Posable}
         """
-        self._guide_c = False
         OcclusionTriangle.__init__(self, vertices, pose, mount)
-        Tensor.__init__(self, self._get_tensor_matrix(self.triangle.vertices))
-        if VISUAL_ENABLED:
-            self.visualize()
-
-    def set_absolute_pose(self, value):
-        OcclusionTriangle.set_absolute_pose(self, value)
-        tensor_matrix = self._get_tensor_matrix(self.triangle.vertices)
-        Tensor.__init__(self, tensor_matrix)
-        if self._guide_c:
-            self.toggle_tensor_vis()
-            self.toggle_tensor_vis()
 
-    absolute_pose = property(OcclusionTriangle.get_absolute_pose, set_absolute_pose)
-    pose = absolute_pose
-
-    def set_relative_pose(self, value):
-        OcclusionTriangle.set_relative_pose(self, value)
-        tensor_matrix = self._get_tensor_matrix(self.triangle.vertices)
-        Tensor.__init__(self, tensor_matrix)
-        if self._guide_c:
-            self.toggle_tensor_vis()
-            self.toggle_tensor_vis()
-
-    relative_pose = property(OcclusionTriangle.get_relative_pose, set_relative_pose)
+    def _init_planed(self, triangle, pose, mount):
+        """\
+        Initialize from the x-y mapped triangle and its relative pose (see
+        L{OcclusionTriangle._init_planed}).
 
-    def set_mount(self, value):
-        OcclusionTriangle.set_mount(self, value)
-        tensor_matrix = self._get_tensor_matrix(self.triangle.vertices)
-        Tensor.__init__(self, tensor_matrix)
-        if self._guide_c:
-            self.toggle_tensor_vis()
-            self.toggle_tensor_vis()
+        @param triangle: The x-y mapped triangle.
+        @type triangle: L{Triangle}
+        @param pose: The relative pose of the triangle.
+        @type pose: L{Pose}
+        @param mount: The mount of the triangle.
+        @type mount: L{adolphus.posable.Posable}
+        """
+        self._guide_c = False
+        self._tensor_c = False
+        OcclusionTriangle._init_planed(self, triangle, pose, mount)
+        if visual_module():
+            self.visualize()
 
-    mount = property(OcclusionTriangle.get_mount, set_mount)
+    def _update_tensor(self):
+        """\
+        Recompute the tensor matrix if the pose has changed since it was last
+        computed.
+        """
+        generation = self.generation()
+        if self._tensor_c != generation:
+            Tensor.__init__(self, self._get_tensor_matrix(self.triangle.vertices))
+            self._tensor_c = generation
 
-    def _pose_changed_hook(self):
+    @property
+    def array(self):
         """\
-        Hook called on pose change.
+        The tensor matrix as an array.
         """
-        OcclusionTriangle._pose_changed_hook(self)
-        tensor_matrix = self._get_tensor_matrix(self.triangle.vertices)
-        Tensor.__init__(self, tensor_matrix)
-        if self._guide_c:
-            self.toggle_tensor_vis()
-            self.toggle_tensor_vis()
+        self._update_tensor()
+        return self._tensor
 
     def _get_tensor_basis(self, vertices):
         """\
@@ -575,6 +602,7 @@ class TriangleTensor(OcclusionTriangle, Tensor):
         """\
         Return the location in the wcs of this triangle's tensor.
         """
+        self._update_tensor()
         return self._centre
 
     @property
@@ -583,7 +611,7 @@ class TriangleTensor(OcclusionTriangle, Tensor):
         Return the coordinates of this triangle's surface normal in the triangle's
         frame (with respecto to it's centre and not the fist vertex).
         """
-        return Point(self[0,0], self[1,0], self[2,0])
+        return Point(*self.array[:, 0].tolist())
 
     def toggle_tensor_vis(self):
         """\
@@ -592,8 +620,10 @@ class TriangleTensor(OcclusionTriangle, Tensor):
         if self._guide_c:
             self.guide.visible = False
             del self.guide
+            self.posecallbacks.pop('tensor_guide', None)
             self._guide_c = False
         else:
+            visual = load_visual()
             basis = self._get_tensor_basis(self.triangle.vertices)
             centre = avg_points(self.triangle.vertices)
             primitives = []
@@ -607,6 +637,14 @@ class TriangleTensor(OcclusionTriangle, Tensor):
             self.guide = SceneObject('guide', mount=self, primitives=primitives)
             self.guide.visualize()
             self._guide_c = True
+            self.posecallbacks['tensor_guide'] = self._redraw_guide
+
+    def _redraw_guide(self):
+        """\
+        Redraw the visualization of this tensor's basis on pose change.
+        """
+        self.toggle_tensor_vis()
+        self.toggle_tensor_vis()
 
 
 class TensorModel(Model):
@@ -659,6 +697,9 @@ class TensorModel(Model):
         Return the coverage model of this multi-camera network with respect to
         the points in a given task model.
 
+        The strength of every camera for every triangle is computed at once,
+        and occlusion is only checked where the strength is nonzero.
+
         @param object: The task model.
         @type object: L{adolphus.solid.Solid}
         @param subset: Subset of cameras (defaults to all active cameras).
@@ -666,20 +707,62 @@ class TensorModel(Model):
         @return: The coverage model.
         @rtype: L{PointCache}
         """
-        triangle_set = set()
-        for obj in self:
-            for t in self[obj].triangles:
-                triangle_set.add(t.triangle)
         coverage = PointCache()
-        for triangle in object.triangles:
-            p = triangle.centre
-            rho = triangle.axis.angle(Point(0, 0, 1))
-            eta = Angle(atan2(triangle.axis.y, triangle.axis.x))
-            point = DirectionalPoint(p.x, p.y, p.z, rho, eta)
+        for point, strength in self.coverage_stream(object, subset,
+            chunk=None):
             # Calculate coverage strength for each mapped task point.
-            coverage[point] = self.strength(triangle, triangle_set, subset)
+            coverage[point] = strength
         return coverage
 
+    def coverage_stream(self, object, subset=None, chunk=4096):
+        """\
+        Generator which yields the coverage strength of each triangle of a
+        given task model (cf. L{coverage}). The triangles are evaluated a chunk
+        at a time.
+
+        @param object: The task model.
+        @type object: L{adolphus.solid.Solid}
+        @param subset: Subset of cameras (defaults to all active cameras).
+        @type subset: C{set}
+        @param chunk: The number of triangles per chunk (if None, all at once).
+        @type chunk: C{int}
+        @return: Triangle centre point and coverage strength pair.
+        @rtype: L{DirectionalPoint}, C{float}
+        """
+        triangle_set = set()
+        for obj in self:
+            for t in self[obj].occluders:
+                triangle_set.add(t.triangle)
+        occluders = triangles_array(triangle_set)
+        try:
+            centres, stack = object.tensor_arrays()
+        except AttributeError:
+            triangles = list(object.triangles)
+            centres = np.array([tuple(t.centre) for t in triangles],
+                dtype=float).reshape(-1, 3)
+            stack = stack_tensors(triangles).reshape(-1, 3, 3)
+        axes = stack[:, :, 0]
+        rho, eta = direction_angles(unit_vectors(axes))
+        cameras = subset or self.active_cameras
+        views = list(self.views(subset=subset))
+        chunk = chunk or max(len(centres), 1)
+        for start in range(0, len(centres), chunk):
+            c, a = centres[start:start + chunk], axes[start:start + chunk]
+            strengths = {}
+            for camera in cameras:
+                strength = self[camera].strength_array(c, a)
+                indices = np.flatnonzero(strength)
+                strength[indices[occluded(occluders, self[camera].pose.T,
+                    c[indices])]] = 0.0
+                strengths[camera] = strength
+            maxstrength = np.zeros(len(c))
+            for view in views:
+                maxstrength = np.maximum(maxstrength,
+                    np.min([strengths[camera] for camera in view], axis=0))
+            for i in range(len(c)):
+                yield DirectionalPoint(c[i][0], c[i][1], c[i][2],
+                    rho[start + i], eta[start + i]), float(maxstrength[i])
+
     def performance(self, object, subset=None, coverage=None):
         """\
         Return the coverage performance of this multi-camera network with
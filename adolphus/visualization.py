@@ -10,11 +10,11 @@ Visualization helper module.
 import os
 from sys import platform as _platform
 
-VISUAL_ENABLED = True
-try:
-    from .sprite import Sprite
-except ImportError:
-    VISUAL_ENABLED = False
+# Visual and the sprite module are imported on first use (see load_visual), so
+# that headless use never imports them.
+VISUAL_ENABLED = False
+visual = None
+Sprite = None
 
 
 class VisualizationError(Exception):
@@ -22,30 +22,80 @@ class VisualizationError(Exception):
     pass
 
 
-if _platform == "darwin":
-    screen = os.popen("system_profiler SPDisplaysDataType | grep Resolution").readlines()[0]
-    screen = screen.split(':')[1][:-1].split('x')
-    width = float(screen[0][:-1])
-    height = float(screen[1][1:])
-elif _platform == "linux" or _platform == "linux2":
-    screen = os.popen("xdpyinfo  | grep 'dimensions:'").readlines()[0]
-    screen = screen.split(':')[1][:-1].split('x')
-    width = float(screen[0])
-    height = float(screen[1].split('p')[0])
-elif _platform == 'win32':
-    import ctypes
-    user32 = ctypes.windll.user32
-    width = float(user32.GetSystemMetrics(0))
-    height = float(user32.GetSystemMetrics(1))
-else:
-    width = 1280.0
-    height = 720.0
-
-# This relationship determines the appropiate text size for the
-# corresponsing screen aspect ratio. The relationship was calibrated
-# by testing several screen resolutions and text sizes.
-size = int(4.5**(width/height))
-VISUAL_SETTINGS = {'rate': 50, 'textsize': size, 'scale': 1.0}
+def load_visual():
+    """\
+    Import Visual and the sprite module, if not already imported. This is
+    deferred until a display or a visualization is first requested.
+
+    @return: The Visual module, or C{None} if it is not available.
+    @rtype: C{module}
+    """
+    global VISUAL_ENABLED, visual, Sprite
+    if not VISUAL_ENABLED:
+        try:
+            import visual as _visual
+            from .sprite import Sprite as _Sprite
+        except ImportError:
+            return None
+        visual, Sprite = _visual, _Sprite
+        VISUAL_ENABLED = True
+    return visual
+
+
+def visual_module():
+    """\
+    Return the Visual module if it has been imported (see L{load_visual}),
+    without importing it.
+
+    @return: The Visual module, or C{None}.
+    @rtype: C{module}
+    """
+    return visual
+
+
+def screen_size():
+    """\
+    Return the resolution of the screen, or a default if it cannot be
+    determined (e.g. on a headless system).
+
+    @return: The width and height of the screen.
+    @rtype: C{tuple} of C{float}
+    """
+    try:
+        if _platform == "darwin":
+            screen = os.popen("system_profiler SPDisplaysDataType | grep Resolution").readlines()[0]
+            screen = screen.split(':')[1][:-1].split('x')
+            return float(screen[0][:-1]), float(screen[1][1:])
+        elif _platform == "linux" or _platform == "linux2":
+            screen = os.popen("xdpyinfo 2>/dev/null | grep 'dimensions:'").readlines()[0]
+            screen = screen.split(':')[1][:-1].split('x')
+            return float(screen[0]), float(screen[1].split('p')[0])
+        elif _platform == 'win32':
+            import ctypes
+            user32 = ctypes.windll.user32
+            return float(user32.GetSystemMetrics(0)), \
+                float(user32.GetSystemMetrics(1))
+    except (IndexError, ValueError, OSError):
+        pass
+    return 1280.0, 720.0
+
+
+class VisualSettings(dict):
+    """\
+    Visualization settings dictionary. The text size is determined from the
+    screen resolution when first used, rather than at import.
+    """
+    def __missing__(self, key):
+        if key != 'textsize':
+            raise KeyError(key)
+        # This relationship determines the appropiate text size for the
+        # corresponsing screen aspect ratio. The relationship was calibrated
+        # by testing several screen resolutions and text sizes.
+        width, height = screen_size()
+        self['textsize'] = int(4.5**(width/height))
+        return self['textsize']
+
+VISUAL_SETTINGS = VisualSettings({'rate': 50, 'scale': 1.0})
 
 
 class Visualizable(object):
@@ -112,7 +162,7 @@ class Visualizable(object):
         Visualize this visualizable. Creates sprites in any "new" displays,
         and updates the visualization in all displays.
         """
-        if not VISUAL_ENABLED:
+        if not load_visual():
             raise VisualizationError('visual module not loaded')
         for display in self.displays:
             if display in self.actuals:
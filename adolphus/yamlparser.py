@@ -9,18 +9,24 @@ YAML parser module.
 
 import os
 import yaml
+import numpy as np
 from math import pi
 import pkg_resources
 from itertools import chain
-
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
 
 from .robot import Robot
 from .solid import Solid
 from .laser import RangeModel
 from .coverage import PointCache, Model
+from .scenecache import read_scene, write_scene
+from .arrays import read_triangles, array_points, merge_points
 from .tensor import CameraTensor, TensorModel
 from .posable import OcclusionTriangle, SceneObject
-from .geometry import Angle, Point, DirectionalPoint, Pose, Rotation, Quaternion
+from .geometry import Angle, Point, Pose, Rotation, Quaternion
 
 
 modeltypes = {'standard': Model, 'range': RangeModel, 'tensor': TensorModel}
@@ -29,6 +35,9 @@ modeltypes = {'standard': Model, 'range': RangeModel, 'tensor': TensorModel}
 class YAMLParser(object):
     """\
     YAML experiment parser class.
+
+    External files are loaded once per parser, and objects referencing the
+    same sprite share its parsed primitives and triangle geometry.
     """
     def __init__(self, filename):
         """\
@@ -39,7 +48,11 @@ class YAMLParser(object):
         """
         self._path = os.path.split(filename)[0]
         self._mounts = {}
-        experiment = yaml.load(open(filename))
+        self._files = [filename]
+        self._loaded = {}
+        self._primitives = {}
+        self._triangles = {}
+        experiment = self._load(filename)
         try:
             modeltype = modeltypes[experiment['type']]
         except KeyError:
@@ -57,11 +70,36 @@ class YAMLParser(object):
         """
         return self.model, self.tasks
 
-    @staticmethod
-    def _external_path(basepath, filename):
+    @property
+    def files(self):
+        """\
+        List of the files read for this experiment (the experiment file and all
+        external files referenced by it, directly or indirectly).
+        """
+        return list(self._files)
+
+    def _load(self, filename):
+        """\
+        Load a YAML file (using the libyaml loader if available). Files are
+        loaded once; the result is shared and must not be modified.
+
+        @param filename: The YAML file to load.
+        @type filename: C{str}
+        @return: The loaded YAML data.
+        @rtype: C{object}
+        """
+        try:
+            return self._loaded[filename]
+        except KeyError:
+            with open(filename, 'r') as f:
+                self._loaded[filename] = yaml.load(f, Loader=Loader)
+            return self._loaded[filename]
+
+    def _external_path(self, basepath, filename):
         """\
         Return the path to an external file specified inside another file.
         Defaults to searching the package resources if the file is not found.
+        The path is recorded in L{files}.
 
         @param basepath: The current base path context.
         @type basepath: C{str}
@@ -73,6 +111,7 @@ class YAMLParser(object):
         for path in [os.path.join(basepath, filename),
             pkg_resources.resource_filename(__name__, 'resources/' + filename)]:
             if os.path.exists(path):
+                self._files.append(path)
                 return path
         raise IOError('external file %s not found' % filename)
 
@@ -121,8 +160,18 @@ class YAMLParser(object):
         path = self._path
         if isinstance(sprite, str):
             sprite_file = self._external_path(path, sprite)
-            sprite = yaml.load(open(sprite_file, 'r'))
-            path = os.path.split(sprite_file)[0]
+            if not sprite_file in self._primitives:
+                sprite = self._load(sprite_file)
+                path = os.path.split(sprite_file)[0]
+                self._primitives[sprite_file] = [dict(primitive) \
+                    for primitive in sprite.get('primitives', [])]
+                for primitive in self._primitives[sprite_file]:
+                    if 'texture' in primitive:
+                        primitive['texture'] = self._external_path(path,
+                            primitive['texture'] + '.tga')
+            # Sprites modify their primitives (e.g. on highlighting).
+            return [dict(primitive) \
+                for primitive in self._primitives[sprite_file]]
         try:
             for primitive in sprite['primitives']:
                 if 'texture' in primitive:
@@ -145,21 +194,25 @@ class YAMLParser(object):
         """
         if isinstance(sprite, str):
             sprite_file = self._external_path(path, sprite)
-            sprite = yaml.load(open(sprite_file, 'r'))
-            path = os.path.split(sprite_file)[0]
+            if not sprite_file in self._triangles:
+                self._triangles[sprite_file] = self._parse_triangles(\
+                    self._load(sprite_file), os.path.split(sprite_file)[0])
+            return [triangle.copy() \
+                for triangle in self._triangles[sprite_file]]
         try:
             triangles = sprite['triangles']
             if isinstance(triangles, str):
-                # load from raw ASCII triangle mesh format
-                filename = triangles
-                triangles = []
-                with open(self._external_path(path, filename), 'r') as f:
-                    for line in f.readlines():
-                        triangles.append({'vertices': [[float(c) for c in \
-                        line.rstrip().split(' ')][i * 3:i * 3 + 3] \
-                        for i in range(3)]})
+                # load from triangle mesh file (raw ASCII, STL, or OBJ)
+                triangles_file = self._external_path(path, triangles)
+                if not triangles_file in self._triangles:
+                    self._triangles[triangles_file] = \
+                        OcclusionTriangle.from_array(\
+                        read_triangles(triangles_file))
+                return [triangle.copy() \
+                    for triangle in self._triangles[triangles_file]]
             parsed_triangles = []
             for triangle in triangles:
+                triangle = dict(triangle)
                 try:
                     triangle['pose'] = self._parse_pose(triangle['pose'])
                 except KeyError:
@@ -184,11 +237,14 @@ class YAMLParser(object):
         path = self._path
         if isinstance(robot, str):
             robot_file = self._external_path(path, robot)
-            robot = yaml.load(open(robot_file, 'r'))
+            robot = self._load(robot_file)
             path = os.path.split(robot_file)[0]
-        links = robot['links']
+        links = [dict(link) for link in robot['links']]
         for link in links:
             link['offset'] = self._parse_pose(link['offset'])
+            if 'primitives' in link:
+                link['primitives'] = \
+                    [dict(primitive) for primitive in link['primitives']]
             link['triangles'] = self._parse_triangles(link, path)
         return links
 
@@ -226,8 +282,8 @@ class YAMLParser(object):
                 if occlusion and 'sprites' in obj:
                     try:
                         file = obj['sprites'][0]['triangles']
-                        if (file[-4:] == '.raw' or file[-4:] == '.dae') and \
-                            objecttype == 'scene':
+                        if file[-4:].lower() in ['.raw', '.dae', '.stl',
+                            '.obj'] and objecttype == 'scene':
                             file = self._external_path(self._path, file)
                             _solid = True
                     except:
@@ -269,7 +325,9 @@ class YAMLParser(object):
     def _pointrange(xr, yr, zr, step, rhor=(0.0, pi), etar=(0.0, 2 * pi),
                     ddiv=None):
         """\
-        Generate discrete (directional) points in a range.
+        Generate discrete (directional) points in a range. Points are generated
+        by index on a grid (so that no error accumulates over the range), and
+        directions are combined with every position at once.
 
         @param xr: The range in the x direction.
         @type xr: C{tuple} of C{float}
@@ -281,38 +339,40 @@ class YAMLParser(object):
         @type step: C{float}
         @param ddiv: The fraction of pi for discrete direction angles.
         @type ddiv: C{int}
+        @return: The point array.
+        @rtype: C{numpy.ndarray}
         """
         def rangify(r):
             try:
                 return (r[0], r[1])
             except TypeError:
                 return (r, r)
-        xr = rangify(xr)
-        yr = rangify(yr)
-        zr = rangify(zr)
+        def steps(r, step, count):
+            return r[0] + np.arange(max(count, 0)) * step
+        ranges = [rangify(r) for r in (xr, yr, zr)]
+        counts = [int(np.floor((r[1] - r[0]) / float(step) + 1e-9)) + 1 \
+            for r in ranges]
+        if min(counts) < 1:
+            return np.zeros((0, 5 if ddiv else 3))
+        index = np.mgrid[0:counts[0], 0:counts[1], 0:counts[2]]
+        positions = index.reshape(3, -1).T * float(step) \
+            + [r[0] for r in ranges]
+        if not ddiv:
+            return positions
         rhor = rangify(rhor)
         etar = rangify(etar)
-        x, y, z = xr[0], yr[0], zr[0]
-        while x <= xr[1]:
-            while y <= yr[1]:
-                while z <= zr[1]:
-                    if ddiv:
-                        rho, eta = rhor[0], etar[0]
-                        while rho - rhor[1] < 1e-4 and rho - pi < 1e-4:
-                            if abs(rho) < 1e-4 or abs(rho - pi) < 1e-4:
-                                yield DirectionalPoint(x, y, z, rho, 0.0)
-                            else:
-                                while eta - etar[1] < 1e-4 and eta < 2 * pi:
-                                    yield DirectionalPoint(x, y, z, rho, eta)
-                                    eta += pi / ddiv
-                            rho += pi / ddiv
-                    else:
-                        yield Point(x, y, z)
-                    z += step
-                z = zr[0]
-                y += step
-            y = yr[0]
-            x += step
+        d = pi / ddiv
+        rho = steps(rhor, d, int(np.ceil((pi - rhor[0]) / d)) + 2)
+        rho = rho[(rho - rhor[1] < 1e-4) & (rho - pi < 1e-4)]
+        eta = steps(etar, d, int(np.ceil((2 * pi - etar[0]) / d)) + 1)
+        eta = eta[(eta - etar[1] < 1e-4) & (eta < 2 * pi)]
+        poles = (np.abs(rho) < 1e-4) | (np.abs(rho - pi) < 1e-4)
+        directions = np.concatenate((
+            np.column_stack((rho[poles], np.zeros(poles.sum()))),
+            np.column_stack((np.repeat(rho[~poles], len(eta)),
+                np.tile(eta, (~poles).sum())))))
+        return np.column_stack((np.repeat(positions, len(directions), axis=0),
+            np.tile(directions, (len(positions), 1))))
 
     def _parse_task(self, task, modeltype):
         """\
@@ -325,7 +385,7 @@ class YAMLParser(object):
         @return: The parsed task model.
         @rtype: L{Task}
         """
-        whole_model = PointCache()
+        arrays = []
         if 'ranges' in task:
             ddiv = task['ddiv'] if 'ddiv' in task else None
             for prange in task['ranges']:
@@ -337,22 +397,39 @@ class YAMLParser(object):
                     etar = prange['eta']
                 except KeyError:
                     etar = (0.0, 2 * pi)
-                part_model = PointCache()
-                for point in self._pointrange(prange['x'], prange['y'],
-                    prange['z'], task['step'], rhor=rhor, etar=etar, ddiv=ddiv):
-                    part_model[point] = 1.0
-                whole_model |= part_model
+                arrays.append(self._pointrange(prange['x'], prange['y'],
+                    prange['z'], task['step'], rhor=rhor, etar=etar, ddiv=ddiv))
         if 'points' in task:
-            part_model = PointCache()
-            for point in task['points']:
-                if len(point) == 3:
-                    point = Point(*point)
-                elif len(point) == 5:
-                    point = DirectionalPoint(*point)
-                part_model[point] = 1.0
-            whole_model |= part_model
+            for width in (3, 5):
+                arrays.append(np.array([point for point in task['points'] \
+                    if len(point) == width], dtype=float).reshape(-1, width))
+        # Ranges and points are merged (and duplicates removed) at once.
+        whole_model = PointCache.fromkeys(array_points(merge_points(arrays)),
+            1.0)
         params = task['parameters'] if 'parameters' in task else {}
         pose = self._parse_pose(task['pose']) if 'pose' in task  else Pose()
         mount = self.model[task['mount']] if 'mount' in task else None
         return modeltype.yaml['tasks'](params, whole_model, pose=pose,
                                        mount=mount)
+
+
+def load_experiment(filename, cache=True):
+    """\
+    Load an experiment from YAML, using the compiled scene cache (see
+    L{adolphus.scenecache}) if it is valid for the experiment file and all of
+    the files it references.
+
+    @param filename: The YAML file to load from.
+    @type filename: C{str}
+    @param cache: Use the compiled scene cache.
+    @type cache: C{bool}
+    @return: The coverage model and task models for the experiment.
+    @rtype: C{tuple}
+    """
+    experiment = cache and read_scene(filename) or None
+    if experiment is None:
+        parser = YAMLParser(filename)
+        experiment = parser.experiment
+        if cache:
+            write_scene(filename, parser.files, experiment)
+    return experiment
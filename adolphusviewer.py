@@ -11,15 +11,16 @@ from optparse import OptionParser
 
 from adolphus.interface import Experiment
 from adolphus.commands import CommandError
+from adolphus.server import command_server
 
-def receive(experiment, rf):
+def receive(experiment, rf, execute):
     while not experiment.exit:
         try:
             cmd = stdin.readline().rstrip()
         except IOError:
             continue
         try:
-            response = experiment.execute(cmd, response=rf)
+            response = execute(cmd, response=rf)
         except CommandError, e:
             response = pickle.dumps(e)
         except IndexError:
@@ -31,17 +32,27 @@ def receive(experiment, rf):
 
 
 def viewer_main(modelfile=None, config='', zoom=False, server=False,
-                response='pickle'):
-    experiment = Experiment(zoom=zoom)
+                response='pickle', headless=False, address=None):
+    experiment = Experiment(zoom=zoom, headless=headless)
+    server = server or (headless and not address)
     if modelfile:
         experiment.execute('loadmodel %s' % modelfile)
     if not server:
         experiment.execute('loadconfig %s' % config)
     experiment.start()
+    execute = experiment.execute
+    if address:
+        cserver = command_server(experiment, address)
+        execute = cserver.execute
+        listener = Thread(target=cserver.serve_forever)
+        listener.daemon = True
+        listener.start()
     if server:
-        receiver = Thread(target=receive, args=(experiment, response))
+        receiver = Thread(target=receive, args=(experiment, response, execute))
         receiver.start()
     experiment.join()
+    if address:
+        cserver.shutdown()
 
 
 if __name__ == '__main__':
@@ -54,6 +65,18 @@ if __name__ == '__main__':
         action='store_true', help='listen for commands on standard input')
     parser.add_option('-r', '--response', dest='response', default='pickle',
         help='command response format')
+    parser.add_option('-H', '--headless', dest='headless', default=False,
+        action='store_true',
+        help='run without a display (implies -s unless -p or -u is given)')
+    parser.add_option('-p', '--port', dest='port', default=None, type='int',
+        help='listen for commands on a TCP port')
+    parser.add_option('-b', '--bind', dest='bind', default='localhost',
+        help='address to bind the TCP port to')
+    parser.add_option('-u', '--unix', dest='unix', default=None,
+        help='listen for commands on a Unix domain socket')
     opts, args = parser.parse_args()
+    address = opts.unix or (opts.port is not None and (opts.bind, opts.port)) \
+        or None
     viewer_main(modelfile=(args and args[0] or None), config=opts.conf,
-        zoom=opts.zoom, server=opts.server, response=opts.response)
+        zoom=opts.zoom, server=opts.server, response=opts.response,
+        headless=opts.headless, address=address)
@@ -9,12 +9,42 @@ Unit tests for the various Adolphus modules.
 @license: GPL-3
 """
 
+import os
+import atexit
+import pickle
+import shutil
+import struct
+import tempfile
 import unittest
+from threading import Thread
 from math import sqrt, pi, sin, cos
+import numpy as np
+
+# Keep the mesh and scene caches out of the home directory.
+CACHE_DIR = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, CACHE_DIR, True)
+os.environ['ADOLPHUS_CACHE'] = os.path.join(CACHE_DIR, 'mesh')
+os.environ['ADOLPHUS_SCENE_CACHE'] = os.path.join(CACHE_DIR, 'scene')
 
 import adolphus
 from adolphus.geometry import Angle, Point, DirectionalPoint, Pose, Rotation, Triangle
 from adolphus.yamlparser import YAMLParser
+from adolphus import scenecache
+from adolphus.scenecache import read_scene, write_scene
+from adolphus.arrays import points_array, merge_points, read_raw, read_stl, read_obj, \
+    triangles_array, triangle_topology, STL_FACET
+from adolphus.tensor import Tensor, TriangleTensor, stack_tensors, \
+    triangle_tensor_arrays
+from adolphus.solid import RenderDynamic, Solid
+from adolphus.posable import SceneObject, OcclusionTriangle
+from adolphus.robot import Robot
+from adolphus.laser import RangeModel
+from adolphus.coverage import Model
+from adolphus.decimation import decimate, weld, mesh_edges
+from adolphus.interface import Experiment
+from adolphus.commands import CommandError, unpack_array
+from adolphus.server import command_server, CommandClient
+from adolphus.jobs import Job, JobPart
 print('Adolphus imported from "%s"' % adolphus.__path__[0])
 
 
@@ -108,6 +138,202 @@ class TestGeometry(unittest.TestCase):
         self.assertFalse(triangles[2].overlap(triangles[1]))
 
 
+class TestTensor(unittest.TestCase):
+    """\
+    Tests for the tensor module.
+    """
+    def setUp(self):
+        self.t = Tensor([[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+
+    def test_getitem(self):
+        self.assertEqual(self.t[1, 2], 6.0)
+        self.assertEqual(self.t[-1, -2], 8.0)
+        self.assertEqual(self.t[0:1, 1:], [[2.0, 3.0], [5.0, 6.0]])
+        self.assertEqual(self.t[2, :], [[7.0, 8.0, 9.0]])
+        self.assertRaises(IndexError, self.t.__getitem__, 1)
+        self.assertRaises(IndexError, self.t.__getitem__, (3, 0))
+
+    def test_norms(self):
+        self.assertTrue(abs(self.t.schatten() - sqrt(285)) < 1e-9)
+        self.assertTrue(abs(self.t.unit().schatten() - sqrt(3)) < 1e-9)
+        self.assertEqual((-self.t)[0, :], [[-1.0, -2.0, 3.0]])
+        others = [Tensor([[0, 2, 3], [4, 5, 6], [7, 8, 9]]), -self.t]
+        d = self.t.frobenius_array(stack_tensors(others))
+        for i, other in enumerate(others):
+            self.assertTrue(abs(d[i] - self.t.frobenius(other)) < 1e-9)
+
+    def test_triangle_tensor_arrays(self):
+        triangles = [(Point(0, 0, 0), Point(3, 0, 1), Point(0, 2, 0)),
+                     (Point(1, 1, 1), Point(-2, 4, 0), Point(5, 0, 2))]
+        centres, stack = triangle_tensor_arrays(
+            points_array([v for t in triangles for v in t]))
+        for i, vertices in enumerate(triangles):
+            t = TriangleTensor(vertices)
+            self.assertTrue(t.centre.euclidean(Point(*centres[i])) < 1e-9)
+            self.assertTrue((abs(t.array - stack[i]) < 1e-9).all())
+
+
+class TestRenderDynamic(unittest.TestCase):
+    """\
+    Tests for the render dynamic mesh structure.
+    """
+    def setUp(self):
+        self.v = [Point(0, 0, 0), Point(1, 0, 0), Point(1, 1, 0),
+                  Point(0, 1, 0)]
+        self.mesh = RenderDynamic([Triangle(self.v[0], self.v[1], self.v[2]),
+            Triangle(self.v[0], self.v[2], self.v[3])])
+
+    def test_topology(self):
+        self.assertEqual(len(self.mesh.vertices), 4)
+        self.assertEqual(len(self.mesh.edges), 5)
+        self.assertEqual(self.mesh.faces_of_vertex(self.v[0]), [0, 1])
+        self.assertEqual(self.mesh.faces_of_edge((self.v[2], self.v[0])),
+            [0, 1])
+        self.assertEqual(self.mesh.faces_of_face(0), [1])
+        self.assertEqual(self.mesh.flook(*self.v[1:]), None)
+        self.assertEqual(self.mesh.flook(self.v[0], self.v[2], self.v[3]), 1)
+        self.assertEqual(len(self.mesh.vertex_neighbors(self.v[1])), 2)
+        self.assertEqual(len(self.mesh.find_boundary()), 4)
+        self.mesh.remove_face([1])
+        self.assertEqual(len(self.mesh.find_boundary()), 3)
+
+    def test_triangle_topology(self):
+        faces = triangles_array(self.mesh.faces)
+        triangles = np.array([faces[0], faces[0] * 0, faces[1]])
+        topology = triangle_topology(triangles)
+        self.assertEqual(topology['faces'].tolist(), [0, 2])
+        self.assertTrue((topology['normals'] == (0, 0, 1)).all())
+        self.assertEqual(topology['face_vertices'].tolist(), [[0, 1, 2], [0, 2, 3]])
+        self.assertEqual(topology['edges'].tolist(), [[0, 2], [1, 0], [2, 1], [0, 3], [3, 2]])
+        for name, array in self.mesh.topology_arrays().items():
+            self.assertTrue(np.array_equal(topology[name], array) or name == 'faces')
+
+    def test_restore_topology(self):
+        mesh = RenderDynamic(self.mesh.originals, self.mesh.topology_arrays())
+        self.assertEqual(mesh.vertices, self.mesh.vertices)
+        self.assertEqual(mesh.edges, self.mesh.edges)
+        self.assertEqual(mesh.collada_indices, self.mesh.collada_indices)
+        self.assertEqual(mesh.faces_of_edge((self.v[0], self.v[2])), [0, 1])
+        self.assertEqual(mesh.find_boundary(), self.mesh.find_boundary())
+
+    def test_scale(self):
+        self.mesh.scale(2.0)
+        self.assertEqual(self.mesh.vertices[2], Point(2, 2, 0))
+        self.assertEqual(self.mesh.faces[1].vertices[2], Point(0, 2, 0))
+        self.assertEqual(self.mesh.faces_of_edge((Point(0, 0, 0),
+            Point(2, 2, 0))), [0, 1])
+        self.assertEqual(self.mesh.normals[0], Point(0, 0, 1))
+
+
+class TestSolid(unittest.TestCase):
+    """\
+    Tests for the solid module.
+    """
+    def setUp(self):
+        self.solid = Solid('test/tetra.raw', 'T', pose=Pose(T=Point(0, 0, 10)),
+            cache=False)
+
+    def test_read_stl(self):
+        raw = read_raw('test/tetra.raw')
+        self.assertTrue(np.array_equal(read_stl('test/tetra.stl'), raw))
+        facets = np.zeros(len(raw), dtype=STL_FACET)
+        facets['vertices'] = raw
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'tetra.stl')
+        with open(path, 'wb') as f:
+            f.write(b'solid binary'.ljust(80, b' '))
+            f.write(struct.pack('<I', len(raw)))
+            facets.tofile(f)
+        self.assertTrue(np.array_equal(read_stl(path), raw))
+
+    def test_read_obj(self):
+        triangles = read_obj('test/objects.obj').reshape(-1, 3, 3)
+        self.assertEqual(len(triangles), 4)
+        self.assertTrue((triangles[0][:, 2] == 0).all())
+        self.assertTrue((triangles[1][:, 2] == 5).all())
+        self.assertEqual(triangles[2].tolist(), [[0, 0, 9], [2, 0, 9], [2, 2, 9]])
+        self.assertEqual(triangles[3].tolist(), [[0, 0, 9], [2, 2, 9], [0, 2, 9]])
+
+    def test_load(self):
+        raw = self.solid.face_array()
+        stl = Solid('test/tetra.stl', 'S', cache=False)
+        self.assertTrue(np.array_equal(stl.face_array(), raw))
+        self.assertEqual(len(stl.vertices), 4)
+        obj = Solid('test/objects.obj', 'O', cache=False)
+        self.assertEqual(len(obj.faces), 4)
+        self.assertEqual(len(obj.triangles), 4)
+
+    def test_local_occluders(self):
+        local = self.solid.local_occluders()
+        self.assertTrue(np.array_equal(local, self.solid.face_array()))
+        self.assertTrue(np.allclose(self.solid.mapped_occluders(), local + (0, 0, 10)))
+        self.assertTrue(self.solid._triangle_tensors is None)
+        # The occluder list is in face order.
+        occluders = self.solid.occluder_list()
+        self.assertEqual(set(occluders), self.solid.triangles)
+        self.assertTrue(np.allclose(local, [[tuple(v) for v in t.triangle.pose_map(t.relative_pose).vertices] for t in occluders]))
+        self.solid.triangles.discard(occluders[0])
+        self.assertEqual(len(self.solid.local_occluders()), 3)
+        self.assertEqual(len(self.solid.occluder_list()), 3)
+
+    def test_mesh_cache(self):
+        Solid('test/tetra.raw', 'A')
+        self.assertTrue(os.listdir(os.environ['ADOLPHUS_CACHE']))
+        solid = Solid('test/tetra.raw', 'B')
+        # The mesh is backed by the cached arrays until it is needed.
+        self.assertFalse('vertices' in solid.__dict__)
+        self.assertFalse('_triangles' in solid.__dict__)
+        self.assertTrue(isinstance(solid.face_array().base, np.memmap))
+        self.assertEqual(len(solid.triangles), 4)
+        self.assertFalse('vertices' in solid.__dict__)
+        self.assertEqual(solid.vertices, self.solid.vertices)
+        self.assertEqual(solid.faces_of_vertex(Point(0, 0, 0)), [0, 1, 2])
+        self.assertEqual(pickle.loads(pickle.dumps(solid)).vertices, solid.vertices)
+        solid.scale(2.0)
+        self.assertTrue(np.allclose(solid.face_array(), 2 * self.solid.face_array()))
+        self.assertEqual(solid.vertices[1], self.solid.vertices[1] * 2)
+        self.assertTrue(np.array_equal(Solid('test/tetra.raw', 'C').face_array(), self.solid.face_array()))
+
+    def test_scale(self):
+        local = self.solid.local_occluders().copy()
+        mapped = self.solid.mapped_occluders().copy()
+        self.solid.scale(2.0)
+        self.assertTrue(np.allclose(self.solid.local_occluders(), 2 * local))
+        self.assertTrue(np.allclose(self.solid.mapped_occluders(),
+            2 * local + (0, 0, 10)))
+        self.assertFalse(np.allclose(self.solid.mapped_occluders(), mapped))
+
+
+class TestDecimation(unittest.TestCase):
+    """\
+    Tests for the decimation module.
+    """
+    def setUp(self):
+        x, y = np.meshgrid(np.arange(5.0), np.arange(5.0))
+        v = np.column_stack((x.ravel(), y.ravel(), np.zeros(25)))
+        q = np.array([i + 5 * j for j in range(4) for i in range(4)])
+        faces = np.concatenate((np.column_stack((q, q + 1, q + 6)),
+            np.column_stack((q, q + 6, q + 5))))
+        self.grid = v[faces].reshape(-1, 9)
+
+    def test_weld(self):
+        vertices, faces = weld(self.grid)
+        self.assertEqual(len(vertices), 25)
+        edges, counts, owners = mesh_edges(faces)
+        self.assertEqual(len(edges), 56)
+        self.assertEqual((counts == 1).sum(), 16)
+
+    def test_decimate(self):
+        area = lambda t: (np.cross(t[:, 3:6] - t[:, :3],
+            t[:, 6:] - t[:, :3])[:, 2] / 2.0)
+        simple = decimate(self.grid, 1e-3)
+        self.assertEqual(len(simple), 2)
+        self.assertTrue((area(simple) > 0).all())
+        self.assertTrue(abs(area(simple).sum() - 16.0) < 1e-9)
+        self.assertEqual(len(decimate(self.grid, 1e-3, target=20)), 20)
+
+
 class TestPosable(unittest.TestCase):
     """\
     Tests for the posable module.
@@ -143,6 +369,11 @@ class TestPosable(unittest.TestCase):
         self.assertEqual(self.value, 1)
         self.model['Plate'].set_absolute_pose(Pose(T=Point(50, 0, 0)))
         self.assertEqual(self.value, 2)
+        # Changes not followed by a pose query are coalesced.
+        self.model['Block'].set_relative_pose(Pose(T=Point(20, 8, 0)))
+        self.model['Plate'].set_relative_pose(Pose(T=Point(60, 0, 0)))
+        self.assertEqual(self.value, 2)
+        self.model['Block'].pose
         self.model['Block'].mount = None
         self.assertEqual(self.value, 3)
         self.model['Plate'].set_absolute_pose(Pose(T=Point(100, 0, 0)))
@@ -151,6 +382,17 @@ class TestPosable(unittest.TestCase):
         self.model['Block'].set_absolute_pose(Pose())
         self.assertEqual(self.value, 3)
 
+    def test_generation(self):
+        generation = self.model['Block'].generation()
+        triangle = next(iter(self.model['Block'].triangles))
+        mapped = triangle.mapped_triangle()
+        self.model['Plate'].set_absolute_pose(Pose(T=Point(25, 0, 0)))
+        self.assertTrue(self.model['Block'].generation() > generation)
+        self.assertEqual(triangle.mapped_triangle(), mapped.pose_map(Pose(T=Point(25, 0, 0))))
+        generation = self.model['Block'].generation()
+        self.model['Block'].pose
+        self.assertEqual(self.model['Block'].generation(), generation)
+
     def test_mount(self):
         self.assertEqual(self.model['Plate'].mount_pose(), Pose(T=Point(0, 0, 3.2)))
         self.assertEqual(self.model['Block'].mount, self.model['Plate'])
@@ -166,13 +408,91 @@ class TestPosable(unittest.TestCase):
         self.assertTrue(self.model['Block'] in self.model['Plate'].children)
         self.assertEqual(self.model['Block'].get_absolute_pose(), Pose(T=Point(57, 8, 3.2)))
 
+    def test_triangles_from_array(self):
+        pose = Pose(T=Point(1, 2, 3), R=Rotation.from_euler('zyx', (0.3, 0.2, 0.1)))
+        vertices = [[(0, 0, 0), (4, 0, 1), (0, 3, 2)], [(1, 1, 1), (1, 1, 1), (2, 2, 2)],
+                    [(0, 0, 5), (0, 2, 5), (2, 0, 5)], [(0, 0, 0), (1, 0, 0), (0, 1, 0)]]
+        triangles = OcclusionTriangle.from_array(vertices, pose=pose, mount=self.model['Plate'])
+        self.assertEqual(len(triangles), 3)
+        for triangle, v in zip(triangles, [vertices[0]] + vertices[2:]):
+            other = OcclusionTriangle(v, pose=pose, mount=self.model['Plate'])
+            self.assertEqual(triangle.pose, other.pose)
+            self.assertEqual(triangle.mapped_triangle(), other.mapped_triangle())
+
+    def test_triangle_copy(self):
+        triangle = OcclusionTriangle([(0, 0, 0), (4, 0, 1), (0, 3, 2)], mount=self.model['Plate'])
+        other = triangle.copy(mount=self.model['Block'])
+        self.assertTrue(other.triangle is triangle.triangle)
+        self.assertEqual(other.mount, self.model['Block'])
+        self.assertEqual(triangle.mount, self.model['Plate'])
+        self.assertEqual(other.relative_pose, triangle.relative_pose)
+
+
+class TestYAMLParser(unittest.TestCase):
+    """\
+    Tests for the YAML parser.
+    """
+    def setUp(self):
+        self.parser = YAMLParser('test/test01.yaml')
+
+    def test_pointrange(self):
+        points = YAMLParser._pointrange((0, 1), 0, 0, 0.1)
+        self.assertEqual(len(points), 11)
+        self.assertEqual(points[:, 0].tolist(), [i * 0.1 for i in range(11)])
+        self.assertEqual(len(YAMLParser._pointrange((1, 0), 0, 0, 0.1)), 0)
+        # Each position has both poles and every eta at every other rho.
+        self.assertEqual(len(YAMLParser._pointrange((0, 1), 0, 0, 1, ddiv=2)), 12)
+        points = YAMLParser._pointrange((0, 1), 0, 0, 1, ddiv=4)
+        self.assertEqual(len(points), 52)
+        self.assertEqual(len(set(map(tuple, np.round(points, 6)))), 52)
+        self.assertEqual(sorted(set(np.round(points[:, 3], 6))), [round(i * pi / 4, 6) for i in range(5)])
+        points = YAMLParser._pointrange(0, 0, 0, 1, rhor=(pi / 2, pi / 2), etar=(0, pi / 2), ddiv=4)
+        self.assertEqual(points[:, 3:].tolist(), [[pi / 2, 0], [pi / 2, pi / 4], [pi / 2, pi / 2]])
+
+    def test_merge_points(self):
+        merged = merge_points([np.array([[0, 0, 0], [1, 0, 0]]), np.array([[1, 0, 0.00001], [2, 0, 0]]),
+            np.array([[0, 0, 0, 0, 0]]), np.zeros((0, 3))])
+        self.assertEqual(merged.shape, (4, 5))
+        self.assertEqual(merged[:, :3].tolist(), [[0, 0, 0], [1, 0, 0], [2, 0, 0], [0, 0, 0]])
+        self.assertTrue(np.isnan(merged[:3, 3:]).all())
+        self.assertEqual(merge_points([]).shape, (0, 3))
+
+    def test_scene_cache(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        source = os.path.join(directory, 'scene.yaml')
+        with open(source, 'w') as f:
+            f.write('a')
+        stat = os.stat(source)
+        self.assertTrue(write_scene(source, [source], ('model', 'tasks'), directory))
+        self.assertEqual(read_scene(source, directory), ('model', 'tasks'))
+        # A change of contents is detected regardless of size and time.
+        with open(source, 'w') as f:
+            f.write('b')
+        os.utime(source, (stat.st_atime, stat.st_mtime))
+        self.assertEqual(read_scene(source, directory), None)
+        with open(source, 'w') as f:
+            f.write('a')
+        self.assertEqual(read_scene(source, directory), ('model', 'tasks'))
+        # So is a change of the code.
+        signature = scenecache._code_signature
+        scenecache._code_signature = (signature[0], '')
+        self.addCleanup(setattr, scenecache, '_code_signature', signature)
+        self.assertEqual(read_scene(source, directory), None)
+
+    def test_task_ranges_and_points(self):
+        task = self.parser._parse_task({'step': 1, 'ranges': [{'x': (0, 2), 'y': 0, 'z': 0}, {'x': (1, 3), 'y': 0, 'z': 0}],
+            'points': [[2, 0, 0], [5, 0, 0]]}, Model)
+        self.assertEqual(set(task.original.keys()), set([Point(x, 0, 0) for x in [0, 1, 2, 3, 5]]))
+
 
 class TestModel01(unittest.TestCase):
     """\
     Test model 01.
     """
     def setUp(self):
-        self.model, self.tasks = YAMLParser('test/test01.yaml').experiment
+        self.experiment = YAMLParser('test/test01.yaml').experiment
+        self.model, self.tasks = self.experiment
 
     def test_strength(self):
         p1 = Point(0, 0, 1000)
@@ -185,6 +505,13 @@ class TestModel01(unittest.TestCase):
         self.model['C'].set_absolute_pose(Pose(R=Rotation.from_axis_angle(pi, Point(1, 0, 0))))
         self.assertFalse(self.model.strength(p1, self.tasks['R1'].params))
 
+    def test_strength_array(self):
+        points = [Point(0, 0, 1000), Point(0, 0, 1200), Point(30, -20, 800),
+                  DirectionalPoint(10, 10, 900, pi, 0)]
+        s = self.model['C'].strength_array(points_array(points), self.tasks['R1'].params)
+        for i, p in enumerate(points):
+            self.assertTrue(abs(s[i] - self.model['C'].strength(p, self.tasks['R1'].params)) < 1e-9)
+
     def test_performance(self):
         self.assertTrue(self.model.performance(self.tasks['R1']) > 0)
         self.assertEqual(self.model.performance(self.tasks['R2']), 0.0)
@@ -211,6 +538,107 @@ class TestModel01(unittest.TestCase):
         self.assertFalse(any([t.mapped_triangle() in self.model._occlusion_cache[key]['C'].values() for t in self.model['P1'].triangles]))
         self.assertFalse(any([t.mapped_triangle() in self.model._occlusion_cache[key]['C'].values() for t in self.model['P2'].triangles]))
 
+    def test_batch(self):
+        performance = self.model.performance(self.tasks['R1'])
+        key = self.model._update_occlusion_cache(self.tasks['R1'].params)
+        with self.model.batch():
+            self.model['C'].set_absolute_pose(Pose(R=Rotation.from_axis_angle(-pi / 2.0, Point(1, 0, 0))))
+            with self.model.batch():
+                self.model['C'].setparam('zS', 600.0)
+            self.assertFalse(self.model._oc_needs_update[key])
+        self.assertTrue(self.model._oc_needs_update[key])
+        self.assertFalse(self.model._oc_updated[key]['C'])
+        self.assertEqual(self.model.performance(self.tasks['R1']), 0.0)
+        with self.model.batch():
+            self.model['C'].setparam('zS', 1200.0)
+            self.model['C'].set_absolute_pose(Pose())
+        self.assertEqual(self.model.performance(self.tasks['R1']), performance)
+
+    def test_pickle(self):
+        model, tasks = pickle.loads(pickle.dumps(self.experiment, 2))
+        self.assertEqual(model.performance(tasks['R1']), self.model.performance(self.tasks['R1']))
+        model['C'].set_absolute_pose(Pose(T=Point(1000, 0, 0)))
+        self.assertEqual(model.performance(tasks['R1']), 0.0)
+        self.assertTrue(self.model.performance(self.tasks['R1']) > 0)
+
+    def test_forward_kinematics(self):
+        robot = self.model['RV1A']
+        self.model['C'].mount = robot
+        configs = [[90.0, 72.0, 60.0, 0.0, 0.0, 0.0, 0.0], [10.0, 20.0, 90.0, 5.0, 6.0, 7.0, 100.0]]
+        R, T = robot.forward_kinematics(configs)
+        mounted = robot.mounted_poses(configs, (R, T))
+        self.assertEqual(set(mounted), set([self.model['C']]))
+        for i, config in enumerate(configs):
+            robot.config = config
+            for j, link in enumerate(robot.links):
+                self.assertTrue(np.allclose(T[i, j], tuple(link.pose.T)))
+                self.assertTrue(np.allclose(R[i, j], link.pose.R.to_rotation_matrix()))
+            self.assertTrue(np.allclose(T[i, -1], tuple(robot.mount_pose().T)))
+            self.assertTrue(np.allclose(mounted[self.model['C']][1][i], tuple(self.model['C'].pose.T)))
+        self.assertRaises(ValueError, robot.forward_kinematics, [[0.0] * 6])
+
+    def test_mapped_occluders(self):
+        robot = self.model['RV1A']
+        self.assertTrue(robot.triangles is robot.triangles)
+        robot.set_config([90.0, 72.0, 60.0, 0.0, 0.0, 0.0, 0.0])
+        mapped = robot.mapped_occluders()
+        self.assertTrue(robot.mapped_occluders() is mapped)
+        expected = [[tuple(v) for v in t.mapped_triangle().vertices] for t in robot.occluder_list()]
+        self.assertTrue(np.allclose(mapped, expected))
+        robot.set_config([110.0, 72.0, 60.0, 0.0, 0.0, 0.0, 0.0])
+        self.assertFalse(np.allclose(robot.mapped_occluders(), mapped))
+        robot.simplify_occluders(1.0)
+        self.assertEqual(len(robot.mapped_occluders()), len(robot.occluder_list()))
+        self.assertEqual(set(robot.occluder_list()), robot.occluders)
+
+    def test_trajectory_coverage(self):
+        trajectory = [[90.0, 72.0, 60.0, 0.0, 0.0, 0.0, 0.0], [110.0, 72.0, 60.0, 0.0, 0.0, 0.0, 0.0]]
+        points, strengths, union = self.model.trajectory_coverage('RV1A', trajectory, self.tasks['R1'])
+        self.assertEqual(strengths.shape, (2, len(points)))
+        self.assertEqual(strengths[0].max(), 0.0)
+        self.assertTrue(strengths[1].max() > 0)
+        self.assertTrue((union[-1] == strengths.max(axis=0)).all())
+        self.assertEqual(self.model['RV1A'].config, [0, 0, 90, 0, 0, 0, 0])
+
+    def test_triangles_changed(self):
+        self.model['W'] = SceneObject('W')
+        performance = self.model.performance(self.tasks['R1'])
+        self.assertTrue(performance > 0)
+        triangle = OcclusionTriangle((Point(-50, -50, 900), Point(50, -50, 900), Point(0, 50, 900)))
+        triangle.mount = self.model['W']
+        self.model['W'].triangles.add(triangle)
+        self.assertEqual(self.model['W'].occluder_list(), [triangle])
+        self.model['W'].set_absolute_pose(Pose(T=Point(1, 0, 0)))
+        self.assertEqual(self.model.performance(self.tasks['R1']), 0.0)
+        self.model['W'].triangles.discard(triangle)
+        self.assertEqual(self.model.performance(self.tasks['R1']), performance)
+
+    def test_trajectory_coverage_mask(self):
+        self.model['W'] = SceneObject('W', triangles=[OcclusionTriangle((Point(-50, -50, 500), Point(50, -50, 500), Point(0, 50, 500)))])
+        home = [self.model['RV1A'].config]
+        self.assertEqual(self.model.trajectory_coverage('RV1A', home, self.tasks['R1'])[1].max(), 0.0)
+        self.model.occlusion_cache_mask('W')
+        self.assertEqual(self.model.trajectory_coverage('RV1A', home, self.tasks['R1'])[1].max(), self.model.performance(self.tasks['R1']))
+
+    def test_batch_occlusion(self):
+        away = Pose(T=Point(5000, 0, 0))
+        self.model['W'] = SceneObject('W', pose=away, triangles=[OcclusionTriangle((Point(-50, -50, 900), Point(50, -50, 900), Point(0, 50, 900)))])
+        performance = self.model.performance(self.tasks['R1'])
+        self.assertTrue(performance > 0)
+        with self.model.batch():
+            self.model['W'].set_absolute_pose(Pose())
+            self.assertEqual(self.model.performance(self.tasks['R1']), 0.0)
+            self.model['W'].set_absolute_pose(away)
+        self.assertEqual(self.model.performance(self.tasks['R1']), performance)
+
+    def test_trajectory_coverage_mounted_robot(self):
+        links = YAMLParser('test/test01.yaml')._parse_links('robots/mitsubishirv1a.yaml')
+        self.model['R2'] = Robot('R2', mount=self.model['RV1A'], links=links)
+        self.assertRaises(TypeError, self.model['R2'].local_occluders)
+        trajectory = [[90.0, 72.0, 60.0, 0.0, 0.0, 0.0, 0.0], [110.0, 72.0, 60.0, 0.0, 0.0, 0.0, 0.0]]
+        points, strengths, union = self.model.trajectory_coverage('RV1A', trajectory, self.tasks['R1'])
+        self.assertEqual(strengths.shape, (2, len(points)))
+
     def test_robot_occlusion(self):
         self.model['RV1A'].set_config([90.0, 72.0, 60.0, 0.0, 0.0, 0.0, 0.0])
         self.assertEqual(self.model.performance(self.tasks['R1']), 0.0)
@@ -218,5 +646,129 @@ class TestModel01(unittest.TestCase):
         self.assertTrue(self.model.performance(self.tasks['R1']) > 0)
 
 
+class TestRangeModel(unittest.TestCase):
+    """\
+    Tests for the range coverage model.
+    """
+    def setUp(self):
+        self.model, self.tasks = YAMLParser('test/range.yaml').experiment
+
+    def test_transport_resolution(self):
+        for resolution, stops in [(None, [1, 1, 1, 1, 1]), (5.0, [2, 3])]:
+            transport = RangeModel.LinearTargetTransport(self.model, resolution=resolution)
+            transport.task = self.tasks['scan']
+            with transport:
+                self.assertEqual([len(stop[0]) for stop in transport.stops(cache=False)], stops)
+
+    def test_rangecoveragelt(self):
+        experiment = Experiment(headless=True)
+        experiment.execute('loadmodel test/range.yaml')
+        performance = pickle.loads(experiment.execute('rangecoveragelt scan 5.0'))
+        self.assertEqual(len(experiment.coverage['range']), 5)
+        jid = pickle.loads(experiment.execute('job rangecoveragelt scan 0 1 0 5.0'))
+        experiment.jobs[jid].join()
+        status = pickle.loads(experiment.execute('jobstatus %d' % jid))
+        self.assertEqual(status['state'], 'done')
+        self.assertEqual(status['performance']['range'], performance)
+
+
+class TestExperiment(unittest.TestCase):
+    """\
+    Test headless experiment.
+    """
+    def setUp(self):
+        self.experiment = Experiment(headless=True)
+        self.experiment.execute('loadmodel test/test01.yaml')
+
+    def test_headless(self):
+        self.assertEqual(self.experiment.display, None)
+        self.assertEqual(pickle.loads(self.experiment.execute('strength R1 0 0 1000')), 1.0)
+        self.experiment.execute('setpose C quaternion 0 0 2000 1 0 0 0')
+        self.assertEqual(pickle.loads(self.experiment.execute('coverage R1'))['R1'], 0.0)
+        self.assertRaises(CommandError, self.experiment.execute, 'axes')
+
+    def test_strengthbatch(self):
+        points = np.array([[0, 0, 1000], [0, 0, 1200], [0, 0, 1000]], dtype='<f8')
+        strengths = pickle.loads(self.experiment.execute('strengthbatch R1', data=points.tobytes()))
+        self.assertEqual(list(strengths), [pickle.loads(self.experiment.execute('strength R1 %d %d %d' % tuple(p))) for p in points])
+        self.assertRaises(CommandError, self.experiment.execute, 'strengthbatch R1 5', data=points.tobytes())
+
+    def test_batch(self):
+        results = pickle.loads(self.experiment.execute('batch setpose C quaternion 0 0 2000 1 0 0 0 ; strength R1 0 0 1000; nosuchcommand'))
+        self.assertEqual(results[:2], [None, 0.0])
+        self.assertTrue(isinstance(results[2], CommandError))
+        self.assertEqual(self.experiment.execute('batch getactive C; getactive C', response='csv'), '1#1#')
+
+    def test_pointcoverage(self):
+        result = unpack_array(self.experiment.execute('pointcoverage R1', response='binary'))
+        self.assertEqual(result.shape, (len(self.experiment.tasks['R1'].mapped), 4))
+        coverage = self.experiment.model.coverage(self.experiment.tasks['R1'])
+        for row in result:
+            self.assertEqual(row[3], coverage[Point(*row[:3])])
+        self.assertTrue((pickle.loads(self.experiment.execute('pointcoverage R1')) == result).all())
+        self.assertRaises(CommandError, self.experiment.execute, 'tasks', response='binary')
+
+    def test_job(self):
+        performance = pickle.loads(self.experiment.execute('coverage'))
+        jid = pickle.loads(self.experiment.execute('job coverage'))
+        self.experiment.jobs[jid].join()
+        status = pickle.loads(self.experiment.execute('jobstatus %d' % jid))
+        self.assertEqual(status['state'], 'done')
+        self.assertEqual(status['done'], status['total'])
+        for task in performance:
+            self.assertAlmostEqual(status['performance'][task], performance[task])
+            self.assertTrue(task in self.experiment.coverage)
+        def stream():
+            while True:
+                yield Point(0, 0, 1000), 1.0
+        j = Job(self.experiment.lock, 'test', [JobPart('T', 100, stream())], step=1)
+        self.experiment.jobs[j.id] = j
+        j.start()
+        self.experiment.execute('jobcancel %d' % j.id)
+        j.join()
+        status = pickle.loads(self.experiment.execute('jobstatus %d' % j.id))
+        self.assertEqual(status['state'], 'cancelled')
+        self.assertFalse('T' in self.experiment.coverage)
+        self.assertRaises(CommandError, self.experiment.execute, 'job strength R1')
+
+    def test_lock(self):
+        self.experiment.lock.acquire_write()
+        try:
+            thread = Thread(target=self.experiment.execute, args=('setactive C',))
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+        finally:
+            self.experiment.lock.release_write()
+        thread.join()
+        self.assertEqual(self.experiment.execute('batch getactive C; getactive C', response='csv'), '0#0#')
+
+    def test_server(self):
+        server = command_server(self.experiment, ('localhost', 0))
+        listener = Thread(target=server.serve_forever)
+        listener.start()
+        try:
+            clients = [CommandClient(server.server_address) for i in range(2)]
+            self.assertEqual(pickle.loads(clients[0].execute('strength R1 0 0 1000')), 1.0)
+            ids = [clients[1].send('getposition RV1A'), clients[1].send('nosuchcommand'), clients[1].send('tasks', 'csv')]
+            responses = [clients[1].receive() for i in range(3)]
+            self.assertEqual([r[0] for r in responses], ids)
+            rid = clients[1].send('getposition RV1A')
+            self.assertEqual(pickle.loads(clients[1].execute('getactive C')), True)
+            self.assertEqual(clients[1].receive()[0], rid)
+            self.assertEqual(pickle.loads(responses[0][1]), [0, 0, 90, 0, 0, 0, 0])
+            self.assertTrue(isinstance(responses[1][1], CommandError))
+            self.assertEqual(set(responses[2][1].decode().rstrip('#').split(',')), set(['R1', 'R2']))
+            points = np.array([[0, 0, 1000], [0, 0, 1200]], dtype='<f8')
+            self.assertEqual(list(pickle.loads(clients[0].execute('strengthbatch R1', data=points.tobytes()))), [1.0, 0.0])
+            self.assertEqual(list(unpack_array(clients[0].execute('strengthbatch R1', 'binary', points.tobytes()))[:, 0]), [1.0, 0.0])
+            for client in clients:
+                client.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            listener.join()
+
+
 if __name__ == '__main__':
     unittest.main()